@@ -0,0 +1,65 @@
+"""
+Async variants of the API routers
+
+Each sync route is re-registered as an `async def` endpoint that takes an
+aiosqlite-backed AsyncSession and runs the original handler through
+`AsyncSession.run_sync`. Database I/O then happens on the driver's own
+thread while the event loop keeps serving other requests, instead of
+occupying a slot in FastAPI's threadpool. Handler logic, validation and
+OpenAPI metadata are shared with the sync routers.
+"""
+
+import inspect
+
+from fastapi import APIRouter, Depends
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import get_async_session, get_read_session, get_session
+
+
+def _async_endpoint(endpoint):
+    """Wrap a sync endpoint so its session dependency is an AsyncSession"""
+    signature = inspect.signature(endpoint)
+    # Reads and writes alike get the primary: replica routing is sync-only
+    db_param = next(
+        name for name, param in signature.parameters.items()
+        if isinstance(param.default, DependsParam) and param.default.dependency in (get_session, get_read_session)
+    )
+
+    async def wrapper(**kwargs):
+        db: AsyncSession = kwargs.pop(db_param)
+        return await db.run_sync(lambda session: endpoint(**kwargs, **{db_param: session}))
+
+    wrapper.__name__ = endpoint.__name__
+    wrapper.__doc__ = endpoint.__doc__
+    # Lets the profiler attribute samples in the sync handler to this route
+    wrapper.__wrapped__ = endpoint
+    wrapper.__signature__ = signature.replace(parameters=[
+        param.replace(default=Depends(get_async_session), annotation=AsyncSession)
+        if name == db_param else param
+        for name, param in signature.parameters.items()
+    ])
+    return wrapper
+
+
+def make_async_router(router: APIRouter) -> APIRouter:
+    """Build an async router mirroring every route of a sync router"""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        async_router.add_api_route(
+            route.path,
+            _async_endpoint(route.endpoint),
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            response_class=route.response_class,
+            name=route.name,
+            summary=route.summary,
+            description=route.description,
+            responses=route.responses,
+        )
+    return async_router
@@ -0,0 +1,30 @@
+"""
+Skill leaderboard API routes
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session as DBSession
+from app.db import get_read_session
+from app.leaderboard import skill_rank, top_scores
+from app.schemas import LeaderboardEntry, SkillRank
+
+router = APIRouter()
+
+
+@router.get("/{skill_type}", response_model=list[LeaderboardEntry])
+def get_leaderboard(
+    skill_type: str,
+    limit: int = Query(10, ge=1, le=100, description="Number of users to return"),
+    db: DBSession = Depends(get_read_session)
+):
+    """Top users for a skill by best score"""
+    return top_scores(db, skill_type, limit)
+
+
+@router.get("/{skill_type}/users/{user_id}", response_model=SkillRank)
+def get_user_rank(skill_type: str, user_id: int, db: DBSession = Depends(get_read_session)):
+    """A user's rank and percentile for a skill"""
+    rank = skill_rank(db, skill_type, user_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="No sessions for this user and skill")
+    return rank
@@ -2,20 +2,77 @@
 Session management API routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session as DBSession, select, func
-from app.db import get_session
-from app.models import Session, User
-from app.schemas import SessionCreate, SessionResponse, SessionSummary
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterator, Literal, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import tuple_
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session as DBSession, select
+from app.cache import cache_session, get_cached_session, get_cached_user
+from app.cache_backends import SUMMARY_CACHE_TTL_SECONDS, get_summary_cache, summary_key
+from app.conditional import (
+    bump_user_versions,
+    get_user_version,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
+from app.db import get_read_session, get_session, streaming_bind
+from app.fast_json import FAST_JSON, fast_json_response, rows_to_dicts
+from app.models import Session, SkillRollup, User
+from app.pagination import NEXT_CURSOR_HEADER, CursorQuery, LimitQuery, decode_cursor, encode_cursor
+from app.replicas import note_write
+from app.rollups import apply_session
+from app.schemas import (
+    SessionBatchItemResult,
+    SessionBatchResult,
+    SessionCreate,
+    SessionResponse,
+    SessionSearchHit,
+    SessionSummary,
+    SessionTrends,
+)
+from app.search import FTS_TABLE, match_expression, search_hits
+from app.session_metadata import metadata_condition, parse_metadata_filter
+from app.session_writer import get_session_writer, insert_sessions
+from app.trends import Bucket, compute_trends, naive_utc
 
 router = APIRouter()
 
+# Largest number of sessions accepted by one POST /sessions/batch
+MAX_BATCH_SIZE = 1000
+
+# Rows fetched from the server-side cursor per chunk of an export stream
+EXPORT_BATCH_SIZE = 1000
+
+# Default and largest page of /sessions/search results
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# SessionResponse fields and the columns that fill them, for row-tuple queries
+SESSION_FIELDS = ["id", "user_id", "skill_type", "score", "feedback", "timestamp", "metadata"]
+SESSION_COLUMNS = (
+    Session.id,
+    Session.user_id,
+    Session.skill_type,
+    Session.score,
+    Session.feedback,
+    Session.timestamp,
+    Session.metadata_,
+)
+
 
 @router.post("", response_model=SessionResponse, status_code=201)
 def create_session(session_data: SessionCreate, db: DBSession = Depends(get_session)):
     """Create a new coaching session"""
     # Verify user exists
-    user = db.get(User, session_data.user_id)
+    user = get_cached_user(db, session_data.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -23,89 +80,328 @@ def create_session(session_data: SessionCreate, db: DBSession = Depends(get_sess
     if not (0 <= session_data.score <= 100):
         raise HTTPException(status_code=400, detail="Score must be between 0 and 100")
     
-    db_session = Session(**session_data.dict())
+    db_session = Session(**session_data.dict(exclude={"metadata"}), metadata_=session_data.metadata)
+    
+    # Write-behind: the writer thread group-commits and hands back the new ID.
+    # Async handlers run on the event loop, which must not block on it.
+    writer = get_session_writer()
+    if writer is not None and not db.get_bind().dialect.is_async:
+        db.close()  # give the pooled connection back while waiting on the writer
+        db_session.id = writer.submit(db_session)
+        # The writer thread is outside this request, so read back the version it committed (or a later one)
+        note_write(db_session.user_id, get_user_version(db, db_session.user_id)[0])
+        return cache_session(db_session)
+    
     db.add(db_session)
+    apply_session(db, db_session)
+    bump_user_versions(db, [db_session.user_id])
     db.commit()
     db.refresh(db_session)
-    return db_session
+    return cache_session(db_session)
+
+
+@router.post("/batch", response_model=SessionBatchResult)
+def create_sessions_batch(
+    items: list[Any] = Body(..., description="SessionCreate objects, validated one by one"),
+    db: DBSession = Depends(get_session)
+):
+    """Create many coaching sessions in one transaction, reporting per-item results"""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch may contain at most {MAX_BATCH_SIZE} sessions")
+    
+    # Validate each item on its own, so one malformed item fails alone instead of the whole batch
+    results: list[SessionBatchItemResult] = []
+    valid: dict[int, SessionCreate] = {}
+    for index, raw in enumerate(items):
+        try:
+            valid[index] = SessionCreate.model_validate(raw)
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+            results.append(SessionBatchItemResult(index=index, status_code=422, detail=detail))
+    
+    # One query to check every referenced user
+    user_ids = {item.user_id for item in valid.values()}
+    existing_users = set(db.exec(select(User.id).where(User.id.in_(user_ids))).all()) if user_ids else set()
+    
+    new_sessions: list[Session] = []
+    for index, item in valid.items():
+        if item.user_id not in existing_users:
+            results.append(SessionBatchItemResult(index=index, status_code=404, detail="User not found"))
+        elif not (0 <= item.score <= 100):
+            results.append(SessionBatchItemResult(
+                index=index, status_code=400, detail="Score must be between 0 and 100"
+            ))
+        else:
+            results.append(SessionBatchItemResult(index=index, status_code=201))
+            new_sessions.append(Session(**item.dict(exclude={"metadata"}), metadata_=item.metadata))
+    results.sort(key=lambda result: result.index)
+    
+    if new_sessions:
+        ids = insert_sessions(db, new_sessions)
+        db.commit()
+        
+        created = iter(ids)
+        for result in results:
+            if result.status_code == 201:
+                result.id = next(created)
+    
+    return SessionBatchResult(
+        created=len(new_sessions),
+        failed=len(items) - len(new_sessions),
+        results=results,
+    )
 
 
 @router.get("", response_model=list[SessionResponse])
 def list_sessions(
+    request: Request,
+    response: Response,
     user_id: int = Query(None, description="Filter by user ID"),
     skill_type: str = Query(None, description="Filter by skill type"),
-    db: DBSession = Depends(get_session)
+    meta: list[str] = Query([], description="Filter by an indexed metadata key, as key:value (repeatable)"),
+    limit: int = LimitQuery,
+    cursor: Optional[str] = CursorQuery,
+    db: DBSession = Depends(get_read_session)
 ):
-    """List sessions with optional filters"""
-    query = select(Session)
+    """List sessions, newest first, one keyset page at a time"""
+    metadata_filters = [parse_metadata_filter(raw) for raw in meta]
+    
+    # A user's pages only change when that user writes: answer 304 from the version alone
+    if user_id:
+        version, last_modified = get_user_version(db, user_id)
+        etag = make_etag("sessions", user_id, version, request.url.query)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        response.headers.update(validator_headers(etag, last_modified))
+    
+    # The fast path skips ORM objects and response_model validation entirely
+    query = select(*SESSION_COLUMNS) if FAST_JSON else select(Session)
     
     if user_id:
         query = query.where(Session.user_id == user_id)
     if skill_type:
         query = query.where(Session.skill_type == skill_type)
+    for key, values in metadata_filters:
+        query = query.where(metadata_condition(key, values))
+    if cursor:
+        # Resume strictly after the last (timestamp, id) of the previous page
+        query = query.where(tuple_(Session.timestamp, Session.id) < decode_cursor(cursor, datetime, int))
     
-    query = query.order_by(Session.timestamp.desc())
+    query = query.order_by(Session.timestamp.desc(), Session.id.desc()).limit(limit + 1)
     sessions = db.exec(query).all()
+    
+    # Fetching one extra row tells us whether another page exists
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        last = sessions[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.timestamp, last.id)
+    if FAST_JSON:
+        return fast_json_response(rows_to_dicts(SESSION_FIELDS, sessions), response)
     return sessions
 
 
 @router.get("/summary", response_model=SessionSummary)
 def get_session_summary(
+    request: Request,
+    response: Response,
     user_id: int = Query(..., description="User ID for summary"),
-    db: DBSession = Depends(get_session)
+    db: DBSession = Depends(get_read_session)
 ):
     """Get aggregated session statistics for a user"""
     # Verify user exists
-    user = db.get(User, user_id)
+    user = get_cached_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get all sessions for user
-    sessions = db.exec(
-        select(Session).where(Session.user_id == user_id)
+    # The ETag and the cache key below come from this one version read, so a
+    # body can never be served under a validator for a different version
+    version, last_modified = get_user_version(db, user_id)
+    etag = make_etag("summary", user_id, version)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    
+    # Shared across workers. Writes bump the version in their own transaction, so a
+    # summary computed before a write stays under the old key even if it is stored late
+    summary_cache = get_summary_cache()
+    key = summary_key(user_id, version)
+    cached = summary_cache.get(key)
+    if cached is not None:
+        return SessionSummary.model_validate_json(cached)
+    
+    # Read the maintained rollups: one row per skill, no session scan
+    rows = db.exec(
+        select(SkillRollup.skill_type, SkillRollup.session_count, SkillRollup.score_sum)
+        .where(SkillRollup.user_id == user_id)
     ).all()
     
-    if not sessions:
-        return SessionSummary(
+    if not rows:
+        summary = SessionSummary(
             total_sessions=0,
             average_score=0.0,
             average_score_by_skill={},
             sessions_by_skill={}
         )
+    else:
+        # Combine per-skill totals (a handful of rows) into the overall figures
+        total_sessions = sum(count for _, count, _ in rows)
+        total_score = sum(score_sum for _, _, score_sum in rows)
+        summary = SessionSummary(
+            total_sessions=total_sessions,
+            average_score=total_score / total_sessions,
+            average_score_by_skill={
+                skill: score_sum / count for skill, count, score_sum in rows
+            },
+            sessions_by_skill={skill: count for skill, count, _ in rows}
+        )
+    
+    # A replica that trails the primary computed this at its own (older) version, so the key still fits
+    summary_cache.set(key, summary.model_dump_json().encode(), SUMMARY_CACHE_TTL_SECONDS)
+    return summary
+
+
+def _export_record(row) -> list:
+    """Column values of an export row, with the timestamp as ISO-8601"""
+    return [*row[:5], row[5].isoformat(), row[6]]
+
+
+def _export_rows(bind, query, fmt: str) -> Iterator[str]:
+    """Stream query results as NDJSON or CSV, one chunk per cursor batch"""
+    # A dedicated connection owns the cursor for the whole life of the stream
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(query)
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(SESSION_FIELDS)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            for batch in result.partitions():
+                writer.writerows(_export_record(row) for row in batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        else:
+            for batch in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(SESSION_FIELDS, _export_record(row)))) + "\n"
+                    for row in batch
+                )
+
+
+@router.get("/search", response_model=list[SessionSearchHit])
+def search_sessions(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Words to find in feedback or metadata"),
+    user_id: int = Query(None, description="Filter by user ID"),
+    skill_type: str = Query(None, description="Filter by skill type"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE, description="Maximum number of hits to return"),
+    cursor: Optional[str] = CursorQuery,
+    db: DBSession = Depends(get_read_session)
+):
+    """Full-text search over session feedback and metadata, best matches first"""
+    match = match_expression(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word")
+    
+    hits = search_hits(match)
+    query = select(Session, hits.c.rank, hits.c.snippet).join(hits, hits.c.session_id == Session.id)
+    if user_id:
+        query = query.where(Session.user_id == user_id)
+    if skill_type:
+        query = query.where(Session.skill_type == skill_type)
+    if cursor:
+        # Resume strictly after the last (rank, id) of the previous page
+        query = query.where(tuple_(hits.c.rank, Session.id) > decode_cursor(cursor, float, int))
+    
+    query = query.order_by(hits.c.rank, Session.id).limit(limit + 1)
+    try:
+        rows = db.exec(query).all()
+    except OperationalError as e:
+        if FTS_TABLE not in str(e):
+            raise
+        raise HTTPException(status_code=503, detail="Full-text search is not available") from e
+    
+    # Fetching one extra row tells us whether another page exists
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, rank, _ = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rank, last.id)
+    return [SessionSearchHit(session=session, rank=rank, snippet=snippet) for session, rank, snippet in rows]
+
+
+@router.get("/trends", response_model=SessionTrends)
+def get_session_trends(
+    request: Request,
+    response: Response,
+    user_id: int = Query(..., description="User ID for trends"),
+    skill_type: Optional[str] = Query(None, description="Filter by skill type"),
+    bucket: Bucket = Query("day", description="Bucket size"),
+    start: Optional[datetime] = Query(None, alias="from", description="Only sessions at or after this time"),
+    end: Optional[datetime] = Query(None, alias="to", description="Only sessions before this time"),
+    db: DBSession = Depends(get_read_session)
+):
+    """Per-day/week/month score count, average, min, max and percentiles"""
+    user = get_cached_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    start, end = naive_utc(start), naive_utc(end)
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    
+    version, last_modified = get_user_version(db, user_id)
+    etag = make_etag("trends", user_id, version, request.url.query)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    
+    return SessionTrends(
+        user_id=user_id,
+        skill_type=skill_type,
+        bucket=bucket,
+        buckets=compute_trends(db, user_id, bucket, skill_type, start, end),
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_sessions(
+    user_id: int = Query(None, description="Filter by user ID"),
+    skill_type: str = Query(None, description="Filter by skill type"),
+    since: Optional[datetime] = Query(None, description="Only sessions at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only sessions before this time"),
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    db: DBSession = Depends(get_read_session)
+):
+    """Stream full session history in chronological order with bounded memory"""
+    query = select(*SESSION_COLUMNS)
+    
+    if user_id:
+        query = query.where(Session.user_id == user_id)
+    if skill_type:
+        query = query.where(Session.skill_type == skill_type)
+    if since:
+        query = query.where(Session.timestamp >= since)
+    if until:
+        query = query.where(Session.timestamp < until)
+    
+    query = query.order_by(Session.timestamp, Session.id)
     
-    # Calculate aggregates
-    total_sessions = len(sessions)
-    average_score = sum(s.score for s in sessions) / total_sessions
-    
-    # Group by skill type
-    skill_scores: dict[str, list[int]] = {}
-    skill_counts: dict[str, int] = {}
-    
-    for s in sessions:
-        if s.skill_type not in skill_scores:
-            skill_scores[s.skill_type] = []
-            skill_counts[s.skill_type] = 0
-        skill_scores[s.skill_type].append(s.score)
-        skill_counts[s.skill_type] += 1
-    
-    # Calculate average per skill
-    average_score_by_skill = {
-        skill: sum(scores) / len(scores)
-        for skill, scores in skill_scores.items()
-    }
-    
-    return SessionSummary(
-        total_sessions=total_sessions,
-        average_score=average_score,
-        average_score_by_skill=average_score_by_skill,
-        sessions_by_skill=skill_counts
+    if format == "csv":
+        media_type, filename = "text/csv", "sessions.csv"
+    else:
+        media_type, filename = "application/x-ndjson", "sessions.ndjson"
+    return StreamingResponse(
+        _export_rows(streaming_bind(db), query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
-def get_session(session_id: int, db: DBSession = Depends(get_session)):
+def get_session(session_id: int, db: DBSession = Depends(get_read_session)):
     """Get session by ID"""
-    db_session = db.get(Session, session_id)
+    db_session = get_cached_session(db, session_id)
     if not db_session:
         raise HTTPException(status_code=404, detail="Session not found")
     return db_session
@@ -2,14 +2,23 @@
 User management API routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlmodel import Session as DBSession, select
-from app.db import get_session
+from app.cache import cache_user, get_cached_user
+from app.conditional import bump_user_versions, is_not_modified, make_etag, not_modified, validator_headers
+from app.db import get_read_session, get_session
+from app.fast_json import FAST_JSON, fast_json_response, rows_to_dicts
 from app.models import User
+from app.pagination import NEXT_CURSOR_HEADER, CursorQuery, LimitQuery, decode_cursor, encode_cursor
 from app.schemas import UserCreate, UserResponse
 
 router = APIRouter()
 
+# UserResponse fields and the columns that fill them, for row-tuple queries
+USER_FIELDS = ["id", "username", "email", "created_at"]
+USER_COLUMNS = (User.id, User.username, User.email, User.created_at)
+
 
 @router.post("", response_model=UserResponse, status_code=201)
 def create_user(user: UserCreate, db: DBSession = Depends(get_session)):
@@ -21,23 +30,50 @@ def create_user(user: UserCreate, db: DBSession = Depends(get_session)):
     
     db_user = User(**user.dict())
     db.add(db_user)
+    db.flush()
+    # Version 1 marks the user as created, so a consistency token can wait for the row on replicas
+    bump_user_versions(db, [db_user.id])
     db.commit()
     db.refresh(db_user)
-    return db_user
+    return cache_user(db_user)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: DBSession = Depends(get_session)):
+def get_user(user_id: int, request: Request, response: Response, db: DBSession = Depends(get_read_session)):
     """Get user by ID"""
-    user = db.get(User, user_id)
+    user = get_cached_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    
+    # Users never change once created, so the ID alone identifies the representation
+    etag = make_etag("user", user_id)
+    if is_not_modified(request, etag, user.created_at):
+        return not_modified(etag, user.created_at)
+    response.headers.update(validator_headers(etag, user.created_at))
     return user
 
 
 @router.get("", response_model=list[UserResponse])
-def list_users(db: DBSession = Depends(get_session)):
-    """List all users"""
-    users = db.exec(select(User)).all()
+def list_users(
+    response: Response,
+    limit: int = LimitQuery,
+    cursor: Optional[str] = CursorQuery,
+    db: DBSession = Depends(get_read_session)
+):
+    """List users in ID order, one keyset page at a time"""
+    # The fast path skips ORM objects and response_model validation entirely
+    query = select(*USER_COLUMNS) if FAST_JSON else select(User)
+    if cursor:
+        (after_id,) = decode_cursor(cursor, int)
+        query = query.where(User.id > after_id)
+    
+    users = db.exec(query.order_by(User.id).limit(limit + 1)).all()
+    
+    # Fetching one extra row tells us whether another page exists
+    if len(users) > limit:
+        users = users[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(users[-1].id)
+    if FAST_JSON:
+        return fast_json_response(rows_to_dicts(USER_FIELDS, users), response)
     return users
 
@@ -0,0 +1,129 @@
+"""
+In-process LRU + TTL caches for primary-key reads
+
+Users and sessions are never modified once created, so their API
+representations can be served from memory. Each cache is bounded by
+entry count (least recently used entries are evicted first) and by age.
+Hit/miss/eviction counters are exposed on GET /cache/stats for sizing.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from sqlmodel import Session as DBSession
+
+from app.models import Session, User
+from app.schemas import SessionResponse, UserResponse
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Drop a key if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict[str, int]:
+        """Counters for sizing the cache"""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+user_cache = TTLCache(USER_CACHE_SIZE, CACHE_TTL_SECONDS)
+session_cache = TTLCache(SESSION_CACHE_SIZE, CACHE_TTL_SECONDS)
+
+
+def cache_user(user: User) -> UserResponse:
+    """Cache a freshly loaded or created user and return its response model"""
+    cached = UserResponse.model_validate(user)
+    user_cache.set(cached.id, cached)
+    return cached
+
+
+def cache_session(session: Session) -> SessionResponse:
+    """Cache a freshly loaded or created session and return its response model"""
+    cached = SessionResponse.model_validate(session)
+    session_cache.set(cached.id, cached)
+    return cached
+
+
+def get_cached_user(db: DBSession, user_id: int) -> Optional[UserResponse]:
+    """Read-through lookup of a user by primary key"""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = db.get(User, user_id)
+    return cache_user(user) if user else None
+
+
+def get_cached_session(db: DBSession, session_id: int) -> Optional[SessionResponse]:
+    """Read-through lookup of a session by primary key"""
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        return cached
+    session = db.get(Session, session_id)
+    return cache_session(session) if session else None
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    """Counters for every cache"""
+    return {"users": user_cache.stats(), "sessions": session_cache.stats()}
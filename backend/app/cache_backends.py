@@ -0,0 +1,170 @@
+"""
+Pluggable cache backends for values shared across uvicorn workers
+
+The in-memory backend is per process. With several workers, point
+SUMMARY_CACHE_URL at a Redis server (redis://host:6379/0) so every worker
+reads and fills the same entries. The `redis` package is only
+imported when a Redis URL is configured.
+"""
+
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_URL = os.getenv("SUMMARY_CACHE_URL", "memory://")
+SUMMARY_CACHE_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "300"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "10000"))
+
+
+class CacheBackend(ABC):
+    """Byte-string key/value cache with per-entry TTL"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: int):
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process backend on top of TTLCache (the TTL is fixed per backend)"""
+
+    def __init__(self, maxsize: int = SUMMARY_CACHE_SIZE, ttl: int = SUMMARY_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self._cache.set(key, value)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend speaking the Redis protocol
+
+    Redis failures are logged and treated as misses, so an unavailable cache
+    slows requests down instead of failing them.
+    """
+
+    def __init__(self, url: str = None, client=None, prefix: str = "nanosensei:"):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.client = client
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self.client.get(self.prefix + key)
+        except Exception:
+            logger.warning("Cache get failed for %s", key, exc_info=True)
+            self._count("errors")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: bytes, ttl: int):
+        try:
+            self.client.set(self.prefix + key, value, ex=ttl)
+        except Exception:
+            logger.warning("Cache set failed for %s", key, exc_info=True)
+            self._count("errors")
+
+    def delete(self, *keys: str):
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except Exception:
+            logger.warning("Cache delete failed for %s", keys, exc_info=True)
+            self._count("errors")
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + "*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception:
+            logger.warning("Cache clear failed", exc_info=True)
+            self._count("errors")
+            return
+        with self._lock:
+            self.hits = self.misses = self.errors = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+def create_cache_backend(url: str) -> CacheBackend:
+    """Build a backend from a URL: memory:// or redis://host:port/db"""
+    if url in ("", "memory://"):
+        return MemoryCacheBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported cache URL {url!r}")
+
+
+_summary_cache: Optional[CacheBackend] = None
+
+
+def get_summary_cache() -> CacheBackend:
+    """The backend holding per-user session summaries, created on first use"""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = create_cache_backend(SUMMARY_CACHE_URL)
+    return _summary_cache
+
+
+def set_summary_cache(backend: CacheBackend):
+    """Swap the summary backend (used by tests and benchmarks)"""
+    global _summary_cache
+    _summary_cache = backend
+
+
+def summary_key(user_id: int, version: int) -> str:
+    """Cache key of a user's session summary as of a user version
+
+    Writes bump the version, so entries never need deleting; superseded
+    ones simply age out through the TTL.
+    """
+    return f"summary:{user_id}:{version}"
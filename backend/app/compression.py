@@ -0,0 +1,218 @@
+"""
+Response compression middleware
+
+Compresses response bodies with the best encoding both sides support:
+zstd and brotli when their packages are installed, gzip always. Small
+bodies, 304s and responses that already carry a Content-Encoding are
+passed through untouched. Streaming responses (e.g. /sessions/export)
+are compressed chunk by chunk, with a flush after each chunk so clients
+still receive rows as they are produced.
+"""
+
+import os
+import zlib
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoder
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional encoder
+    zstandard = None
+
+# Encodings in server preference order; unavailable ones are skipped. Empty disables compression.
+COMPRESSION_ENCODINGS = [
+    e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()
+]
+# Complete bodies smaller than this many bytes are sent uncompressed
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1000"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_LEVEL = int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Statuses that never carry a body worth compressing
+NO_BODY_STATUSES = {204, 304}
+
+
+class Compressor(ABC):
+    """Incremental compressor for one response body"""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it immediately"""
+
+    @abstractmethod
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the final chunk and end the stream"""
+
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encodings(encodings: list[str]) -> list[str]:
+    """Filter encodings down to those whose encoder is installed"""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [e for e in encodings if installed.get(e, False)]
+
+
+def choose_encoding(accept_encoding: str, encodings: list[str]) -> Optional[str]:
+    """Pick the first server-preferred encoding the client accepts (q > 0)"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with zstd, brotli or gzip"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Optional[list[str]] = None,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_level: int = COMPRESSION_BROTLI_LEVEL,
+        zstd_level: int = COMPRESSION_ZSTD_LEVEL,
+    ) -> None:
+        self.app = app
+        self.encodings = available_encodings(COMPRESSION_ENCODINGS if encodings is None else encodings)
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_level, "zstd": zstd_level}
+
+    def make_compressor(self, encoding: str) -> Compressor:
+        """Create a fresh compressor for one response"""
+        level = self.levels[encoding]
+        if encoding == "zstd":
+            return ZstdCompressor(level)
+        if encoding == "br":
+            return BrotliCompressor(level)
+        return GzipCompressor(level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state: holds the start message until the first body chunk decides"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    def _start_compressed(self) -> None:
+        """Rewrite the held start message's headers for a compressed body"""
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The encoded bytes differ from the identity representation, so the validator becomes weak
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        self.compressor = self.middleware.make_compressor(self.encoding)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = message["status"] in NO_BODY_STATUSES or "content-encoding" in headers
+            if self.passthrough:
+                await self.downstream(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            # First body chunk: a complete small body goes out as-is
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self._start_compressed()
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": body})
+                return
+            await self.downstream(self.start_message)
+            self.start_message = None
+
+        data = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,93 @@
+"""
+Per-user data versions and conditional GET support
+
+Creating a user and every session write bump the user's row in
+`user_version`. Read endpoints derive a strong ETag from that version (plus
+the request's query string), so an `If-None-Match` check costs a single
+primary-key lookup and can answer 304 before any rows are loaded or
+serialised.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import update
+from sqlmodel import Session as DBSession
+
+from app.models import UserVersion
+from app.replicas import note_write
+
+# Clients may store responses but must revalidate before reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def bump_user_versions(db: DBSession, user_ids: Iterable[int]):
+    """Advance the data version of each user (caller commits)
+
+    The new versions go into the current request's consistency token.
+    """
+    now = datetime.utcnow()
+    for user_id in set(user_ids):
+        version = db.execute(
+            update(UserVersion)
+            .where(UserVersion.user_id == user_id)
+            .values(version=UserVersion.version + 1, updated_at=now)
+            .returning(UserVersion.version)
+        ).scalar_one_or_none()
+        if version is None:
+            version = 1
+            db.add(UserVersion(user_id=user_id, version=version, updated_at=now))
+        note_write(user_id, version)
+
+
+def get_user_version(db: DBSession, user_id: int) -> tuple[int, Optional[datetime]]:
+    """Current (version, last write time) for a user; (0, None) before any writes"""
+    row = db.get(UserVersion, user_id, populate_existing=True)
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values that determine a representation"""
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive-UTC datetime as an HTTP date"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            # asctime dates and "-0000" zones parse as naive; HTTP-dates are always UTC
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict[str, str]:
+    """ETag, Last-Modified and Cache-Control headers for a response"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Empty 304 response carrying the validators"""
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -2,28 +2,174 @@
 Database setup using SQLModel
 """
 
-from sqlmodel import SQLModel, create_engine, Session
+from typing import Optional
+from fastapi import Header
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlmodel import create_engine, Session
 import os
 
+from app.metrics import METRICS_ENABLED, CountingConnection, instrument_engine, note_threadpool_start
+from app.replicas import ReplicaRouter
+from app.sql_diagnostics import trace_engine
+
 # Database file path (will be created in /app/data in Docker, or local in dev)
 # For local dev, creates backend/data/ directory
 # For Docker, uses /app/data/ directory
 DATABASE_DIR = os.getenv("DATABASE_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
 os.makedirs(DATABASE_DIR, exist_ok=True)
 
-DATABASE_URL = f"sqlite:///{DATABASE_DIR}/nanosensei.db"
+# Primary SQLite database, which takes every write (see Schema Migrations in
+# the README for why other databases are not supported)
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATABASE_DIR}/nanosensei.db")
+# Defaults to DATABASE_URL through aiosqlite (see async_url)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+
+# Comma-separated replica URLs that read-only routes use (see app/replicas.py)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+# Serve routes from async handlers on an aiosqlite-backed AsyncSession
+# instead of sync handlers on FastAPI's threadpool
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Apply pending migrations on startup. Off by default: deployments run
+# `python -m app.migrations upgrade` once before starting workers, and each
+# worker only checks the schema version.
+DATABASE_AUTO_MIGRATE = os.getenv("DATABASE_AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
+# SQLite connection profiles, applied as PRAGMAs on every new pooled connection.
+# "default" keeps SQLite's own settings (rollback journal, synchronous=FULL).
+SQLITE_PROFILES: dict[str, dict[str, object]] = {
+    "default": {},
+    # WAL lets readers run alongside the single writer, and synchronous=NORMAL
+    # only fsyncs at checkpoints. A power loss can drop the last transactions
+    # but never corrupts the database.
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    },
+    # WAL concurrency with an fsync on every commit
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+}
+
+# Profile name plus optional per-PRAGMA overrides, e.g. "mmap_size=0,cache_size=-2000"
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "default")
+DATABASE_PRAGMAS = os.getenv("DATABASE_PRAGMAS", "")
+
+
+def sqlite_pragmas(profile: str = DATABASE_PROFILE, overrides: str = DATABASE_PRAGMAS) -> dict[str, object]:
+    """Resolve a profile name and override string into the PRAGMAs to apply"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE {profile!r}; expected one of {sorted(SQLITE_PROFILES)}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for item in filter(None, (part.strip() for part in overrides.split(","))):
+        name, _, value = item.partition("=")
+        pragmas[name.strip()] = value.strip()
+    return pragmas
+
+
+def configure_sqlite(target_engine, pragmas: dict[str, object]):
+    """Apply PRAGMAs to every connection the engine opens"""
+    if target_engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(target_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def make_engine(url: str):
+    """Create an engine; with metrics on, its statements are timed (and SQLite cursors count fetched rows)"""
+    is_sqlite = url.startswith("sqlite")
+    new_engine = create_engine(
+        url, echo=False, connect_args={"factory": CountingConnection} if METRICS_ENABLED and is_sqlite else {}
+    )
+    configure_sqlite(new_engine, sqlite_pragmas())
+    instrument_engine(new_engine)
+    trace_engine(new_engine)  # no-op unless SQL_DIAGNOSTICS is set
+    return new_engine
+
+
+engine = make_engine(DATABASE_URL)
+read_router = ReplicaRouter(engine, [make_engine(url) for url in DATABASE_REPLICA_URLS])
+
+
+_async_engine = None
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=False)
+
+def async_url(url: str) -> str:
+    """The same SQLite database as `url`, reached through aiosqlite"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        raise ValueError(f"Only SQLite databases are supported, not {parsed.drivername!r}")
+    return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+
+
+def get_async_engine():
+    """Create the async engine on first use so aiosqlite is only needed in async mode"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL or async_url(DATABASE_URL), echo=False)
+        configure_sqlite(_async_engine.sync_engine, sqlite_pragmas())
+        instrument_engine(_async_engine.sync_engine)
+        trace_engine(_async_engine.sync_engine)
+    return _async_engine
 
 
 def get_session():
     """Get database session"""
+    # Sync dependencies run on the threadpool, so this is where a request's queue wait ends
+    note_threadpool_start()
     with Session(engine) as session:
         yield session
 
 
+def get_read_session(x_consistency_token: Optional[str] = Header(None)):
+    """Get a session for a read-only route: a replica, or the primary if it lacks the client's writes"""
+    note_threadpool_start()
+    with Session(read_router.engine_for_read(x_consistency_token)) as session:
+        yield session
+
+
+async def get_async_session():
+    """Get async database session"""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+def streaming_bind(db: Session):
+    """Engine for work that outlives the handler, such as a streamed response body"""
+    bind = db.get_bind()
+    # An async engine's sync facade only works inside AsyncSession.run_sync
+    return engine if bind.dialect.is_async else bind
+
+
 def create_db_and_tables():
-    """Create database tables"""
-    SQLModel.metadata.create_all(engine)
+    """Bring the database schema up to date by applying pending migrations"""
+    from app.migrations import upgrade
+
+    upgrade(engine)
+
+
+def verify_schema():
+    """Fail fast if the database is not at this build's schema version (no DDL)"""
+    from app.migrations import verify
 
+    verify(engine)
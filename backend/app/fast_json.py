@@ -0,0 +1,59 @@
+"""
+Fast JSON path for large list responses
+
+By default FastAPI validates every returned ORM object against the route's
+`response_model` and then encodes the result with the stdlib json module.
+With FAST_JSON enabled, list endpoints select plain row tuples instead,
+zip them with the response field names and hand the dicts straight to
+orjson. The routes keep their `response_model`, so the OpenAPI schema is
+unchanged; the field names here must match those schemas.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Iterable, Sequence
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+# Serve list endpoints through the fast path
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+
+def _default(value: Any):
+    """Stdlib fallback for values json cannot encode natively"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with `dumps` and no validation step"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> list[dict[str, Any]]:
+    """Zip each row tuple with the response field names"""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def fast_json_response(content: Any, response: Response) -> FastJSONResponse:
+    """Wrap content, carrying over headers the handler set on its `response`"""
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,114 @@
+"""
+Per-skill leaderboards and percentile ranks
+
+A user's standing in a skill is their best score, already kept as
+`skill_rollup.max_score`. On top of that, `skill_score_histogram` counts
+users per best score over the fixed 0-100 domain. `apply_sessions` updates
+it whenever a user's best score rises. So:
+
+- top-N reads the (skill_type, max_score) index: O(log n + N)
+- a user's rank is one rollup lookup plus at most 101 histogram rows: O(1)
+"""
+
+import math
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, update
+from sqlmodel import Session as DBSession, select
+
+from app.models import SkillRollup, SkillScoreHistogram, User
+from app.schemas import LeaderboardEntry, SkillRank
+
+
+def apply_best_score_changes(db: DBSession, changes: dict[tuple[int, str], tuple[Optional[int], int]]):
+    """Move users between histogram buckets; changes maps (user, skill) -> (old best, new best)"""
+    deltas: dict[tuple[str, int], int] = {}
+    for (_, skill_type), (old_best, new_best) in changes.items():
+        if old_best is not None:
+            deltas[(skill_type, old_best)] = deltas.get((skill_type, old_best), 0) - 1
+        deltas[(skill_type, new_best)] = deltas.get((skill_type, new_best), 0) + 1
+
+    for (skill_type, score), delta in deltas.items():
+        if delta == 0:
+            continue
+        result = db.execute(
+            update(SkillScoreHistogram)
+            .where(SkillScoreHistogram.skill_type == skill_type, SkillScoreHistogram.score == score)
+            .values(user_count=SkillScoreHistogram.user_count + delta)
+        )
+        if result.rowcount == 0:
+            db.add(SkillScoreHistogram(skill_type=skill_type, score=score, user_count=delta))
+
+
+def _histogram_query():
+    """Histogram values recomputed from the rollups"""
+    return (
+        select(SkillRollup.skill_type, SkillRollup.max_score, func.count())
+        .group_by(SkillRollup.skill_type, SkillRollup.max_score)
+    )
+
+
+def rebuild_score_histogram(db: DBSession) -> int:
+    """Recompute the histogram from skill_rollup (caller commits); returns rows written"""
+    db.execute(delete(SkillScoreHistogram))
+    result = db.execute(
+        insert(SkillScoreHistogram).from_select(["skill_type", "score", "user_count"], _histogram_query())
+    )
+    return result.rowcount
+
+
+def verify_score_histogram(db: DBSession) -> list[dict]:
+    """Compare the histogram against skill_rollup and return one entry per drifted bucket"""
+    expected = {(skill, score): count for skill, score, count in db.exec(_histogram_query()).all()}
+    actual = {
+        (h.skill_type, h.score): h.user_count
+        for h in db.exec(select(SkillScoreHistogram).where(SkillScoreHistogram.user_count != 0)).all()
+    }
+    return [
+        {"skill_type": key[0], "score": key[1], "expected": expected.get(key), "actual": actual.get(key)}
+        for key in sorted(expected.keys() | actual.keys())
+        if expected.get(key) != actual.get(key)
+    ]
+
+
+def top_scores(db: DBSession, skill_type: str, limit: int) -> list[LeaderboardEntry]:
+    """Best `limit` users for a skill, with competition ranks (ties share a rank)"""
+    rows = db.exec(
+        select(SkillRollup.user_id, User.username, SkillRollup.max_score)
+        .join(User, User.id == SkillRollup.user_id)
+        .where(SkillRollup.skill_type == skill_type)
+        .order_by(SkillRollup.max_score.desc(), SkillRollup.user_id)
+        .limit(limit)
+    ).all()
+
+    entries = []
+    for position, (user_id, username, best_score) in enumerate(rows, start=1):
+        # Every user with a higher score precedes this one on the page
+        rank = entries[-1].rank if entries and entries[-1].best_score == best_score else position
+        entries.append(LeaderboardEntry(rank=rank, user_id=user_id, username=username, best_score=best_score))
+    return entries
+
+
+def skill_rank(db: DBSession, skill_type: str, user_id: int) -> Optional[SkillRank]:
+    """A user's rank and percentile for a skill, or None if they have no sessions in it"""
+    rollup = db.get(SkillRollup, (user_id, skill_type))
+    if rollup is None:
+        return None
+
+    histogram = db.exec(
+        select(SkillScoreHistogram.score, SkillScoreHistogram.user_count)
+        .where(SkillScoreHistogram.skill_type == skill_type)
+    ).all()
+    total = sum(count for _, count in histogram)
+    above = sum(count for score, count in histogram if score > rollup.max_score)
+    below = sum(count for score, count in histogram if score < rollup.max_score)
+    rank = above + 1
+    return SkillRank(
+        user_id=user_id,
+        skill_type=skill_type,
+        best_score=rollup.max_score,
+        rank=rank,
+        total_users=total,
+        top_percent=math.ceil(rank / total * 100),
+        percentile=below / total * 100,
+    )
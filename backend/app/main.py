@@ -3,10 +3,34 @@ NanoSensei FastAPI Backend
 Optimized for AWS Graviton (arm64) deployment
 """
 
-from fastapi import FastAPI
+import time
+from typing import Optional
+
+_import_started = time.perf_counter()
+
+from fastapi import Depends, FastAPI, Query
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.db import create_db_and_tables
-from app.api import routes_users, routes_sessions
+from app.cache import cache_stats
+from app.cache_backends import get_summary_cache
+from app.compression import CompressionMiddleware
+from app.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.db import (
+    DATABASE_ASYNC,
+    DATABASE_AUTO_MIGRATE,
+    DATABASE_REPLICA_URLS,
+    create_db_and_tables,
+    engine,
+    verify_schema,
+)
+from app.api import routes_leaderboard, routes_users, routes_sessions
+from app.openapi_schema import use_precomputed_schema
+from app.pagination import NEXT_CURSOR_HEADER
+from app.profiler import ADMIN_TOKEN, require_admin_token, router as profiler_router
+from app.replicas import CONSISTENCY_HEADER, ConsistencyMiddleware
+from app.sql_diagnostics import SQL_DIAGNOSTICS, SQLDiagnosticsMiddleware, recent_reports
+from app.session_writer import SESSION_WRITE_BEHIND, start_session_writer, stop_session_writer
+from app.startup import STARTUP_TIMINGS, log_timings, record
 
 app = FastAPI(
     title="NanoSensei API",
@@ -21,17 +45,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, CONSISTENCY_HEADER, "ETag"],
 )
 
-# Include routers
-app.include_router(routes_users.router, prefix="/users", tags=["users"])
-app.include_router(routes_sessions.router, prefix="/sessions", tags=["sessions"])
+# Compress large and streamed bodies (settings from COMPRESSION_* env vars)
+app.add_middleware(CompressionMiddleware)
+
+# Read-your-writes tokens on write responses, for routing reads to replicas (DATABASE_REPLICA_URLS)
+if DATABASE_REPLICA_URLS:
+    app.add_middleware(ConsistencyMiddleware)
+
+# Opt-in per-request SQL log with slow-query plans and N+1 flags (SQL_DIAGNOSTICS)
+if SQL_DIAGNOSTICS:
+    app.add_middleware(SQLDiagnosticsMiddleware)
+
+# Outermost, so latency covers every other middleware and sizes are bytes on the wire
+app.add_middleware(MetricsMiddleware)
+
+# Include routers (async variants when DATABASE_ASYNC is set)
+if DATABASE_ASYNC:
+    # Imported here so sync deployments never load SQLAlchemy's asyncio extension
+    from app.api.async_routes import make_async_router
+
+    app.include_router(make_async_router(routes_users.router), prefix="/users", tags=["users"])
+    app.include_router(make_async_router(routes_sessions.router), prefix="/sessions", tags=["sessions"])
+    app.include_router(make_async_router(routes_leaderboard.router), prefix="/leaderboard", tags=["leaderboard"])
+else:
+    app.include_router(routes_users.router, prefix="/users", tags=["users"])
+    app.include_router(routes_sessions.router, prefix="/sessions", tags=["sessions"])
+    app.include_router(routes_leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Create database tables on startup"""
-    create_db_and_tables()
+    """Check (or migrate) the schema and start the write-behind writer on startup"""
+    started = time.perf_counter()
+    if DATABASE_AUTO_MIGRATE:
+        create_db_and_tables()
+    else:
+        verify_schema()
+    if SESSION_WRITE_BEHIND:
+        start_session_writer(engine)
+    record("startup_hook", started)
+    log_timings()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending write-behind sessions before exit"""
+    stop_session_writer()
 
 
 @app.get("/health")
@@ -40,6 +102,37 @@ async def health_check():
     return {"status": "ok", "message": "NanoSensei backend is running"}
 
 
+@app.get("/health/startup")
+async def startup_timings():
+    """Milliseconds spent importing the app and running its startup hook"""
+    return STARTUP_TIMINGS
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss/eviction counters for the in-process and summary caches"""
+    return {**cache_stats(), "summaries": get_summary_cache().stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, SQL and threadpool metrics in Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+if SQL_DIAGNOSTICS:
+    # Reports carry SQL parameters (user data), so they need the admin token like /debug/profile
+    @app.get("/debug/sql", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+    async def sql_diagnostics(flagged: bool = False, route: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+        """Recent per-request SQL reports, newest first"""
+        return recent_reports(flagged=flagged, route=route, limit=limit)
+
+
+# Admin-only sampling profiler for this worker (POST /debug/profile, needs ADMIN_TOKEN)
+if ADMIN_TOKEN:
+    app.include_router(profiler_router)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -49,3 +142,8 @@ async def root():
         "health": "/health"
     }
 
+
+# Serve /openapi.json from the file written at build time (OPENAPI_SCHEMA_FILE), if any
+use_precomputed_schema(app)
+
+record("import", _import_started)
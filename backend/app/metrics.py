@@ -0,0 +1,388 @@
+"""
+Per-request performance metrics, exported in Prometheus text format
+
+MetricsMiddleware times every request and records its response size.
+SQLAlchemy cursor events on the engine add the number of SQL queries, the
+time spent in them and the rows fetched, through a RequestStats object held
+in a context variable. Starlette copies the context into threadpool
+workers, so the sync routes report into it too. GET /metrics serves the
+totals:
+
+- nanosensei_http_requests_total{method,route,status}
+- nanosensei_http_request_duration_seconds{method,route}   histogram
+- nanosensei_http_response_size_bytes{method,route}        histogram
+- nanosensei_request_db_queries{method,route}              histogram
+- nanosensei_request_db_seconds{method,route}              histogram
+- nanosensei_request_db_rows{method,route}                 histogram
+- nanosensei_threadpool_wait_seconds{method,route}         histogram
+- nanosensei_db_queries_total, nanosensei_db_query_seconds_total, nanosensei_db_rows_total
+- nanosensei_threadpool_busy_threads, nanosensei_threadpool_waiting_tasks
+
+Routes are labelled by their path template (/sessions/{session_id}), so
+label cardinality stays bounded. Time not spent in SQL is handler code and
+serialisation.
+
+Updates take no lock. Each thread writes only to its own shard of
+counters, and a scrape sums the shards. Set METRICS_ENABLED=false to skip
+the instrumentation entirely.
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000, 10000)
+
+
+class _Shard:
+    """One thread's counters; only that thread writes to it"""
+    __slots__ = ("values",)
+
+    def __init__(self):
+        # (metric name, label values) -> float for counters, or list for histograms
+        self.values: dict[tuple[str, tuple], object] = {}
+
+
+_local = threading.local()
+_shards: list[tuple[threading.Thread, _Shard]] = []
+_retired = _Shard()  # folded-in shards of threads that have exited
+_shards_lock = threading.Lock()  # taken when a thread first records and on scrape, never per update
+
+
+def _shard() -> _Shard:
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _shards.append((threading.current_thread(), shard))
+        return shard
+
+
+class Metric:
+    """Base for the metric types below"""
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        REGISTRY.append(self)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        values = _shard().values
+        key = (self.name, labels)
+        values[key] = values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        values = _shard().values
+        key = (self.name, labels)
+        counts = values.get(key)
+        if counts is None:
+            # One slot per bucket plus +Inf, then sum and count
+            counts = values[key] = [0] * (len(self.buckets) + 3)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+
+class Gauge(Metric):
+    """A value read at scrape time"""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], Optional[float]]):
+        super().__init__(name, help)
+        self.read = read
+
+
+REGISTRY: list[Metric] = []
+
+REQUESTS = Counter("nanosensei_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram(
+    "nanosensei_http_request_duration_seconds", "Time from request start to last body byte", ("method", "route")
+)
+RESPONSE_BYTES = Histogram(
+    "nanosensei_http_response_size_bytes", "Response body bytes as sent", ("method", "route"), SIZE_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "nanosensei_request_db_queries", "SQL statements executed per request", ("method", "route"), COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram("nanosensei_request_db_seconds", "Time in SQL per request", ("method", "route"))
+REQUEST_ROWS = Histogram(
+    "nanosensei_request_db_rows", "Rows fetched from the database per request", ("method", "route"), COUNT_BUCKETS
+)
+THREADPOOL_WAIT = Histogram(
+    "nanosensei_threadpool_wait_seconds",
+    "Time from request start until its first threadpool job ran (sync routes)",
+    ("method", "route"),
+)
+DB_QUERIES = Counter("nanosensei_db_queries_total", "SQL statements executed, including background writers")
+DB_SECONDS = Counter("nanosensei_db_query_seconds_total", "Time spent executing SQL statements")
+DB_ROWS = Counter("nanosensei_db_rows_total", "Rows fetched from the database")
+
+
+def _threadpool_statistics():
+    """The default anyio thread limiter's statistics, when called on the event loop"""
+    try:
+        from anyio.to_thread import current_default_thread_limiter
+
+        return current_default_thread_limiter().statistics()
+    except RuntimeError:  # no running event loop
+        return None
+
+
+Gauge(
+    "nanosensei_threadpool_busy_threads", "Threadpool workers running sync handlers",
+    lambda: getattr(_threadpool_statistics(), "borrowed_tokens", None),
+)
+Gauge(
+    "nanosensei_threadpool_waiting_tasks", "Sync handlers queued for a threadpool worker",
+    lambda: getattr(_threadpool_statistics(), "tasks_waiting", None),
+)
+
+
+class RequestStats:
+    """Database work attributed to the current request"""
+    __slots__ = ("started", "queries", "db_seconds", "rows", "threadpool_wait")
+
+    def __init__(self, started: float):
+        self.started = started
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.threadpool_wait: Optional[float] = None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled, if any"""
+    return _current.get()
+
+
+def note_threadpool_start():
+    """Record how long the current request waited for its first threadpool worker"""
+    stats = _current.get()
+    if stats is not None and stats.threadpool_wait is None:
+        stats.threadpool_wait = time.perf_counter() - stats.started
+
+
+def _count_rows(count: int):
+    DB_ROWS.inc(amount=count)
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += count
+
+
+class CountingCursor(sqlite3.Cursor):
+    """sqlite3 cursor that counts the rows SQLAlchemy fetches through it"""
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _count_rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        _count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _count_rows(len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors count fetched rows; pass as connect_args={"factory": ...}"""
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+def instrument_engine(engine):
+    """Count SQL statements and their time, per request and in total"""
+    if not METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        DB_QUERIES.inc()
+        DB_SECONDS.inc(amount=elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute does not run for a failed statement
+        started = exception_context.connection.info.get("metrics_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+def route_label(scope: Scope) -> str:
+    """Route path template of a handled request, or "unmatched" when no route matched"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size and database work per route"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(time.perf_counter())
+        token = _current.set(stats)
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            duration = time.perf_counter() - stats.started
+            _current.reset(token)
+            labels = (scope["method"], route_label(scope))
+            REQUESTS.inc(labels + (str(status),))
+            REQUEST_SECONDS.observe(labels, duration)
+            RESPONSE_BYTES.observe(labels, size)
+            REQUEST_QUERIES.observe(labels, stats.queries)
+            REQUEST_DB_SECONDS.observe(labels, stats.db_seconds)
+            REQUEST_ROWS.observe(labels, stats.rows)
+            if stats.threadpool_wait is not None:
+                THREADPOOL_WAIT.observe(labels, stats.threadpool_wait)
+
+
+def _collect() -> dict[tuple[str, tuple], object]:
+    """Sum every shard into one snapshot, folding in shards of exited threads"""
+    with _shards_lock:
+        alive = []
+        for thread, shard in _shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                _merge(_retired.values, shard.values)
+        _shards[:] = alive
+        shards = [shard for _, shard in alive]
+
+    totals: dict[tuple[str, tuple], object] = {}
+    _merge(totals, _retired.values)
+    for shard in shards:
+        # dict.copy() is atomic under the GIL; the owning thread may keep writing
+        _merge(totals, shard.values.copy())
+    return totals
+
+
+def _merge(into: dict, values: dict):
+    for key, value in values.items():
+        if isinstance(value, list):
+            current = into.get(key)
+            if current is None:
+                into[key] = list(value)
+            else:
+                for i, v in enumerate(value):
+                    current[i] += v
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics() -> str:
+    """Every registered metric in Prometheus text exposition format"""
+    totals = _collect()
+    by_metric: dict[str, list[tuple[tuple, object]]] = {}
+    for (name, labels), value in totals.items():
+        by_metric.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for metric in REGISTRY:
+        if isinstance(metric, Gauge):
+            value = metric.read()
+            if value is None:
+                continue
+            lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} gauge",
+                      f"{metric.name} {_number(value)}"]
+            continue
+
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.type}"]
+        for labels, value in sorted(by_metric.get(metric.name, []), key=lambda item: item[0]):
+            if isinstance(metric, Counter):
+                lines.append(f"{metric.name}{_labels(metric.labels, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ("+Inf",), value[:-2]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{_number(bound)}"'
+                lines.append(f"{metric.name}_bucket{_labels(metric.labels, labels, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labels, labels)} {_number(value[-2])}")
+            lines.append(f"{metric.name}_count{_labels(metric.labels, labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    """Forget every recorded value (for tests)"""
+    with _shards_lock:
+        for _, shard in _shards:
+            shard.values.clear()
+        _retired.values.clear()
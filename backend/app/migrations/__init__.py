@@ -0,0 +1,30 @@
+"""
+Versioned schema migrations
+
+    python -m app.migrations status
+    python -m app.migrations upgrade [--target N] [--batch-size N]
+"""
+
+from app.migrations.runner import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    Migration,
+    MigrationContext,
+    SchemaVersionError,
+    current_version,
+    pending,
+    upgrade,
+    verify,
+)
+
+__all__ = [
+    "LATEST_VERSION",
+    "MIGRATIONS",
+    "Migration",
+    "MigrationContext",
+    "SchemaVersionError",
+    "current_version",
+    "pending",
+    "upgrade",
+    "verify",
+]
@@ -0,0 +1,37 @@
+"""
+Command line entry point for schema migrations
+"""
+
+import argparse
+import logging
+import sys
+
+from app.migrations.runner import LATEST_VERSION, MIGRATION_BATCH_SIZE, current_version, pending, upgrade
+
+
+def main(argv: list[str] = None) -> int:
+    from app.db import engine
+
+    parser = argparse.ArgumentParser(description="Manage the database schema version")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("status", help="Show the current and pending versions")
+    upgrade_parser = subcommands.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--target", type=int, default=None, help="Stop after this version")
+    upgrade_parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE,
+                                help="Rows per backfill transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "status":
+        print(f"Schema version {current_version(engine)} (latest {LATEST_VERSION})")
+        for migration in pending(engine):
+            print(f"  pending: {migration.version:04d}_{migration.name}")
+        return 0
+
+    applied = upgrade(engine, target=args.target, batch_size=args.batch_size)
+    print(f"Applied {len(applied)} migrations; schema version {current_version(engine)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+0001: user and session tables
+
+The schema as the first release created it, frozen here so later model
+changes cannot alter what this version means. The single-column session
+indexes are replaced by composite ones in 0006. A database that predates
+the runner already has all of this and is left untouched.
+"""
+
+STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS user (
+        id INTEGER NOT NULL,
+        username VARCHAR NOT NULL,
+        email VARCHAR,
+        created_at DATETIME NOT NULL,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_user_username ON user (username)",
+    """CREATE TABLE IF NOT EXISTS session (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        skill_type VARCHAR NOT NULL,
+        score INTEGER NOT NULL,
+        feedback VARCHAR NOT NULL,
+        timestamp DATETIME NOT NULL,
+        metadata VARCHAR,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_session_user_id ON session (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_session_skill_type ON session (skill_type)",
+    "CREATE INDEX IF NOT EXISTS ix_session_timestamp ON session (timestamp)",
+]
+
+
+def upgrade(ctx):
+    with ctx.engine.begin() as connection:
+        for statement in STATEMENTS:
+            connection.exec_driver_sql(statement)
@@ -0,0 +1,43 @@
+"""
+0002: per-user/per-skill rollups
+
+Creates skill_rollup and fills it from session, one range of user ids per
+transaction. The ranges are cut by row count, so a user with many sessions
+gets a batch of their own instead of stretching a fixed-width id range.
+Each batch recomputes its users' rows from scratch under the write lock,
+so a re-run or concurrent inserts leave the rows exact.
+"""
+
+STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS skill_rollup (
+        user_id INTEGER NOT NULL,
+        skill_type VARCHAR NOT NULL,
+        session_count INTEGER NOT NULL,
+        score_sum INTEGER NOT NULL,
+        min_score INTEGER NOT NULL,
+        max_score INTEGER NOT NULL,
+        last_timestamp DATETIME NOT NULL,
+        PRIMARY KEY (user_id, skill_type),
+        FOREIGN KEY(user_id) REFERENCES user (id)
+    )""",
+]
+
+BACKFILL = """
+    INSERT OR REPLACE INTO skill_rollup
+        (user_id, skill_type, session_count, score_sum, min_score, max_score, last_timestamp)
+    SELECT user_id, skill_type, count(id), sum(score), min(score), max(score), max(timestamp)
+    FROM session
+    WHERE user_id >= ? AND user_id < ?
+    GROUP BY user_id, skill_type
+"""
+
+
+def upgrade(ctx):
+    with ctx.engine.begin() as connection:
+        for statement in STATEMENTS:
+            connection.exec_driver_sql(statement)
+
+    for start, end in ctx.row_ranges("session", "user_id"):
+        with ctx.engine.begin() as connection:
+            connection.exec_driver_sql(BACKFILL, (start, end))
+        ctx.log(f"  rollups for users {start}..{end - 1}")
@@ -0,0 +1,21 @@
+"""
+0003: per-user data versions for ETags
+
+No backfill: a user without a row is at version 0.
+"""
+
+STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS user_version (
+        user_id INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        updated_at DATETIME NOT NULL,
+        PRIMARY KEY (user_id),
+        FOREIGN KEY(user_id) REFERENCES user (id)
+    )""",
+]
+
+
+def upgrade(ctx):
+    with ctx.engine.begin() as connection:
+        for statement in STATEMENTS:
+            connection.exec_driver_sql(statement)
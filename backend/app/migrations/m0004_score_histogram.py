@@ -0,0 +1,32 @@
+"""
+0004: leaderboard best-score histogram
+
+Adds the (skill_type, max_score) index behind top-N reads (replaced in
+0006) and recomputes the histogram from skill_rollup in one transaction.
+It aggregates one row per (user, skill), not per session, so it stays short.
+"""
+
+STATEMENTS = [
+    """CREATE TABLE IF NOT EXISTS skill_score_histogram (
+        skill_type VARCHAR NOT NULL,
+        score INTEGER NOT NULL,
+        user_count INTEGER NOT NULL,
+        PRIMARY KEY (skill_type, score)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_skill_rollup_skill_type_max_score ON skill_rollup (skill_type, max_score)",
+]
+
+REBUILD = [
+    "DELETE FROM skill_score_histogram",
+    """INSERT INTO skill_score_histogram (skill_type, score, user_count)
+    SELECT skill_type, max_score, count(*) FROM skill_rollup GROUP BY skill_type, max_score""",
+]
+
+
+def upgrade(ctx):
+    with ctx.engine.begin() as connection:
+        for statement in STATEMENTS:
+            connection.exec_driver_sql(statement)
+    with ctx.engine.begin() as connection:
+        for statement in REBUILD:
+            connection.exec_driver_sql(statement)
@@ -0,0 +1,53 @@
+"""
+0005: full-text search index over session feedback and metadata
+
+The FTS table and its sync triggers are created first, so sessions written
+during the backfill are indexed by the triggers. Existing sessions are then
+indexed one id range per transaction, skipping rows the index already
+holds. An interrupted backfill picks up where it stopped.
+"""
+
+STATEMENTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS session_fts USING fts5(
+        feedback, metadata,
+        content='session', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS session_fts_ai AFTER INSERT ON session BEGIN
+        INSERT INTO session_fts(rowid, feedback, metadata) VALUES (new.id, new.feedback, new.metadata);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS session_fts_ad AFTER DELETE ON session BEGIN
+        INSERT INTO session_fts(session_fts, rowid, feedback, metadata)
+        VALUES ('delete', old.id, old.feedback, old.metadata);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS session_fts_au AFTER UPDATE ON session BEGIN
+        INSERT INTO session_fts(session_fts, rowid, feedback, metadata)
+        VALUES ('delete', old.id, old.feedback, old.metadata);
+        INSERT INTO session_fts(rowid, feedback, metadata) VALUES (new.id, new.feedback, new.metadata);
+    END""",
+]
+
+BACKFILL = """
+    INSERT INTO session_fts(rowid, feedback, metadata)
+    SELECT id, feedback, metadata FROM session WHERE id >= ? AND id < ?
+    AND id NOT IN (SELECT id FROM session_fts_docsize WHERE id >= ? AND id < ?)
+"""
+
+
+def _fts5_available(connection) -> bool:
+    options = {row[0] for row in connection.exec_driver_sql("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def upgrade(ctx):
+    with ctx.engine.begin() as connection:
+        if not _fts5_available(connection):
+            ctx.log("  SQLite was built without FTS5; /sessions/search stays disabled")
+            return
+        for statement in STATEMENTS:
+            connection.exec_driver_sql(statement)
+
+    for start, end in ctx.id_ranges("session"):
+        with ctx.engine.begin() as connection:
+            connection.exec_driver_sql(BACKFILL, (start, end, start, end))
+        ctx.log(f"  indexed sessions {start}..{end - 1}")
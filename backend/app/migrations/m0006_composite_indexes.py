@@ -0,0 +1,50 @@
+"""
+0006: composite keyset indexes replace single-column ones
+
+Each missing index is built in its own transaction. SQLite builds an index
+in one pass, which cannot be split into batches, but in WAL mode readers
+carry on while it runs and writers wait at most for one index. The
+single-column indexes are dropped only after their replacements exist.
+"""
+
+INDEXES = {
+    "ix_session_timestamp_id": "CREATE INDEX IF NOT EXISTS ix_session_timestamp_id ON session (timestamp, id)",
+    "ix_session_user_id_timestamp_id":
+        "CREATE INDEX IF NOT EXISTS ix_session_user_id_timestamp_id ON session (user_id, timestamp, id)",
+    "ix_session_skill_type_timestamp_id":
+        "CREATE INDEX IF NOT EXISTS ix_session_skill_type_timestamp_id ON session (skill_type, timestamp, id)",
+    "ix_session_user_id_skill_type_timestamp_id":
+        "CREATE INDEX IF NOT EXISTS ix_session_user_id_skill_type_timestamp_id "
+        "ON session (user_id, skill_type, timestamp, id)",
+    "ix_skill_rollup_skill_type_max_score_user_id":
+        "CREATE INDEX IF NOT EXISTS ix_skill_rollup_skill_type_max_score_user_id "
+        "ON skill_rollup (skill_type, max_score DESC, user_id)",
+}
+
+# Superseded by the composite indexes above
+RETIRED_INDEXES = [
+    "ix_session_user_id",
+    "ix_session_skill_type",
+    "ix_session_timestamp",
+    "ix_skill_rollup_skill_type_max_score",
+]
+
+
+def _existing_indexes(connection) -> set[str]:
+    return {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def upgrade(ctx):
+    with ctx.engine.connect() as connection:
+        existing = _existing_indexes(connection)
+    for name, statement in INDEXES.items():
+        if name not in existing:
+            with ctx.engine.begin() as connection:
+                connection.exec_driver_sql(statement)
+            ctx.log(f"  created {name}")
+
+    for name in RETIRED_INDEXES:
+        if name in existing:
+            with ctx.engine.begin() as connection:
+                connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+            ctx.log(f"  dropped {name}")
@@ -0,0 +1,186 @@
+"""
+Versioned schema migration runner
+
+Each migration is a module with an `upgrade(ctx)` function, listed in
+MIGRATIONS in version order. Applied versions are recorded in the
+`schema_version` table. Every migration is idempotent: it creates objects
+only if they are missing and recomputes data rather than appending to it.
+That makes it safe to run against databases that predate the runner, and
+to re-run after an interrupted upgrade.
+
+Only the bookkeeping (`schema_version`, `current_version`, `verify`) is
+dialect-neutral. The migrations themselves use SQLite features (FTS5,
+INSERT OR REPLACE, sqlite_master), so `upgrade` refuses other databases.
+
+Data backfills run in bounded batches, each in its own short transaction
+(MIGRATION_BATCH_SIZE rows). The app keeps writing between batches.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import Column, DateTime, Engine, Integer, MetaData, String, Table, func, inspect, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.migrations import (
+    m0001_initial,
+    m0002_skill_rollup,
+    m0003_user_version,
+    m0004_score_histogram,
+    m0005_session_fts,
+    m0006_composite_indexes,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows per backfill transaction
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "5000"))
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+# Kept out of SQLModel.metadata: the runner owns it, not the app models
+_schema_version = Table(
+    SCHEMA_VERSION_TABLE,
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """The database schema does not match the version this build expects"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[["MigrationContext"], None]
+
+
+@dataclass
+class MigrationContext:
+    """What a migration gets to work with"""
+    engine: Engine
+    batch_size: int = MIGRATION_BATCH_SIZE
+
+    def id_ranges(self, table: str, column: str = "id", upper: Optional[int] = None) -> Iterator[tuple[int, int]]:
+        """Half-open [start, end) ranges of `column` covering the rows present now"""
+        with self.engine.connect() as connection:
+            low, high = connection.exec_driver_sql(f"SELECT min({column}), max({column}) FROM {table}").one()
+        if low is None:
+            return
+        high = high if upper is None else min(high, upper)
+        for start in range(low, high + 1, self.batch_size):
+            yield start, min(start + self.batch_size, high + 1)
+
+    def row_ranges(self, table: str, column: str) -> Iterator[tuple[int, int]]:
+        """Half-open [start, end) ranges of `column` holding about batch_size rows each
+
+        Rows sharing one value stay in one range, so a value with more than
+        batch_size rows gets a range of its own.
+        """
+        with self.engine.connect() as connection:
+            start, high = connection.exec_driver_sql(f"SELECT min({column}), max({column}) FROM {table}").one()
+        while start is not None:
+            with self.engine.connect() as connection:
+                end = connection.exec_driver_sql(
+                    f"SELECT {column} FROM {table} WHERE {column} >= ? ORDER BY {column} LIMIT 1 OFFSET ?",
+                    (start, self.batch_size),
+                ).scalar()
+            if end is None or end > high:
+                yield start, high + 1
+                return
+            end = max(end, start + 1)
+            yield start, end
+            start = end
+
+    def log(self, message: str):
+        logger.info(message)
+
+
+MIGRATIONS = [
+    Migration(1, "initial", m0001_initial.upgrade),
+    Migration(2, "skill_rollup", m0002_skill_rollup.upgrade),
+    Migration(3, "user_version", m0003_user_version.upgrade),
+    Migration(4, "score_histogram", m0004_score_histogram.upgrade),
+    Migration(5, "session_fts", m0005_session_fts.upgrade),
+    Migration(6, "composite_indexes", m0006_composite_indexes.upgrade),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _ensure_version_table(engine: Engine):
+    with engine.begin() as connection:
+        _schema_version.create(connection, checkfirst=True)
+
+
+def _record(engine: Engine, migration: Migration):
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                insert(_schema_version).values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                )
+            )
+    except IntegrityError:
+        # A concurrent runner recorded the same idempotent migration first
+        pass
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied migration version; 0 for a database the runner has never touched"""
+    if not inspect(engine).has_table(SCHEMA_VERSION_TABLE):
+        return 0
+    with engine.connect() as connection:
+        return connection.execute(select(func.coalesce(func.max(_schema_version.c.version), 0))).scalar()
+
+
+def pending(engine: Engine) -> list[Migration]:
+    """Migrations not yet applied, in order"""
+    version = current_version(engine)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None, batch_size: int = MIGRATION_BATCH_SIZE) -> list[int]:
+    """Apply pending migrations up to `target` (default: latest); returns the versions applied"""
+    from app.session_metadata import sync_metadata_indexes
+
+    if engine.dialect.name != "sqlite":
+        raise ValueError(
+            f"The migrations are written for SQLite (FTS5, INSERT OR REPLACE), not {engine.dialect.name}; "
+            "manage that database's schema separately"
+        )
+    _ensure_version_table(engine)
+    context = MigrationContext(engine, batch_size)
+    applied = []
+    for migration in pending(engine):
+        if target is not None and migration.version > target:
+            break
+        context.log(f"Applying migration {migration.version:04d}_{migration.name}")
+        migration.upgrade(context)
+        _record(engine, migration)
+        applied.append(migration.version)
+
+    # Metadata indexes follow SESSION_METADATA_KEYS rather than a version
+    with engine.begin() as connection:
+        sync_metadata_indexes(connection)
+    return applied
+
+
+def verify(engine: Engine):
+    """Raise SchemaVersionError unless the database is at exactly LATEST_VERSION"""
+    version = current_version(engine)
+    if version < LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, but this build needs {LATEST_VERSION}. "
+            "Run `python -m app.migrations upgrade` (or set DATABASE_AUTO_MIGRATE=true)."
+        )
+    if version > LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Database schema is at version {version}, newer than this build's {LATEST_VERSION}."
+        )
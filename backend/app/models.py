@@ -2,7 +2,8 @@
 SQLModel database models
 """
 
-from sqlmodel import SQLModel, Field
+from sqlalchemy import text
+from sqlmodel import SQLModel, Field, Column, Index, String
 from datetime import datetime
 from typing import Optional
 
@@ -17,11 +18,54 @@ class User(SQLModel, table=True):
 
 class Session(SQLModel, table=True):
     """NanoSensei coaching session model"""
+    __table_args__ = (
+        # Keyset pagination walks (timestamp, id); each filter combination gets its own prefix.
+        # These also serve plain user_id / skill_type lookups, so those columns need no index of their own.
+        Index("ix_session_timestamp_id", "timestamp", "id"),
+        Index("ix_session_user_id_timestamp_id", "user_id", "timestamp", "id"),
+        Index("ix_session_skill_type_timestamp_id", "skill_type", "timestamp", "id"),
+        Index("ix_session_user_id_skill_type_timestamp_id", "user_id", "skill_type", "timestamp", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id", index=True)
-    skill_type: str = Field(index=True)  # e.g., "Drawing", "Yoga", "Punching", "Guitar"
+    user_id: int = Field(foreign_key="user.id")
+    skill_type: str  # e.g., "Drawing", "Yoga", "Punching", "Guitar"
     score: int = Field(ge=0, le=100)  # Score from 0-100
     feedback: str  # Coaching feedback text
-    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
-    metadata: Optional[str] = None  # JSON string for additional data
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    # JSON string for additional data. "metadata" is reserved by the declarative
+    # API, so the attribute is renamed while the column keeps its original name.
+    metadata_: Optional[str] = Field(default=None, sa_column=Column("metadata", String, nullable=True))
+
+
+
+class SkillRollup(SQLModel, table=True):
+    """Per-user, per-skill session aggregates maintained alongside Session inserts"""
+    __tablename__ = "skill_rollup"
+    __table_args__ = (
+        # Leaderboard top-N walks one skill's best scores in descending order, ties by user
+        Index("ix_skill_rollup_skill_type_max_score_user_id", "skill_type", text("max_score DESC"), "user_id"),
+    )
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    skill_type: str = Field(primary_key=True)
+    session_count: int = 0
+    score_sum: int = 0
+    min_score: int
+    max_score: int
+    last_timestamp: datetime
+
+
+class SkillScoreHistogram(SQLModel, table=True):
+    """Number of users whose best score for a skill is `score` (0-100)"""
+    __tablename__ = "skill_score_histogram"
+    skill_type: str = Field(primary_key=True)
+    score: int = Field(primary_key=True)
+    user_count: int = 0
+
 
+class UserVersion(SQLModel, table=True):
+    """Per-user data version, bumped on every session write; drives ETags"""
+    __tablename__ = "user_version"
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    version: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,69 @@
+"""
+Precomputed OpenAPI schema
+
+FastAPI builds the schema from the routes on the first request to
+/openapi.json or /docs. The Docker image writes it at build time instead:
+
+    python -m app.openapi_schema app/openapi.json
+
+and points OPENAPI_SCHEMA_FILE at the file, so workers only read JSON.
+With the variable unset (development), the schema is generated from the
+live routes as usual.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+OPENAPI_SCHEMA_FILE = os.getenv("OPENAPI_SCHEMA_FILE", "")
+
+
+def use_precomputed_schema(app: FastAPI, path: str = OPENAPI_SCHEMA_FILE):
+    """Serve the schema from `path` when it exists, falling back to generating it"""
+    if not path:
+        return
+    generate = app.openapi
+
+    def load_schema() -> dict:
+        if app.openapi_schema is None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    app.openapi_schema = json.load(f)
+            except FileNotFoundError:
+                logger.warning(f"OPENAPI_SCHEMA_FILE {path} does not exist; generating the schema")
+                return generate()
+        return app.openapi_schema
+
+    app.openapi = load_schema
+
+
+def write_schema(app: FastAPI, path: str):
+    """Generate the schema from the app's routes and write it to `path`"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(app.openapi(), f, separators=(",", ":"))
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point for writing the schema at build time"""
+    parser = argparse.ArgumentParser(description="Write the app's OpenAPI schema to a file")
+    parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    from app.main import app
+
+    # Always generate from the routes, even if a stale file is configured
+    app.openapi_schema = None
+    app.openapi = FastAPI.openapi.__get__(app)
+    write_schema(app, args.path)
+    print(f"Wrote OpenAPI schema for {len(app.routes)} routes to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Keyset (cursor) pagination helpers
+
+Cursors are opaque to clients: the sort key of the last row on a page,
+JSON-encoded and base64url'd. Each page is then fetched with a range
+condition on an index instead of an OFFSET, so page cost stays constant
+however deep the client pages.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+LimitQuery = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items to return")
+CursorQuery = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header")
+
+
+def encode_cursor(*values) -> str:
+    """Encode a row's sort key as an opaque cursor"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Decode a cursor into a sort key, converting each value to the given type"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("cursor has the wrong shape")
+        return tuple(
+            datetime.fromisoformat(value) if t is datetime else t(value)
+            for t, value in zip(types, payload)
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
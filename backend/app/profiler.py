@@ -0,0 +1,248 @@
+"""
+Sampling profiler for a live worker, with per-route attribution
+
+POST /debug/profile samples the stacks of every thread in the worker that
+receives the request, for a bounded time, and returns them as collapsed
+stacks (for flamegraph.pl, speedscope or inferno) or as speedscope JSON:
+
+    curl -X POST -H "X-Admin-Token: $ADMIN_TOKEN" \\
+        "http://localhost:8000/debug/profile?seconds=10&format=speedscope" > profile.speedscope.json
+
+The route is registered only when ADMIN_TOKEN is set. A sample is
+attributed to a route when that route's endpoint function is on the
+stack. Work done before or after the endpoint runs (request validation,
+response serialisation on the event loop) falls under "(no route)". Idle
+threads, such as threadpool workers waiting for jobs or the event loop in
+select(), are skipped.
+
+Overhead is bounded. The sampler sleeps long enough between samples that
+the time spent sampling stays under PROFILE_MAX_OVERHEAD of wall time
+(default 5%), even with many busy threads. Only one profile runs per
+worker at a time, for at most PROFILE_MAX_SECONDS.
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.routing import APIRoute
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_MAX_OVERHEAD = float(os.getenv("PROFILE_MAX_OVERHEAD", "0.05"))
+
+NO_ROUTE = "(no route)"
+
+# (file name, function) of leaf frames where a thread is waiting, not working
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def endpoint_codes(app: FastAPI) -> dict[CodeType, str]:
+    """Map each route's endpoint code object (and any it wraps) to the route path"""
+    codes = {}
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        endpoint = route.endpoint
+        while endpoint is not None:
+            code = getattr(endpoint, "__code__", None)
+            if code is not None:
+                codes[code] = route.path
+            endpoint = getattr(endpoint, "__wrapped__", None)
+    return codes
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(_BACKEND_DIR):
+        return filename[len(_BACKEND_DIR):]
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    return filename[index + len(marker):] if index >= 0 else filename
+
+
+class SamplingProfiler:
+    """Samples every other thread's stack at a fixed interval"""
+
+    def __init__(self, routes: dict[CodeType, str], interval: float = 0.01,
+                 max_overhead: float = PROFILE_MAX_OVERHEAD):
+        self.routes = routes
+        self.interval = interval
+        self.max_overhead = max_overhead
+        # (route, thread name, codes root -> leaf) -> samples
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self.elapsed = 0.0
+        self._frame_names: dict[CodeType, str] = {}
+        self._thread_names: dict[int, str] = {}
+
+    def frame_name(self, code: CodeType) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            name = self._frame_names[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return name
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._thread_names.get(ident, f"thread-{ident}")
+        return name
+
+    def sample(self):
+        """Record one stack per working thread"""
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        try:
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                leaf = frame.f_code
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                    continue
+                codes = []
+                route = NO_ROUTE
+                current: Optional[FrameType] = frame
+                while current is not None:
+                    code = current.f_code
+                    codes.append(code)
+                    if route is NO_ROUTE:
+                        route = self.routes.get(code, NO_ROUTE)
+                    current = current.f_back
+                codes.reverse()
+                self.stacks[(route, self._thread_name(ident), tuple(codes))] += 1
+        finally:
+            # Frames keep their locals alive; drop them before sleeping
+            del frames
+        self.samples += 1
+
+    def run(self, duration: float) -> "SamplingProfiler":
+        """Sample until `duration` seconds have passed, keeping within the overhead budget"""
+        started = time.perf_counter()
+        deadline = started + duration
+        while True:
+            sample_started = time.perf_counter()
+            if sample_started >= deadline:
+                break
+            self.sample()
+            cost = time.perf_counter() - sample_started
+            self.sampling_seconds += cost
+            # Stretch the interval when sampling is expensive: cost / (cost + sleep) <= max_overhead
+            pause = max(self.interval, cost / self.max_overhead - cost)
+            time.sleep(max(0.0, min(pause, deadline - time.perf_counter())))
+        self.elapsed = time.perf_counter() - started
+        return self
+
+    @property
+    def overhead(self) -> float:
+        """Fraction of wall time spent taking samples"""
+        return self.sampling_seconds / self.elapsed if self.elapsed else 0.0
+
+    def route_samples(self) -> dict[str, int]:
+        """Samples per route, most first"""
+        totals: Counter = Counter()
+        for (route, _, _), count in self.stacks.items():
+            totals[route] += count
+        return dict(totals.most_common())
+
+    def collapsed(self) -> str:
+        """One `route;thread;frame;...;frame count` line per distinct stack, heaviest first"""
+        lines = []
+        for (route, thread, codes), count in self.stacks.most_common():
+            names = ";".join(self.frame_name(code).replace(";", ",") for code in codes)
+            lines.append(f"route {route};{thread};{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        """Speedscope file with one sampled profile per route"""
+        frames: list[dict] = []
+        frame_index: dict[CodeType, int] = {}
+        profiles: dict[str, dict] = {}
+        for (route, _, codes), count in self.stacks.most_common():
+            indices = []
+            for code in codes:
+                if code not in frame_index:
+                    frame_index[code] = len(frames)
+                    frames.append({
+                        "name": self.frame_name(code),
+                        "file": _short_path(code.co_filename),
+                        "line": code.co_firstlineno,
+                    })
+                indices.append(frame_index[code])
+            profile = profiles.setdefault(route, {
+                "type": "sampled",
+                "name": f"route {route}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": 0,
+                "samples": [],
+                "weights": [],
+            })
+            weight = count * self.interval
+            profile["samples"].append(indices)
+            profile["weights"].append(weight)
+            profile["endValue"] += weight
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"nanosensei worker {os.getpid()}",
+            "exporter": "nanosensei",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+
+_profile_lock = threading.Lock()
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject requests without the configured ADMIN_TOKEN"""
+    if not ADMIN_TOKEN or x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="A valid X-Admin-Token header is required")
+
+
+router = APIRouter()
+
+
+@router.post("/debug/profile", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+):
+    """Profile this worker for `seconds` and return the samples"""
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    try:
+        profiler = SamplingProfiler(endpoint_codes(request.app), interval_ms / 1000)
+        # A dedicated executor thread: the handler threadpool keeps its full capacity
+        await asyncio.get_running_loop().run_in_executor(None, profiler.run, seconds)
+    finally:
+        _profile_lock.release()
+
+    headers = {
+        "X-Profile-Samples": str(profiler.samples),
+        "X-Profile-Overhead": f"{profiler.overhead:.4f}",
+        "X-Profile-Pid": str(os.getpid()),
+    }
+    if format == "speedscope":
+        return Response(json.dumps(profiler.speedscope()), media_type="application/json", headers=headers)
+    return PlainTextResponse(profiler.collapsed(), headers=headers)
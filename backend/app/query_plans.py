@@ -0,0 +1,221 @@
+"""
+Query plan advisor
+
+Drives every read route through the app against a scratch SQLite
+database. Each SELECT the routes issue is captured, and EXPLAIN QUERY PLAN
+is run on it with its real parameters. Any plan that scans a table without
+an index, or sorts or groups through a temp B-tree, is reported. A few
+queries sort by a computed value by design. They are allowlisted below,
+each with the exact plan steps it may use and the reason. Any other
+problem in the same plan is still reported.
+
+    python -m app.query_plans        # exits 1 if any query needs an index
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session as DBSession, create_engine
+
+# GET requests covering each route's filter combinations; {user_id} is filled in
+REQUESTS = [
+    "/users",
+    "/users?cursor={user_cursor}",
+    "/users/{user_id}",
+    "/sessions",
+    "/sessions?cursor={session_cursor}",
+    "/sessions?user_id={user_id}",
+    "/sessions?user_id={user_id}&cursor={session_cursor}",
+    "/sessions?skill_type=Yoga",
+    "/sessions?user_id={user_id}&skill_type=Yoga",
+    "/sessions?user_id={user_id}&skill_type=Yoga&cursor={session_cursor}",
+    "/sessions?meta=model_version:1.2.0",
+    "/sessions/export",
+    "/sessions/export?user_id={user_id}",
+    "/sessions/export?skill_type=Yoga&since=2024-01-01T00:00:00",
+    "/sessions/export?user_id={user_id}&skill_type=Yoga&since=2024-01-01T00:00:00&until=2030-01-01T00:00:00",
+    "/sessions/summary?user_id={user_id}",
+    "/sessions/trends?user_id={user_id}",
+    "/sessions/trends?user_id={user_id}&skill_type=Yoga&bucket=week",
+    "/sessions/search?q=posture",
+    "/sessions/search?q=posture&user_id={user_id}&skill_type=Yoga",
+    "/sessions/{session_id}",
+    "/leaderboard/Yoga",
+    "/leaderboard/Yoga/users/{user_id}",
+]
+
+# Statements that scan or sort by design: (SQL pattern, plan steps it may use, reason)
+ALLOWED = [
+    (
+        re.compile(r"FROM user\s+ORDER BY user\.id\s+LIMIT"),
+        {"SCAN user"},
+        "the first page walks the rowid in order and stops at LIMIT",
+    ),
+    (
+        re.compile(r"\bsession_fts\b"),
+        {"USE TEMP B-TREE FOR ORDER BY"},
+        "search results are ordered by bm25, which is computed per match",
+    ),
+    (
+        re.compile(r"GROUP BY\s+(date|strftime)\("),
+        {"USE TEMP B-TREE FOR GROUP BY"},
+        "trends group by a bucket computed from timestamp",
+    ),
+]
+
+_PROBLEM = re.compile(r"^(SCAN (?!.*\b(USING (COVERING )?INDEX|VIRTUAL TABLE)\b).*|USE TEMP B-TREE.*)$")
+
+
+@dataclass
+class QueryPlan:
+    """One captured statement and its plan"""
+    statement: str
+    parameters: tuple
+    plan: list[str]
+    problems: list[str] = field(default_factory=list)
+    allowed: list[str] = field(default_factory=list)
+    allowed_because: str = None
+
+
+@contextmanager
+def capture_selects(engine):
+    """Collect (statement, parameters) for every SELECT executed on the engine"""
+    captured: list[tuple[str, tuple]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            captured.append((statement, tuple(parameters or ())))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(connection, statement: str, parameters: tuple) -> list[str]:
+    """EXPLAIN QUERY PLAN detail lines for a statement"""
+    return [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def find_problems(plan: list[str]) -> list[str]:
+    """Plan steps that scan a table without an index or build a temp B-tree"""
+    return [step for step in plan if _PROBLEM.match(step)]
+
+
+def check_plan(statement: str, parameters: tuple, plan: list[str]) -> QueryPlan:
+    """Split a plan's problems into allowlisted steps and ones that need an index"""
+    result = QueryPlan(statement, parameters, plan, find_problems(plan))
+    for pattern, steps, reason in ALLOWED:
+        if not pattern.search(statement):
+            continue
+        allowed = [step for step in result.problems if step in steps]
+        if allowed:
+            result.problems = [step for step in result.problems if step not in steps]
+            result.allowed += allowed
+            result.allowed_because = reason
+    return result
+
+
+def _seed(engine) -> dict:
+    """A few rows so every route has something to page through"""
+    from app.models import Session, User
+    from app.rollups import rebuild_rollups
+
+    with DBSession(engine) as db:
+        users = [User(username=f"plan_user_{i}") for i in range(3)]
+        db.add_all(users)
+        db.commit()
+        start = datetime(2024, 6, 1)
+        db.add_all([
+            Session(
+                user_id=users[i % 3].id,
+                skill_type=["Yoga", "Guitar"][i % 2],
+                score=40 + i,
+                feedback="Straighten your posture",
+                timestamp=start + timedelta(hours=i),
+                metadata_='{"model_version": "1.2.0"}',
+            )
+            for i in range(12)
+        ])
+        db.commit()
+        rebuild_rollups(db)
+        return {"user_id": users[0].id, "session_id": 1}
+
+
+def analyze_routes(requests: list[str] = REQUESTS) -> list[QueryPlan]:
+    """Run the requests against a scratch database and return the plan of each distinct SELECT"""
+    from fastapi.testclient import TestClient
+
+    from app.cache import session_cache, user_cache
+    from app.cache_backends import get_summary_cache
+    from app.db import get_read_session, get_session
+    from app.main import app
+    from app.pagination import encode_cursor
+
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp(prefix='nanosensei-plans-')}/plans.db")
+    SQLModel.metadata.create_all(engine)
+    values = _seed(engine)
+    values["user_cursor"] = encode_cursor(values["user_id"])
+    values["session_cursor"] = encode_cursor(datetime(2024, 6, 1, 6), 7)
+
+    def override_get_session():
+        with DBSession(engine) as session:
+            yield session
+
+    # Cached lookups would hide the queries behind them
+    for cache in (user_cache, session_cache, get_summary_cache()):
+        cache.clear()
+    app.dependency_overrides[get_session] = app.dependency_overrides[get_read_session] = override_get_session
+    try:
+        with capture_selects(engine) as captured:
+            client = TestClient(app)
+            for request in requests:
+                response = client.get(request.format(**values))
+                if response.status_code >= 400:
+                    raise RuntimeError(f"GET {request} failed with {response.status_code}: {response.text}")
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        app.dependency_overrides.pop(get_read_session, None)
+
+    plans: dict[str, QueryPlan] = {}
+    with engine.connect() as connection:
+        for statement, parameters in captured:
+            if statement in plans:
+                continue
+            plans[statement] = check_plan(statement, parameters, explain(connection, statement, parameters))
+    return list(plans.values())
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point: print every plan and fail on unindexed ones"""
+    parser = argparse.ArgumentParser(description="Check the query plans of every read route")
+    parser.add_argument("--verbose", action="store_true", help="Print plans that need no attention too")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for result in analyze_routes():
+        if result.problems:
+            failures += 1
+            status = "NEEDS INDEX"
+        elif result.allowed:
+            status = f"ALLOWED ({result.allowed_because})"
+        else:
+            status = "OK"
+        if args.verbose or status != "OK":
+            print(f"[{status}] {' '.join(result.statement.split())}")
+            for step in result.plan:
+                print(f"    {step}")
+
+    print("All query plans use indexes" if not failures else f"{failures} queries need an index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Read-replica routing with read-your-writes consistency
+
+Writes always go to the primary. Read-only routes take their session from
+`get_read_session`, which picks a replica round-robin. Replication is
+asynchronous, so a client that just wrote could read a replica that has
+not caught up yet. To prevent that, every successful write response
+carries an X-Consistency-Token header naming the `user_version` each
+written user reached, e.g. "12:7" or "12:7,40:3" for a batch. A client
+that sends the token back on a later read gets the replica only if that
+replica's `user_version` rows have reached those versions; otherwise the
+read goes to the primary. The check is a primary-key lookup per user, and
+it holds however far the replica has fallen behind.
+
+A token naming versions the primary has not reached either is ignored, so
+a client cannot pin itself to the primary.
+"""
+
+import itertools
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import select
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.models import UserVersion
+
+CONSISTENCY_HEADER = "X-Consistency-Token"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Versions written by the current request, filled in by note_write
+_written: ContextVar[Optional[dict[int, int]]] = ContextVar("written_versions", default=None)
+
+
+def note_write(user_id: int, version: int):
+    """Record that the current request moved a user to `version`"""
+    written = _written.get()
+    if written is not None:
+        written[user_id] = max(version, written.get(user_id, 0))
+
+
+def issue_token(versions: dict[int, int]) -> str:
+    """Token for writes that moved each user to the given version"""
+    return ",".join(f"{user_id}:{version}" for user_id, version in sorted(versions.items()))
+
+
+def parse_token(value: Optional[str]) -> dict[int, int]:
+    """Versions a token requires, by user; empty if absent or malformed"""
+    if not value:
+        return {}
+    try:
+        pairs = (item.split(":") for item in value.split(","))
+        return {int(user_id): int(version) for user_id, version in pairs}
+    except ValueError:
+        return {}
+
+
+def has_versions(bind, required: dict[int, int]) -> bool:
+    """Whether the database behind `bind` has every user at or past the required version"""
+    with bind.connect() as connection:
+        current = dict(connection.execute(
+            select(UserVersion.user_id, UserVersion.version).where(UserVersion.user_id.in_(required))
+        ).all())
+    return all(current.get(user_id, 0) >= version for user_id, version in required.items())
+
+
+class ReplicaRouter:
+    """Chooses the engine for a read: a replica, or the primary while the replica lacks the client's writes"""
+
+    def __init__(self, primary, replicas: list):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._next_replica = itertools.cycle(self.replicas)
+
+    def engine_for_read(self, token: Optional[str] = None):
+        if not self.replicas:
+            return self.primary
+        replica = next(self._next_replica)
+        required = parse_token(token)
+        if required and not has_versions(replica, required) and has_versions(self.primary, required):
+            return self.primary
+        return replica
+
+
+class ConsistencyMiddleware:
+    """ASGI middleware adding X-Consistency-Token to successful write responses"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        # A mutable holder, so handlers running on the threadpool (in a copied context) can fill it
+        written: dict[int, int] = {}
+
+        async def send_with_token(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400 and written:
+                # The handler, and its commit, have finished by the time the response starts
+                MutableHeaders(scope=message)[CONSISTENCY_HEADER] = issue_token(written)
+            await send(message)
+
+        context_token = _written.set(written)
+        try:
+            await self.app(scope, receive, send_with_token)
+        finally:
+            _written.reset(context_token)
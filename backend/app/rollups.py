@@ -0,0 +1,188 @@
+"""
+Incrementally maintained per-user/per-skill session rollups
+
+`apply_sessions` is called in the same transaction as the Session insert so
+the summary endpoint can read O(#skills) rows instead of scanning sessions.
+It also keeps the leaderboard's per-skill best-score histogram in step.
+`rebuild_rollups` and `verify_rollups` recompute both from the Session
+table to repair or detect drift, e.g. after a migration:
+
+    python -m app.rollups verify
+    python -m app.rollups rebuild
+"""
+
+import argparse
+import sys
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, tuple_, update
+from sqlmodel import Session as DBSession, select
+
+from app.conditional import bump_user_versions
+from app.leaderboard import apply_best_score_changes, rebuild_score_histogram, verify_score_histogram
+from app.models import Session, SkillRollup
+
+
+def apply_sessions(db: DBSession, sessions: Iterable[Session]):
+    """Fold new sessions into their rollup rows (caller commits)"""
+    totals: dict[tuple[int, str], dict] = {}
+    for s in sessions:
+        key = (s.user_id, s.skill_type)
+        if key not in totals:
+            totals[key] = {
+                "count": 0,
+                "sum": 0,
+                "min": s.score,
+                "max": s.score,
+                "last": s.timestamp,
+            }
+        t = totals[key]
+        t["count"] += 1
+        t["sum"] += s.score
+        t["min"] = min(t["min"], s.score)
+        t["max"] = max(t["max"], s.score)
+        t["last"] = max(t["last"], s.timestamp)
+
+    if not totals:
+        return
+
+    # Write the sessions first so the current bests are read under SQLite's write lock
+    db.flush()
+    previous_best = {
+        (user_id, skill_type): max_score
+        for user_id, skill_type, max_score in db.exec(
+            select(SkillRollup.user_id, SkillRollup.skill_type, SkillRollup.max_score)
+            .where(tuple_(SkillRollup.user_id, SkillRollup.skill_type).in_(list(totals)))
+        ).all()
+    }
+
+    for (user_id, skill_type), t in totals.items():
+        # Update in place so concurrent writers never overwrite each other's counts
+        result = db.execute(
+            update(SkillRollup)
+            .where(SkillRollup.user_id == user_id, SkillRollup.skill_type == skill_type)
+            .values(
+                session_count=SkillRollup.session_count + t["count"],
+                score_sum=SkillRollup.score_sum + t["sum"],
+                min_score=case((SkillRollup.min_score > t["min"], t["min"]), else_=SkillRollup.min_score),
+                max_score=case((SkillRollup.max_score < t["max"], t["max"]), else_=SkillRollup.max_score),
+                last_timestamp=case(
+                    (SkillRollup.last_timestamp < t["last"], t["last"]),
+                    else_=SkillRollup.last_timestamp,
+                ),
+            )
+        )
+        if result.rowcount == 0:
+            db.add(SkillRollup(
+                user_id=user_id,
+                skill_type=skill_type,
+                session_count=t["count"],
+                score_sum=t["sum"],
+                min_score=t["min"],
+                max_score=t["max"],
+                last_timestamp=t["last"],
+            ))
+
+    apply_best_score_changes(db, {
+        key: (previous_best.get(key), t["max"])
+        for key, t in totals.items()
+        if key not in previous_best or t["max"] > previous_best[key]
+    })
+
+
+def apply_session(db: DBSession, session: Session):
+    """Fold a single new session into its rollup row (caller commits)"""
+    apply_sessions(db, [session])
+
+
+def _aggregate_query():
+    """Rollup values recomputed from the Session table"""
+    return select(
+        Session.user_id,
+        Session.skill_type,
+        func.count(Session.id),
+        func.sum(Session.score),
+        func.min(Session.score),
+        func.max(Session.score),
+        func.max(Session.timestamp),
+    ).group_by(Session.user_id, Session.skill_type)
+
+
+def rebuild_rollups(db: DBSession) -> int:
+    """Recompute every rollup row from Session; returns the number of rows written
+
+    Users whose rollups drifted get their data version bumped in the same
+    transaction, so ETags and cached summaries issued before the rebuild stop matching.
+    """
+    drifted = {entry["user_id"] for entry in verify_rollups(db)}
+    db.execute(delete(SkillRollup))
+    result = db.execute(
+        insert(SkillRollup).from_select(
+            ["user_id", "skill_type", "session_count", "score_sum",
+             "min_score", "max_score", "last_timestamp"],
+            _aggregate_query(),
+        )
+    )
+    rebuild_score_histogram(db)
+    bump_user_versions(db, drifted)
+    db.commit()
+    return result.rowcount
+
+
+def verify_rollups(db: DBSession) -> list[dict]:
+    """Compare rollups against Session and return one entry per drifted key"""
+    expected = {
+        (user_id, skill_type): (count, score_sum, min_score, max_score, last)
+        for user_id, skill_type, count, score_sum, min_score, max_score, last
+        in db.exec(_aggregate_query()).all()
+    }
+    actual = {
+        (r.user_id, r.skill_type): (r.session_count, r.score_sum, r.min_score, r.max_score, r.last_timestamp)
+        for r in db.exec(select(SkillRollup)).all()
+    }
+
+    drift = []
+    for key in sorted(expected.keys() | actual.keys()):
+        if expected.get(key) != actual.get(key):
+            drift.append({
+                "user_id": key[0],
+                "skill_type": key[1],
+                "expected": expected.get(key),
+                "actual": actual.get(key),
+            })
+    return drift
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point for rebuilding or verifying rollups"""
+    from app.db import engine, verify_schema
+
+    parser = argparse.ArgumentParser(description="Maintain per-user/per-skill session rollups")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    args = parser.parse_args(argv)
+
+    # Maintenance runs against a migrated database; schema changes belong to app.migrations
+    verify_schema()
+    with DBSession(engine) as db:
+        if args.command == "rebuild":
+            # Changed users move to a new version, so their old ETags and cached summaries no longer match
+            print(f"Rebuilt {rebuild_rollups(db)} rollup rows")
+            return 0
+
+        drift = verify_rollups(db)
+        for entry in drift:
+            print(f"Drift for user {entry['user_id']} / {entry['skill_type']}: "
+                  f"expected {entry['expected']}, found {entry['actual']}")
+        print("Rollups OK" if not drift else f"{len(drift)} rollup rows drifted")
+        
+        histogram_drift = verify_score_histogram(db)
+        for entry in histogram_drift:
+            print(f"Leaderboard drift for {entry['skill_type']} score {entry['score']}: "
+                  f"expected {entry['expected']}, found {entry['actual']}")
+        if histogram_drift:
+            print(f"{len(histogram_drift)} leaderboard buckets drifted")
+        return 1 if drift or histogram_drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,11 @@
 Pydantic schemas for API requests/responses
 """
 
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from datetime import date, datetime
+from typing import Any, Optional
+
+from app.session_metadata import validate_metadata
 
 
 # User schemas
@@ -29,7 +31,12 @@ class SessionCreate(BaseModel):
     skill_type: str
     score: int  # 0-100
     feedback: str
-    metadata: Optional[str] = None
+    metadata: Optional[str] = None  # JSON object, as text
+
+    @field_validator("metadata", mode="before")
+    @classmethod
+    def check_metadata(cls, value: Any) -> Optional[str]:
+        return validate_metadata(value)
 
 
 class SessionResponse(BaseModel):
@@ -39,12 +46,19 @@ class SessionResponse(BaseModel):
     score: int
     feedback: str
     timestamp: datetime
-    metadata: Optional[str] = None
+    metadata: Optional[str] = Field(default=None, validation_alias="metadata_")
 
     class Config:
         from_attributes = True
 
 
+class SessionSearchHit(BaseModel):
+    """A session matching a full-text search, best matches first"""
+    session: SessionResponse
+    rank: float  # bm25 relevance; lower is better
+    snippet: str  # matching text with hits wrapped in [brackets]
+
+
 class SessionSummary(BaseModel):
     """Aggregated session statistics"""
     total_sessions: int
@@ -52,3 +66,58 @@ class SessionSummary(BaseModel):
     average_score_by_skill: dict[str, float]
     sessions_by_skill: dict[str, int]
 
+
+
+class TrendBucket(BaseModel):
+    """Score statistics for one day, week or month"""
+    bucket_start: date
+    count: int
+    average_score: float
+    min_score: int
+    max_score: int
+    p25: int
+    p50: int
+    p75: int
+    p90: int
+
+
+class SessionTrends(BaseModel):
+    """Time-bucketed score trends for a user"""
+    user_id: int
+    skill_type: Optional[str] = None
+    bucket: str
+    buckets: list[TrendBucket]
+
+
+class LeaderboardEntry(BaseModel):
+    """One user's position on a skill leaderboard"""
+    rank: int
+    user_id: int
+    username: str
+    best_score: int
+
+
+class SkillRank(BaseModel):
+    """A user's standing among everyone who has practised a skill"""
+    user_id: int
+    skill_type: str
+    best_score: int
+    rank: int
+    total_users: int
+    top_percent: int  # "top 12%": rank as a share of all users, rounded up
+    percentile: float  # share of users with a lower best score
+
+
+class SessionBatchItemResult(BaseModel):
+    """Outcome of one item in a batch session upload"""
+    index: int
+    status_code: int
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class SessionBatchResult(BaseModel):
+    """Per-item results of a batch session upload"""
+    created: int
+    failed: int
+    results: list[SessionBatchItemResult]
@@ -0,0 +1,128 @@
+"""
+Full-text search over session feedback and metadata (SQLite FTS5)
+
+`session_fts` is an external-content FTS5 index over session.feedback and
+session.metadata. Triggers on `session` keep it in sync, so every write
+path is covered: ORM inserts, the executemany batch insert and the
+write-behind writer. Migration 0005 creates the index and fills it for
+existing sessions. To re-index after bulk changes made with triggers
+disabled:
+
+    python -m app.search rebuild
+"""
+
+import argparse
+import re
+import sys
+
+from sqlalchemy import event, func, literal_column, text
+from sqlalchemy.engine import Connection
+from sqlmodel import select
+
+from app.models import Session
+
+FTS_TABLE = "session_fts"
+
+# porter stems "angles"/"angled" to "angl"; unicode61 folds case and diacritics
+_CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        feedback, metadata,
+        content='session', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS session_fts_ai AFTER INSERT ON session BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, feedback, metadata) VALUES (new.id, new.feedback, new.metadata);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS session_fts_ad AFTER DELETE ON session BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, feedback, metadata)
+        VALUES ('delete', old.id, old.feedback, old.metadata);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS session_fts_au AFTER UPDATE ON session BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, feedback, metadata)
+        VALUES ('delete', old.id, old.feedback, old.metadata);
+        INSERT INTO {FTS_TABLE}(rowid, feedback, metadata) VALUES (new.id, new.feedback, new.metadata);
+    END""",
+]
+
+
+def fts5_available(connection: Connection) -> bool:
+    """Whether this SQLite build was compiled with FTS5"""
+    if connection.dialect.name != "sqlite":
+        return False
+    options = {row[0] for row in connection.exec_driver_sql("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def search_index_exists(connection: Connection) -> bool:
+    """Whether the FTS table has been created in this database"""
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first() is not None
+
+
+def create_search_index(connection: Connection):
+    """Create the FTS table and its sync triggers if missing"""
+    for statement in _CREATE_STATEMENTS:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild_search_index(connection: Connection):
+    """Re-index every session from the content table"""
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+@event.listens_for(Session.__table__, "after_create")
+def _create_with_session_table(target, connection, **kw):
+    if fts5_available(connection):
+        create_search_index(connection)
+
+
+@event.listens_for(Session.__table__, "before_drop")
+def _drop_with_session_table(target, connection, **kw):
+    # Triggers go with the session table; the external-content index must go explicitly
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query matching every word, ignoring FTS syntax"""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def search_hits(match: str):
+    """Subquery of (session_id, rank, snippet) for an FTS5 match expression; lower rank is better"""
+    fts = literal_column(FTS_TABLE)
+    return (
+        select(
+            literal_column("rowid").label("session_id"),
+            func.bm25(fts).label("rank"),
+            func.snippet(fts, -1, "[", "]", "…", 12).label("snippet"),
+        )
+        .select_from(text(FTS_TABLE))
+        .where(fts.op("MATCH")(match))
+        .subquery("hits")
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point for rebuilding the search index"""
+    from app.db import engine, verify_schema
+
+    parser = argparse.ArgumentParser(description="Maintain the session full-text search index")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    verify_schema()
+    with engine.begin() as connection:
+        if not fts5_available(connection):
+            print("SQLite was built without FTS5")
+            return 1
+        create_search_index(connection)
+        rebuild_search_index(connection)
+        count = connection.exec_driver_sql("SELECT count(*) FROM session").scalar()
+    print(f"Rebuilt search index over {count} sessions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Validated, indexed session metadata
+
+Session metadata is stored as JSON text in `session.metadata`, and must be
+a JSON object on ingest. A configurable set of hot keys
+(SESSION_METADATA_KEYS) each get an expression index on
+(metadata.<key>, timestamp, id). A `meta=key:value` filter on
+GET /sessions is then an index range scan in keyset order, with no JSON
+parsing in Python.
+
+The index expression and the filter expression are built by the same
+function. SQLite only uses an expression index when the query repeats the
+expression exactly.
+"""
+
+import json
+import os
+import re
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import event, literal_column, or_
+from sqlalchemy.engine import Connection
+
+from app.models import Session
+
+# Metadata keys that get an index and may be used in `meta=` filters
+SESSION_METADATA_KEYS = [
+    k.strip()
+    for k in os.getenv("SESSION_METADATA_KEYS", "model_version,device_model,inference_ms").split(",")
+    if k.strip()
+]
+
+INDEX_PREFIX = "ix_session_meta_"
+_KEY_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def validate_metadata(value: Any) -> Optional[str]:
+    """Return metadata as JSON text, accepting a JSON-object string or a dict"""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if not isinstance(value, str):
+        raise ValueError("metadata must be a JSON object")
+    try:
+        parsed = json.loads(value)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"metadata is not valid JSON: {e.msg}") from e
+    if not isinstance(parsed, dict):
+        raise ValueError("metadata must be a JSON object")
+    return value
+
+
+def _check_key(key: str) -> str:
+    # Keys are inlined into SQL (an index is only used for a literal path), so keep them to identifiers
+    if not _KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid metadata key {key!r}")
+    return key
+
+
+def _sql_value(key: str) -> str:
+    # Rows written before validation may hold malformed JSON, which json_extract rejects outright
+    return f"json_extract(CASE WHEN json_valid(metadata) THEN metadata END, '$.{_check_key(key)}')"
+
+
+def metadata_value(key: str):
+    """SQL expression for a metadata key, identical to the one its index is built on"""
+    return literal_column(_sql_value(key))
+
+
+def metadata_index_name(key: str) -> str:
+    """Name of the expression index for a metadata key"""
+    return f"{INDEX_PREFIX}{_check_key(key)}"
+
+
+def sync_metadata_indexes(connection: Connection, keys: Optional[list[str]] = None) -> list[str]:
+    """Create indexes for configured keys and drop those for keys no longer configured"""
+    keys = SESSION_METADATA_KEYS if keys is None else keys
+    wanted = {metadata_index_name(key): key for key in keys}
+    existing = {
+        row[0]
+        for row in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'session' AND name LIKE ?",
+            (INDEX_PREFIX + "%",),
+        )
+    }
+    for name in existing - wanted.keys():
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    for name, key in wanted.items():
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS {name} ON session ({_sql_value(key)}, timestamp, id)"
+        )
+    return sorted(wanted)
+
+
+@event.listens_for(Session.__table__, "after_create")
+def _create_with_session_table(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        sync_metadata_indexes(connection)
+
+
+def parse_metadata_filter(raw: str) -> tuple[str, tuple]:
+    """Split a `key:value` filter into the key and the stored values it matches
+
+    An unquoted number or boolean matches either that JSON value or the same
+    text stored as a string, since the key's stored type is not known:
+    `model_version:2` finds both `2` and `"2"`. A quoted JSON string
+    (`model_version:"2"`) matches the string only. Anything else is text.
+    """
+    key, sep, value = raw.partition(":")
+    if not sep or not key:
+        raise HTTPException(status_code=400, detail="Metadata filters must look like key:value")
+    if key not in SESSION_METADATA_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Metadata key '{key}' is not filterable; indexed keys: {', '.join(SESSION_METADATA_KEYS)}",
+        )
+    try:
+        parsed = json.loads(value)
+    except json.JSONDecodeError:
+        return key, (value,)
+    if isinstance(parsed, str):
+        return key, (parsed,)
+    if isinstance(parsed, (bool, int, float)):
+        return key, (parsed, value)
+    # Objects, arrays and null never equal a json_extract result here; compare them as text
+    return key, (value,)
+
+
+def metadata_condition(key: str, values: Any):
+    """WHERE clause for one metadata filter, given one value or a tuple of alternatives"""
+    if not isinstance(values, tuple):
+        values = (values,)
+    # Each alternative is still an index lookup, though the rows are then sorted rather than read in index order
+    return or_(*(metadata_value(key) == value for value in values))
@@ -0,0 +1,176 @@
+"""
+Group-committed session inserts
+
+`insert_sessions` writes many sessions (plus their rollups) with one
+executemany INSERT ... RETURNING; the caller commits.
+
+`SessionWriter` is the optional write-behind mode (SESSION_WRITE_BEHIND=true).
+Request handlers validate a session and hand it to a single writer thread,
+which collects submissions for up to SESSION_WRITE_BEHIND_MAX_DELAY_MS or
+SESSION_WRITE_BEHIND_MAX_BATCH rows and commits them together. `submit`
+only returns once the batch holding the row has committed, so a 201 still
+means the row is durable (to the extent of the SQLite profile), but a burst
+of N concurrent POSTs costs a handful of commits instead of N. If a batch
+fails, its rows are retried one per transaction, so only the bad row's
+request gets the error. Submits are refused once the writer is stopping,
+and waits are capped by SESSION_WRITE_BEHIND_TIMEOUT.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlmodel import Session as DBSession
+
+from app.conditional import bump_user_versions
+from app.models import Session
+from app.rollups import apply_sessions
+
+SESSION_WRITE_BEHIND = os.getenv("SESSION_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+SESSION_WRITE_BEHIND_MAX_BATCH = int(os.getenv("SESSION_WRITE_BEHIND_MAX_BATCH", "200"))
+SESSION_WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("SESSION_WRITE_BEHIND_MAX_DELAY_MS", "5"))
+# Longest a request waits for its batch to commit before giving up
+SESSION_WRITE_BEHIND_TIMEOUT = float(os.getenv("SESSION_WRITE_BEHIND_TIMEOUT", "30"))
+
+
+def insert_sessions(db: DBSession, sessions: list[Session]) -> list[int]:
+    """Insert sessions with one executemany, updating rollups and user versions (caller commits)"""
+    table = Session.__table__
+    # RETURNING with sort_by_parameter_order hands back IDs in input order
+    ids = db.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True),
+        [
+            {
+                "user_id": s.user_id,
+                "skill_type": s.skill_type,
+                "score": s.score,
+                "feedback": s.feedback,
+                "timestamp": s.timestamp,
+                "metadata": s.metadata_,
+            }
+            for s in sessions
+        ],
+    ).scalars().all()
+    apply_sessions(db, sessions)
+    bump_user_versions(db, (s.user_id for s in sessions))
+    return list(ids)
+
+
+class SessionWriter:
+    """Single writer thread that group-commits submitted sessions"""
+
+    def __init__(self, engine, max_batch: int = SESSION_WRITE_BEHIND_MAX_BATCH,
+                 max_delay_ms: float = SESSION_WRITE_BEHIND_MAX_DELAY_MS,
+                 timeout: float = SESSION_WRITE_BEHIND_TIMEOUT):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.timeout = timeout
+        self.commits = 0
+        self.rows = 0
+        self._queue: "queue.Queue[tuple[Session, Future]]" = queue.Queue()
+        self._stopping = threading.Event()
+        # Orders submits against stop(): nothing is queued once the writer is stopping
+        self._submit_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._connection = None
+
+    def start(self):
+        """Start the writer thread"""
+        self._stopping.clear()
+        # A dedicated connection, so a pool exhausted by waiting requests can't starve the writer
+        self._connection = self.engine.connect()
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Flush everything already submitted and stop the writer thread"""
+        with self._submit_lock:
+            self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self._connection.close()
+
+    def submit(self, session: Session) -> int:
+        """Queue a session and block until its batch commits; returns the new ID"""
+        future: Future = Future()
+        with self._submit_lock:
+            if self._thread is None or self._stopping.is_set():
+                raise RuntimeError("Session writer is not running")
+            self._queue.put((session, future))
+        # Raises concurrent.futures.TimeoutError rather than hanging a worker thread
+        return future.result(timeout=self.timeout)
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            # Keep collecting until the batch is full or the delay window closes
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._commit(batch)
+
+    def _commit(self, batch: list[tuple[Session, Future]]):
+        try:
+            ids = self._insert([session for session, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # One bad row (e.g. a constraint violation) must not fail its whole batch
+            for item in batch:
+                self._commit([item])
+            return
+
+        for (_, future), session_id in zip(batch, ids):
+            future.set_result(session_id)
+
+    def _insert(self, sessions: list[Session]) -> list[int]:
+        """Insert and commit sessions in one transaction"""
+        with DBSession(bind=self._connection) as db:
+            ids = insert_sessions(db, sessions)
+            db.commit()
+        self.commits += 1
+        self.rows += len(sessions)
+        return ids
+
+
+_writer: Optional[SessionWriter] = None
+
+
+def start_session_writer(engine, **kwargs) -> SessionWriter:
+    """Start the process-wide writer used by create_session"""
+    global _writer
+    stop_session_writer()
+    _writer = SessionWriter(engine, **kwargs)
+    _writer.start()
+    return _writer
+
+
+def stop_session_writer():
+    """Flush and stop the process-wide writer, if running"""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def get_session_writer() -> Optional[SessionWriter]:
+    """The running process-wide writer, or None when write-behind is off"""
+    return _writer
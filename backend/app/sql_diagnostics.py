@@ -0,0 +1,189 @@
+"""
+Opt-in SQL diagnostics: per-request statement log, slow-query plans and N+1 detection
+
+With SQL_DIAGNOSTICS=true, every SQL statement a request runs is recorded
+with its duration. Recording works through cursor events on the engine
+and a trace held in a context variable, which Starlette copies into
+threadpool workers. A statement slower than SQL_SLOW_QUERY_MS gets its
+EXPLAIN QUERY PLAN captured on the same connection. A statement repeated
+SQL_REPEAT_THRESHOLD or more times in one request is flagged as a likely
+N+1. A request with a slow or repeated statement is logged as one JSON
+line on the `app.sql_diagnostics` logger. The most recent reports are
+served from GET /debug/sql, which needs ADMIN_TOKEN in an X-Admin-Token header:
+
+    curl -H "X-Admin-Token: $ADMIN_TOKEN" "http://localhost:8000/debug/sql?flagged=true&limit=20"
+
+The reports contain SQL parameters, so keep the mode off on public
+deployments. When it is off, no listener or middleware is installed.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+SQL_DIAGNOSTICS = os.getenv("SQL_DIAGNOSTICS", "false").lower() in ("1", "true", "yes")
+# Statements at least this slow get their query plan captured
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "50"))
+# Identical statements run this many times in one request are flagged as N+1
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))
+# Request reports kept for GET /debug/sql
+SQL_DIAGNOSTICS_HISTORY = int(os.getenv("SQL_DIAGNOSTICS_HISTORY", "200"))
+
+RECENT_REPORTS: deque = deque(maxlen=SQL_DIAGNOSTICS_HISTORY)
+
+
+class RequestTrace:
+    """Statements run on behalf of one request"""
+    __slots__ = ("slow_ms", "statements")
+
+    def __init__(self, slow_ms: float):
+        self.slow_ms = slow_ms
+        self.statements: list[dict] = []
+
+
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar("sql_trace", default=None)
+
+
+def explain(cursor, statement: str, parameters) -> Optional[list[str]]:
+    """EXPLAIN QUERY PLAN detail lines, run on the statement's own sqlite3 connection"""
+    connection = getattr(cursor, "connection", None)
+    if not isinstance(connection, sqlite3.Connection):
+        return None  # e.g. the aiosqlite adapter in async mode
+    try:
+        # A plain cursor: bypasses SQLAlchemy events and the metrics row counter
+        explain_cursor = sqlite3.Cursor(connection)
+        try:
+            rows = explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        finally:
+            explain_cursor.close()
+    except sqlite3.Error as e:
+        return [f"EXPLAIN failed: {e}"]
+    return [row[3] for row in rows]
+
+
+def trace_engine(engine, enabled: bool = SQL_DIAGNOSTICS):
+    """Record each statement into the current request's trace"""
+    if not enabled:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _trace.get() is not None:
+            conn.info.setdefault("diagnostics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace = _trace.get()
+        if trace is None:
+            return
+        duration_ms = (time.perf_counter() - conn.info["diagnostics_started"].pop()) * 1000
+        entry = {"statement": statement, "duration_ms": round(duration_ms, 3)}
+        if executemany:
+            entry["executemany"] = len(parameters)
+        if duration_ms >= trace.slow_ms:
+            first = parameters[0] if executemany and parameters else parameters
+            entry["parameters"] = list(first or ())
+            entry["plan"] = explain(cursor, statement, first or ())
+        trace.statements.append(entry)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        started = exception_context.connection.info.get("diagnostics_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+def find_repeated(statements: list[dict], threshold: int) -> list[dict]:
+    """Statements whose text occurs at least `threshold` times, most frequent first"""
+    groups: dict[str, dict] = {}
+    for entry in statements:
+        group = groups.setdefault(entry["statement"], {"statement": entry["statement"], "count": 0, "total_ms": 0.0})
+        group["count"] += 1
+        group["total_ms"] += entry["duration_ms"]
+    repeated = [g for g in groups.values() if g["count"] >= threshold]
+    for group in repeated:
+        group["total_ms"] = round(group["total_ms"], 3)
+    return sorted(repeated, key=lambda g: g["count"], reverse=True)
+
+
+class SQLDiagnosticsMiddleware:
+    """ASGI middleware building one diagnostics report per request"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        slow_ms: float = SQL_SLOW_QUERY_MS,
+        repeat_threshold: int = SQL_REPEAT_THRESHOLD,
+        reports: deque = RECENT_REPORTS,
+    ) -> None:
+        self.app = app
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.reports = reports
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith("/debug/"):
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(self.slow_ms)
+        token = _trace.set(trace)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _trace.reset(token)
+            self.report(scope, status, (time.perf_counter() - started) * 1000, trace)
+
+    def report(self, scope: Scope, status: int, duration_ms: float, trace: RequestTrace):
+        if not trace.statements:
+            return
+        slow = [entry for entry in trace.statements if "plan" in entry]
+        repeated = find_repeated(trace.statements, self.repeat_threshold)
+        report = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "route": route_label(scope),
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "sql_ms": round(sum(entry["duration_ms"] for entry in trace.statements), 3),
+            "statement_count": len(trace.statements),
+            "flagged": bool(slow or repeated),
+            "slow": slow,
+            "repeated": repeated,
+            "statements": trace.statements,
+        }
+        self.reports.append(report)
+        if report["flagged"]:
+            # One JSON object per line; the full statement list stays on /debug/sql
+            logger.warning(json.dumps({k: v for k, v in report.items() if k != "statements"}, default=str))
+
+
+def recent_reports(flagged: bool = False, route: Optional[str] = None, limit: int = 50) -> list[dict]:
+    """Newest reports first, optionally only flagged ones or one route's"""
+    reports = [
+        r for r in reversed(RECENT_REPORTS)
+        if (not flagged or r["flagged"]) and (route is None or r["route"] == route)
+    ]
+    return reports[:limit]
@@ -0,0 +1,111 @@
+"""
+Startup timing
+
+`app.main` records how long it takes to import and how long the startup
+hook takes. The timings are logged once the app is up, and served from
+GET /health/startup. To see where the import time goes:
+
+    python -m app.startup             # slowest packages and app modules, via -X importtime
+    python -m app.startup --top 40
+"""
+
+import argparse
+import logging
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger("uvicorn.error")
+
+# Phase name -> milliseconds, filled in as the app starts
+STARTUP_TIMINGS: dict[str, float] = {}
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def record(phase: str, started: float) -> float:
+    """Store the milliseconds elapsed since `started` (a perf_counter value) under `phase`"""
+    elapsed = (time.perf_counter() - started) * 1000
+    STARTUP_TIMINGS[phase] = round(elapsed, 1)
+    return elapsed
+
+
+def log_timings():
+    """Log the recorded phases on one line"""
+    phases = ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in STARTUP_TIMINGS.items())
+    logger.info(f"Startup timings: {phases}")
+
+
+@dataclass
+class ImportTiming:
+    """One line of `python -X importtime` output"""
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parse `-X importtime` stderr, skipping the header and any other output"""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append(ImportTiming(
+            name=name.strip(),
+            self_ms=int(self_us) / 1000,
+            cumulative_ms=int(cumulative_us) / 1000,
+            depth=(len(name) - len(name.lstrip())) // 2,
+        ))
+    return timings
+
+
+def import_timings(module: str = "app.main") -> list[ImportTiming]:
+    """Import `module` in a fresh interpreter with -X importtime and return its timings"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def by_package(timings: list[ImportTiming]) -> dict[str, float]:
+    """Self time summed per top-level package, slowest first"""
+    totals: dict[str, float] = {}
+    for timing in timings:
+        package = timing.name.split(".")[0]
+        totals[package] = totals.get(package, 0) + timing.self_ms
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main(argv: list[str] = None) -> int:
+    """Command line entry point: report where `import app.main` spends its time"""
+    parser = argparse.ArgumentParser(description="Report import time of the app")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    timings = import_timings(args.module)
+    total = next(t.cumulative_ms for t in timings if t.name == args.module)
+    print(f"import {args.module}: {total:.0f} ms")
+
+    print(f"\n{'package':<30} {'self ms':>10}")
+    for package, ms in list(by_package(timings).items())[:args.top]:
+        print(f"{package:<30} {ms:>10.1f}")
+
+    app_modules = sorted(
+        (t for t in timings if t.name.split(".")[0] == "app"), key=lambda t: t.cumulative_ms, reverse=True
+    )
+    print(f"\n{'app module':<30} {'cumulative ms':>14}")
+    for timing in app_modules[:args.top]:
+        print(f"{timing.name:<30} {timing.cumulative_ms:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Time-bucketed score trends
+
+Sessions are grouped by (bucket, score) in SQL. Scores live in the fixed
+0-100 domain, so each bucket comes back as a histogram of at most 101
+rows. Count, average, min, max and percentiles are all derived from that
+histogram, and no raw session rows ever reach Python.
+"""
+
+import math
+from datetime import date, datetime, timezone
+from typing import Literal, Optional
+
+from sqlalchemy import func, literal_column
+from sqlmodel import Session as DBSession, select
+
+from app.models import Session
+from app.schemas import TrendBucket
+
+Bucket = Literal["day", "week", "month"]
+
+# Percentiles reported for every bucket
+TREND_PERCENTILES = (25, 50, 75, 90)
+
+
+def bucket_start(bucket: Bucket):
+    """SQL expression for the first day of the bucket containing Session.timestamp"""
+    if bucket == "week":
+        # Step back six days, then forward to the next Monday: the Monday on or before.
+        # The modifiers are inlined rather than bound: with ? placeholders SQLite can't
+        # tell the GROUP BY and ORDER BY expressions are equal and sorts twice.
+        return func.date(Session.timestamp, literal_column("'-6 days'"), literal_column("'weekday 1'"))
+    if bucket == "month":
+        return func.strftime("%Y-%m-01", Session.timestamp)
+    return func.date(Session.timestamp)
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """A bound as naive UTC, the way Session.timestamp is stored; zone-less values are taken as UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def histogram_percentile(histogram: list[tuple[int, int]], total: int, percentile: int) -> int:
+    """Nearest-rank percentile of a sorted (score, count) histogram"""
+    rank = max(1, math.ceil(percentile / 100 * total))
+    seen = 0
+    for score, count in histogram:
+        seen += count
+        if seen >= rank:
+            return score
+    return histogram[-1][0]
+
+
+def _summarise(start: str, histogram: list[tuple[int, int]]) -> TrendBucket:
+    total = sum(count for _, count in histogram)
+    return TrendBucket(
+        bucket_start=date.fromisoformat(start),
+        count=total,
+        average_score=sum(score * count for score, count in histogram) / total,
+        min_score=histogram[0][0],
+        max_score=histogram[-1][0],
+        **{f"p{p}": histogram_percentile(histogram, total, p) for p in TREND_PERCENTILES},
+    )
+
+
+def compute_trends(
+    db: DBSession,
+    user_id: int,
+    bucket: Bucket = "day",
+    skill_type: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> list[TrendBucket]:
+    """Per-bucket score statistics for a user, oldest bucket first"""
+    period = bucket_start(bucket).label("bucket")
+    query = (
+        select(period, Session.score, func.count())
+        .where(Session.user_id == user_id)
+        .group_by(period, Session.score)
+        .order_by(period, Session.score)
+    )
+    if skill_type:
+        query = query.where(Session.skill_type == skill_type)
+    if start:
+        query = query.where(Session.timestamp >= start)
+    if end:
+        query = query.where(Session.timestamp < end)
+
+    buckets: list[TrendBucket] = []
+    current: Optional[str] = None
+    histogram: list[tuple[int, int]] = []
+    for period_start, score, count in db.exec(query):
+        if period_start != current:
+            if histogram:
+                buckets.append(_summarise(current, histogram))
+            current, histogram = period_start, []
+        histogram.append((score, count))
+    if histogram:
+        buckets.append(_summarise(current, histogram))
+    return buckets
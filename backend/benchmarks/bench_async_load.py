@@ -0,0 +1,109 @@
+"""
+Compare sync (threadpool) and async (AsyncSession) routes under concurrent load
+
+Both apps are driven in-process through httpx's ASGI transport, so sync
+handlers still queue on FastAPI's threadpool exactly as they would under
+uvicorn.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_load
+    python -m benchmarks.bench_async_load --concurrency 1 16 64 256 --requests 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import routes_sessions, routes_users
+from app.api.async_routes import make_async_router
+from app.db import get_async_session
+from benchmarks.common import client_for, make_engine, seed_sessions, seed_users
+
+
+def build_app(use_async: bool) -> FastAPI:
+    """An app with either the sync routers or their async mirrors"""
+    app = FastAPI()
+    wrap = make_async_router if use_async else (lambda router: router)
+    app.include_router(wrap(routes_users.router), prefix="/users")
+    app.include_router(wrap(routes_sessions.router), prefix="/sessions")
+    return app
+
+
+async def run_load(app: FastAPI, paths: list[str], concurrency: int, total: int) -> dict[str, float]:
+    """Issue `total` GETs with at most `concurrency` in flight; return latency stats"""
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    ok = response.status_code == 200
+                except Exception:
+                    # e.g. the connection pool timing out under saturation
+                    ok = False
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "rps": total / elapsed,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=10_000)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    user_id = seed_users(engine, 1)[0]
+    seed_sessions(engine, user_id, args.sessions)
+    client_for(engine)  # points the sync get_session at the benchmark database
+
+    async_engine = create_async_engine(str(engine.url).replace("sqlite://", "sqlite+aiosqlite://"))
+
+    async def override_get_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    paths = [f"/sessions/summary?user_id={user_id}", f"/sessions?user_id={user_id}&limit=50"]
+
+    async def run_all():
+        # One event loop for every run: the async engine's pool is bound to it
+        print(f"{'mode':>6} {'conc':>6} {'p50 ms':>10} {'p99 ms':>10} {'req/s':>10} {'errors':>7}")
+        for use_async in (False, True):
+            app = build_app(use_async)
+            app.dependency_overrides.update(client_for(engine).app.dependency_overrides)
+            app.dependency_overrides[get_async_session] = override_get_async_session
+            for concurrency in args.concurrency:
+                stats = await run_load(app, paths, concurrency, args.requests)
+                mode = "async" if use_async else "sync"
+                print(f"{mode:>6} {concurrency:>6} {stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f} "
+                      f"{stats['rps']:>10.0f} {stats['errors']:>7}")
+        await async_engine.dispose()
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark response compression: bytes saved vs CPU spent per encoding and level
+
+Payloads are built from seeded sessions the way the API serves them:
+a /sessions page (100 and 1000 rows), a /sessions/summary body, and a
+10k-row NDJSON export compressed in 1000-row chunks as the middleware
+does for streaming responses. zstd and brotli rows only appear when
+their packages are installed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --levels 1 6 9
+"""
+
+import argparse
+
+from sqlmodel import Session as DBSession, select
+
+from app.api.routes_sessions import SESSION_COLUMNS, SESSION_FIELDS
+from app.compression import CompressionMiddleware, available_encodings
+from app.fast_json import dumps, rows_to_dicts
+from app.models import Session
+from benchmarks.common import make_engine, measure, seed_sessions, seed_users
+
+EXPORT_ROWS = 10_000
+EXPORT_CHUNK = 1000
+
+
+def build_payloads(engine) -> dict[str, list[bytes]]:
+    """Response bodies keyed by name, each as the list of chunks sent on the wire"""
+    with DBSession(engine) as db:
+        rows = rows_to_dicts(SESSION_FIELDS, db.exec(select(*SESSION_COLUMNS).order_by(Session.id)).all())
+    summary = {
+        "total_sessions": len(rows),
+        "average_score": 50.2,
+        "average_score_by_skill": {"Drawing": 49.8, "Yoga": 50.1, "Punching": 50.9, "Guitar": 50.0},
+        "sessions_by_skill": {"Drawing": 2512, "Yoga": 2490, "Punching": 2475, "Guitar": 2523},
+    }
+    export = [
+        b"".join(dumps(row) + b"\n" for row in rows[i:i + EXPORT_CHUNK])
+        for i in range(0, len(rows), EXPORT_CHUNK)
+    ]
+    return {
+        "summary": [dumps(summary)],
+        "sessions x100": [dumps(rows[:100])],
+        "sessions x1000": [dumps(rows[:1000])],
+        "export ndjson": export,
+    }
+
+
+def compress(middleware: CompressionMiddleware, encoding: str, chunks: list[bytes]) -> int:
+    """Compress chunks as one response and return the encoded size"""
+    compressor = middleware.make_compressor(encoding)
+    size = sum(len(compressor.compress(chunk)) for chunk in chunks[:-1])
+    return size + len(compressor.finish(chunks[-1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 6, 9])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    seed_sessions(engine, seed_users(engine, 1)[0], EXPORT_ROWS)
+    payloads = build_payloads(engine)
+    encodings = available_encodings(["zstd", "br", "gzip"])
+
+    print(f"{'payload':<16} {'encoding':<8} {'level':>5} {'raw B':>10} {'sent B':>10} {'saved':>7} {'p50 ms':>8}")
+    for name, chunks in payloads.items():
+        raw = sum(len(c) for c in chunks)
+        for encoding in encodings:
+            for level in args.levels:
+                middleware = CompressionMiddleware(
+                    None, encodings=[encoding], gzip_level=level, brotli_level=level, zstd_level=level
+                )
+                sent = compress(middleware, encoding, chunks)
+                stats = measure(lambda: compress(middleware, encoding, chunks), repeat=args.repeat)
+                saved = 1 - sent / raw
+                print(
+                    f"{name:<16} {encoding:<8} {level:>5} {raw:>10} {sent:>10} "
+                    f"{saved:>6.1%} {stats['p50_ms']:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark peak Python memory of streaming GET /sessions/export
+
+Usage (from backend/):
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --sizes 10000 100000 --format csv
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.common import client_for, make_engine, seed_sessions, seed_users
+from app.main import app
+
+
+async def stream_and_discard(path: str, query: str) -> int:
+    """Drive the ASGI app directly, dropping each body chunk as it arrives"""
+    # TestClient buffers the whole body, which would hide the server's own peak
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "headers": [], "server": ("bench", 80),
+        "client": ("bench", 1234), "root_path": "",
+    }
+    sent = 0
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # Never disconnect: park the response's disconnect listener
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10} {'seconds':>10} {'MB sent':>10} {'peak MB':>10}")
+    for size in args.sizes:
+        engine = make_engine()
+        user_id = seed_users(engine, 1)[0]
+        seed_sessions(engine, user_id, size)
+        client_for(engine)  # installs the engine override
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        sent = asyncio.run(stream_and_discard("/sessions/export", f"format={args.format}"))
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{size:>10} {elapsed:>10.2f} {sent / 1e6:>10.1f} {peak / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
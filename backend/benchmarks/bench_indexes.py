@@ -0,0 +1,105 @@
+"""
+Benchmark session list/export latency: composite indexes vs single-column indexes
+
+Seeds the same sessions into two databases. "composite" has the index set
+declared in app.models. "single-column" has only the old user_id, skill_type
+and timestamp indexes. It then times the filter combinations the routes
+issue.
+
+Usage (from backend/):
+    python -m benchmarks.bench_indexes
+    python -m benchmarks.bench_indexes --sessions 500000 --users 100
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session as DBSession
+
+from app.models import Session
+from app.rollups import rebuild_rollups
+from benchmarks.common import SKILLS, client_for, make_engine, measure, seed_users
+
+SINGLE_COLUMN_INDEXES = {
+    "ix_session_user_id": "user_id",
+    "ix_session_skill_type": "skill_type",
+    "ix_session_timestamp": "timestamp",
+}
+
+
+def seed(engine, user_ids: list[int], count: int, batch_size: int = 10_000):
+    """Spread sessions over users and skills; Guitar is rare so user+skill filters are selective"""
+    rng = random.Random(0)
+    start = datetime.utcnow() - timedelta(days=365)
+    weights = [10, 10, 10, 1]  # Drawing, Yoga, Punching, Guitar
+    with engine.begin() as conn:
+        for offset in range(0, count, batch_size):
+            conn.execute(insert(Session.__table__), [
+                {
+                    "user_id": rng.choice(user_ids),
+                    "skill_type": rng.choices(SKILLS, weights)[0],
+                    "score": rng.randint(0, 100),
+                    "feedback": "Synthetic benchmark feedback",
+                    "timestamp": start + timedelta(seconds=30 * (offset + i)),
+                }
+                for i in range(min(batch_size, count - offset))
+            ])
+    with DBSession(engine) as db:
+        rebuild_rollups(db)
+
+
+def use_single_column_indexes(engine):
+    """Swap the composite session indexes for the original single-column ones"""
+    with engine.begin() as conn:
+        for index in Session.__table__.indexes:
+            conn.exec_driver_sql(f"DROP INDEX {index.name}")
+        for name, column in SINGLE_COLUMN_INDEXES.items():
+            conn.exec_driver_sql(f"CREATE INDEX {name} ON session ({column})")
+        conn.exec_driver_sql("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engines = {}
+    for name in ["composite", "single-column"]:
+        engine = make_engine()
+        user_ids = seed_users(engine, args.users)
+        seed(engine, user_ids, args.sessions)
+        if name == "single-column":
+            use_single_column_indexes(engine)
+        else:
+            with engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE")
+        engines[name] = (engine, user_ids[0])
+
+    requests = {
+        "user+skill page": "/sessions?user_id={u}&skill_type=Guitar&limit=50",
+        "skill page": "/sessions?skill_type=Guitar&limit=50",
+        "user page": "/sessions?user_id={u}&limit=50",
+        "user+skill export": "/sessions/export?user_id={u}&skill_type=Guitar",
+    }
+
+    print(f"{args.sessions} sessions, {args.users} users")
+    print(f"{'request':<20} {'index set':<14} {'p50 ms':>10} {'p99 ms':>10}")
+    for label, path in requests.items():
+        for name, (engine, user_id) in engines.items():
+            client = client_for(engine)
+            url = path.format(u=user_id)
+
+            def call():
+                response = client.get(url)
+                assert response.status_code == 200
+
+            stats = measure(call, repeat=args.repeat)
+            print(f"{label:<20} {name:<14} {stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
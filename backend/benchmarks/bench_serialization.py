@@ -0,0 +1,67 @@
+"""
+Benchmark list-response serialisation: validated ORM path vs FAST_JSON rows
+
+Both paths run the same query and produce the response body bytes.
+The default path loads ORM objects, validates them through
+list[SessionResponse] the way FastAPI does, and renders with JSONResponse.
+The fast path selects row tuples and encodes dicts with app.fast_json.dumps.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 1000 10000 100000 --repeat 5
+"""
+
+import argparse
+import asyncio
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlmodel import Session as DBSession, select
+
+from app.api.routes_sessions import SESSION_COLUMNS, SESSION_FIELDS
+from app.fast_json import dumps, orjson, rows_to_dicts
+from app.models import Session
+from app.schemas import SessionResponse
+from benchmarks.common import make_engine, measure, seed_sessions, seed_users
+
+RESPONSE_FIELD = create_response_field(name="Response_list_sessions", type_=list[SessionResponse])
+
+
+def default_body(db: DBSession, limit: int) -> bytes:
+    """ORM objects -> response_model validation -> stdlib JSON"""
+    sessions = db.exec(select(Session).order_by(Session.timestamp.desc(), Session.id.desc()).limit(limit)).all()
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=sessions, is_coroutine=False))
+    return JSONResponse(content).body
+
+
+def fast_body(db: DBSession, limit: int) -> bytes:
+    """Row tuples -> dicts -> orjson"""
+    rows = db.exec(select(*SESSION_COLUMNS).order_by(Session.timestamp.desc(), Session.id.desc()).limit(limit)).all()
+    return dumps(rows_to_dicts(SESSION_FIELDS, rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if orjson is not None else 'stdlib json (orjson not installed)'}")
+    print(f"{'rows':>8} {'default p50 ms':>15} {'fast p50 ms':>12} {'speedup':>8} {'bytes':>12}")
+    for size in args.sizes:
+        engine = make_engine()
+        user_id = seed_users(engine, 1)[0]
+        seed_sessions(engine, user_id, size)
+
+        with DBSession(engine) as db:
+            body = fast_body(db, size)
+            default = measure(lambda: default_body(db, size), repeat=args.repeat)
+            fast = measure(lambda: fast_body(db, size), repeat=args.repeat)
+
+        speedup = default["p50_ms"] / fast["p50_ms"]
+        print(f"{size:>8} {default['p50_ms']:>15.2f} {fast['p50_ms']:>12.2f} {speedup:>7.1f}x {len(body):>12}")
+
+
+if __name__ == "__main__":
+    main()
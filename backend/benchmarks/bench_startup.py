@@ -0,0 +1,108 @@
+"""
+Benchmark cold start: time from launching uvicorn to the first healthy response
+
+Each run starts a fresh `uvicorn app.main:app` process against a migrated
+throwaway database. It polls GET /health until it answers 200, then times
+the first GET /openapi.json and reads the in-process breakdown from
+GET /health/startup. Runs with the schema generated live are compared
+against runs with a precomputed OPENAPI_SCHEMA_FILE.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url: str) -> tuple[int, bytes]:
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def cold_start(env: dict[str, str], timeout: float = 30.0) -> dict[str, float]:
+    """Start uvicorn once and return millisecond timings for its first responses"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {server.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"no healthy response within {timeout}s")
+            try:
+                if get(f"{base}/health")[0] == 200:
+                    break
+            except OSError:
+                time.sleep(0.005)
+        healthy_ms = (time.perf_counter() - started) * 1000
+
+        openapi_started = time.perf_counter()
+        assert get(f"{base}/openapi.json")[0] == 200
+        openapi_ms = (time.perf_counter() - openapi_started) * 1000
+
+        phases = json.loads(get(f"{base}/health/startup")[1])
+        return {"healthy": healthy_ms, "openapi": openapi_ms, **phases}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="nanosensei-bench-")
+    env = {**os.environ, "DATABASE_DIR": directory}
+    subprocess.run([sys.executable, "-m", "app.migrations", "upgrade"], cwd=BACKEND_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    schema_file = os.path.join(directory, "openapi.json")
+    subprocess.run([sys.executable, "-m", "app.openapi_schema", schema_file], cwd=BACKEND_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+
+    variants = {
+        "live schema": env,
+        "precomputed schema": {**env, "OPENAPI_SCHEMA_FILE": schema_file},
+    }
+    columns = ["healthy", "import", "startup_hook", "openapi"]
+    print(f"{args.runs} cold starts per variant; p50 (max) in ms")
+    print(f"{'variant':<20}" + "".join(f"{c:>18}" for c in columns))
+    for name, variant_env in variants.items():
+        runs = [cold_start(variant_env) for _ in range(args.runs)]
+        cells = []
+        for column in columns:
+            values = [run[column] for run in runs]
+            cells.append(f"{statistics.median(values):>9.1f} ({max(values):>6.1f})")
+        print(f"{name:<20}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
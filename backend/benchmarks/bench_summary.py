@@ -0,0 +1,42 @@
+"""
+Benchmark GET /sessions/summary latency as a user's session count grows
+
+"cold" empties the summary cache before every request, so it times the
+rollup aggregation; "warm" times cache hits.
+
+Usage (from backend/):
+    python -m benchmarks.bench_summary
+    python -m benchmarks.bench_summary --sizes 1000 10000 100000
+"""
+
+import argparse
+
+from app.cache_backends import get_summary_cache
+from benchmarks.common import client_for, make_engine, measure, seed_sessions, seed_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10} {'cold p50':>10} {'cold p99':>10} {'warm p50':>10} {'warm p99':>10}")
+    for size in args.sizes:
+        engine = make_engine()
+        user_id = seed_users(engine, 1)[0]
+        seed_sessions(engine, user_id, size)
+        client = client_for(engine)
+
+        def call():
+            response = client.get(f"/sessions/summary?user_id={user_id}")
+            assert response.status_code == 200
+            assert response.json()["total_sessions"] == size
+
+        cold = measure(call, repeat=args.repeat, before=get_summary_cache().clear)
+        warm = measure(call, repeat=args.repeat)
+        print(f"{size:>10} {cold['p50_ms']:>10.2f} {cold['p99_ms']:>10.2f} {warm['p50_ms']:>10.2f} {warm['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
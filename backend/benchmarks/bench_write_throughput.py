@@ -0,0 +1,55 @@
+"""
+Compare POST /sessions write throughput across SQLite connection profiles
+
+With --write-behind the requests go through the group-committing session
+writer, and the number of commits it issued is reported as well.
+
+Usage (from backend/):
+    python -m benchmarks.bench_write_throughput
+    python -m benchmarks.bench_write_throughput --requests 2000 --threads 8
+    python -m benchmarks.bench_write_throughput --threads 32 --write-behind
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db import SQLITE_PROFILES, configure_sqlite, sqlite_pragmas
+from app.session_writer import start_session_writer, stop_session_writer
+from benchmarks.common import client_for, make_engine, seed_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", nargs="+", default=sorted(SQLITE_PROFILES))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--write-behind", action="store_true", help="Group-commit through the session writer")
+    args = parser.parse_args()
+
+    print(f"{'profile':>12} {'requests':>10} {'threads':>8} {'seconds':>10} {'writes/s':>10} {'commits':>8}")
+    for profile in args.profiles:
+        engine = make_engine()
+        configure_sqlite(engine, sqlite_pragmas(profile, ""))
+        engine.dispose()  # reopen connections so the PRAGMAs apply
+        user_id = seed_users(engine, 1)[0]
+        client = client_for(engine)
+        payload = {"user_id": user_id, "skill_type": "Drawing", "score": 80, "feedback": "Benchmark"}
+        writer = start_session_writer(engine) if args.write_behind else None
+
+        def write(_):
+            response = client.post("/sessions", json=payload)
+            assert response.status_code == 201
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(write, range(args.requests)))
+        elapsed = time.perf_counter() - started
+        commits = writer.commits if writer else args.requests
+        stop_session_writer()
+        print(f"{profile:>12} {args.requests:>10} {args.threads:>8} {elapsed:>10.2f} "
+              f"{args.requests / elapsed:>10.0f} {commits:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Shared helpers for backend benchmarks
+
+Benchmarks run against a throwaway SQLite file so they never touch the
+development database, and drive the real FastAPI app through TestClient.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session as DBSession, create_engine
+
+from app.cache_backends import get_summary_cache
+from app.db import get_read_session, get_session
+from app.main import app
+from app.models import Session, User
+from app.rollups import rebuild_rollups
+
+SKILLS = ["Drawing", "Yoga", "Punching", "Guitar"]
+
+
+def make_engine(directory: str = None):
+    """Create an engine on a fresh SQLite file with all tables"""
+    directory = directory or tempfile.mkdtemp(prefix="nanosensei-bench-")
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}", echo=False)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def seed_users(engine, count: int) -> list[int]:
+    """Insert `count` users and return their IDs"""
+    with DBSession(engine) as db:
+        users = [User(username=f"bench_user_{i}") for i in range(count)]
+        db.add_all(users)
+        db.commit()
+        return [u.id for u in users]
+
+
+def seed_sessions(engine, user_id: int, count: int, batch_size: int = 10_000):
+    """Insert `count` synthetic sessions for a user and refresh the rollups"""
+    rng = random.Random(user_id)
+    start = datetime.utcnow() - timedelta(days=365)
+    with engine.begin() as conn:
+        for offset in range(0, count, batch_size):
+            rows = [
+                {
+                    "user_id": user_id,
+                    "skill_type": rng.choice(SKILLS),
+                    "score": rng.randint(0, 100),
+                    "feedback": "Synthetic benchmark feedback",
+                    "timestamp": start + timedelta(minutes=offset + i),
+                }
+                for i in range(min(batch_size, count - offset))
+            ]
+            conn.execute(insert(Session.__table__), rows)
+    with DBSession(engine) as db:
+        rebuild_rollups(db)
+
+
+def client_for(engine) -> TestClient:
+    """Return a TestClient whose requests use the given engine
+
+    The summary cache is process-wide and keyed by user id and version, which
+    repeat across benchmark databases, so it is emptied for every engine.
+    """
+    get_summary_cache().clear()
+
+    def override_get_session():
+        with DBSession(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = app.dependency_overrides[get_read_session] = override_get_session
+    return TestClient(app)
+
+
+def measure(fn, repeat: int = 50, before=None) -> dict[str, float]:
+    """Call fn `repeat` times and return latency statistics in milliseconds
+
+    `before`, if given, runs untimed ahead of every call.
+    """
+    samples = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "mean_ms": statistics.fmean(samples),
+    }
@@ -0,0 +1,395 @@
+"""
+Load-test and benchmark suite for the API hot paths
+
+Seeds a synthetic dataset (users, sessions across every skill, rollups,
+leaderboard and search index) into a SQLite file. Datasets are built
+through the migration runner and reused across runs. Each endpoint is then
+driven at every requested concurrency, either in-process through httpx's
+ASGI transport or over HTTP against a local uvicorn. The suite reports
+p50/p95/p99 latency and requests per second per endpoint. Results can be
+saved as JSON and compared against a saved baseline.
+
+Usage (from backend/):
+    python -m benchmarks.suite                                    # 10k sessions, in-process
+    python -m benchmarks.suite --sessions 1M --users 5k --mode both --concurrency 1 16 64
+    python -m benchmarks.suite --endpoints list_user summary --requests 2000
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json           # exits 1 on a regression
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import Session as DBSession, create_engine
+
+from app.models import Session, User
+from benchmarks.common import SKILLS
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DATASETS_DIR = os.path.join(tempfile.gettempdir(), "nanosensei-bench-datasets")
+
+FEEDBACK = [
+    "Relax your wrist angle",
+    "Great posture, keep your back straight",
+    "Follow through with your hips",
+    "Smoother strokes on the shading",
+    "Breathe out as you extend",
+    "Steady tempo on the chord changes",
+]
+MODEL_VERSIONS = ["1.0.0", "1.1.0", "1.2.0"]
+
+# name -> (method, path template); templates are filled per request
+ENDPOINTS = {
+    "list_user": ("GET", "/sessions?user_id={user_id}&limit=50"),
+    "list_user_skill": ("GET", "/sessions?user_id={user_id}&skill_type={skill}&limit=50"),
+    "list_meta": ("GET", "/sessions?meta=model_version:{model_version}&limit=50"),
+    "get_session": ("GET", "/sessions/{session_id}"),
+    "summary": ("GET", "/sessions/summary?user_id={user_id}"),
+    "trends": ("GET", "/sessions/trends?user_id={user_id}&bucket=week"),
+    "search": ("GET", "/sessions/search?q={word}&limit=20"),
+    "leaderboard": ("GET", "/leaderboard/{skill}"),
+    "rank": ("GET", "/leaderboard/{skill}/users/{user_id}"),
+    "create_session": ("POST", "/sessions"),
+}
+
+
+def parse_count(value: str) -> int:
+    """Parse counts like 1000, 10k or 10M"""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = value[-1].lower()
+    if suffix in multipliers:
+        return int(float(value[:-1]) * multipliers[suffix])
+    return int(value)
+
+
+@dataclass
+class Dataset:
+    """A seeded database directory (holding nanosensei.db, as app.db expects)"""
+    directory: str
+    sessions: int
+    users: int
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, "nanosensei.db")
+
+
+def seed_dataset(path: str, sessions: int, users: int, seed: int = 0, batch_size: int = 50_000):
+    """Create the schema with the migration runner, then bulk-insert users and sessions"""
+    from app.migrations import upgrade
+    from app.rollups import rebuild_rollups
+
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade(engine)
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [
+            {"id": i, "username": f"bench_user_{i}", "created_at": start} for i in range(1, users + 1)
+        ])
+    # Seconds between sessions, so the data spans about a year at any size
+    spacing = max(1, 365 * 24 * 3600 // max(sessions, 1))
+    for offset in range(0, sessions, batch_size):
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.execute(insert(Session.__table__), [
+                {
+                    "user_id": rng.randint(1, users),
+                    "skill_type": rng.choice(SKILLS),
+                    "score": rng.randint(0, 100),
+                    "feedback": rng.choice(FEEDBACK),
+                    "timestamp": start + timedelta(seconds=spacing * (offset + i)),
+                    "metadata": json.dumps({"model_version": rng.choice(MODEL_VERSIONS)}),
+                }
+                for i in range(min(batch_size, sessions - offset))
+            ])
+    with DBSession(engine) as db:
+        rebuild_rollups(db)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+
+
+def get_dataset(sessions: int, users: int, datasets_dir: str = DATASETS_DIR, fresh: bool = False) -> Dataset:
+    """Reuse the dataset for these sizes if one was seeded before, else seed it"""
+    dataset = Dataset(os.path.join(datasets_dir, f"sessions-{sessions}-users-{users}"), sessions, users)
+    if fresh and os.path.isdir(dataset.directory):
+        shutil.rmtree(dataset.directory)
+    if not os.path.exists(dataset.path):
+        # Seed under a temporary name so an interrupted run never leaves a partial dataset
+        building = dataset.directory + ".building"
+        shutil.rmtree(building, ignore_errors=True)
+        os.makedirs(building)
+        print(f"Seeding {sessions} sessions for {users} users into {dataset.directory}")
+        started = time.perf_counter()
+        seed_dataset(os.path.join(building, "nanosensei.db"), sessions, users)
+        os.rename(building, dataset.directory)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    return dataset
+
+
+class RequestFactory:
+    """Deterministic per-request parameters so runs are comparable"""
+
+    def __init__(self, dataset: Dataset, seed: int = 1):
+        self.dataset = dataset
+        self.rng = random.Random(seed)
+
+    def build(self, endpoint: str) -> tuple[str, str, Optional[dict]]:
+        method, template = ENDPOINTS[endpoint]
+        values = {
+            "user_id": self.rng.randint(1, self.dataset.users),
+            "skill": self.rng.choice(SKILLS),
+            "session_id": self.rng.randint(1, max(self.dataset.sessions, 1)),
+            "model_version": self.rng.choice(MODEL_VERSIONS),
+            "word": self.rng.choice(["wrist", "posture", "tempo", "hips"]),
+        }
+        body = None
+        if method == "POST":
+            body = {
+                "user_id": values["user_id"],
+                "skill_type": values["skill"],
+                "score": self.rng.randint(0, 100),
+                "feedback": self.rng.choice(FEEDBACK),
+            }
+        return method, template.format(**values), body
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    rank = math.ceil(p / 100 * len(sorted_samples))
+    return sorted_samples[min(len(sorted_samples), max(rank, 1)) - 1]
+
+
+async def run_load(client: httpx.AsyncClient, requests: list[tuple], concurrency: int) -> dict:
+    """Issue the requests with at most `concurrency` in flight; return latency and throughput"""
+    latencies: list[float] = []
+    errors = 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, path, body in queue:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def in_process_client(dataset: Dataset, concurrency: int) -> httpx.AsyncClient:
+    """A client that calls the app directly, with its sessions pointed at the dataset"""
+    from app.db import get_read_session, get_session
+    from app.main import app
+
+    engine = create_engine(f"sqlite:///{dataset.path}", pool_size=max(5, concurrency), max_overflow=concurrency)
+
+    def override_get_session():
+        with DBSession(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = app.dependency_overrides[get_read_session] = override_get_session
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+class UvicornServer:
+    """A local `uvicorn app.main:app` serving the dataset"""
+
+    def __init__(self, dataset: Dataset, workers: int = 1):
+        self.dataset = dataset
+        self.workers = workers
+        self.process = None
+        self.base_url = None
+
+    def __enter__(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        env = {**os.environ, "DATABASE_DIR": self.dataset.directory}
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.base_url}/health").status_code == 200:
+                    return self
+            except httpx.TransportError:
+                time.sleep(0.05)
+        self.__exit__()
+        raise RuntimeError("uvicorn did not become healthy within 60s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+    def client(self, concurrency: int) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        return httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=60)
+
+
+async def run_endpoints(make_client, dataset: Dataset, mode: str, endpoints: list[str],
+                        concurrencies: list[int], requests: int, warmup: int) -> list[dict]:
+    """Drive every endpoint at every concurrency through clients from `make_client(concurrency)`"""
+    factory = RequestFactory(dataset)
+    results = []
+    for concurrency in concurrencies:
+        async with make_client(concurrency) as client:
+            for endpoint in endpoints:
+                await run_load(client, [factory.build(endpoint) for _ in range(warmup)], concurrency)
+                stats = await run_load(client, [factory.build(endpoint) for _ in range(requests)], concurrency)
+                result = {"endpoint": endpoint, "mode": mode, "concurrency": concurrency, **stats}
+                results.append(result)
+                print(format_row(result), flush=True)
+    return results
+
+
+HEADER = (f"{'endpoint':<16} {'mode':<10} {'conc':>5} {'req/s':>9} {'p50 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+
+
+def format_row(r: dict) -> str:
+    return (f"{r['endpoint']:<16} {r['mode']:<10} {r['concurrency']:>5} {r['rps']:>9.0f} {r['p50_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+
+
+def result_key(result: dict) -> tuple:
+    return result["endpoint"], result["mode"], result["concurrency"]
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Describe every result whose p95 rose or throughput fell by more than `tolerance` (a fraction)"""
+    previous = {result_key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(result_key(result))
+        if base is None:
+            continue
+        label = "{} {} c={}".format(*result_key(result))
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {base['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: {base['rps']:.0f} -> {result['rps']:.0f} req/s")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{label}: {base['errors']} -> {result['errors']} errors")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=parse_count, default=10_000, help="e.g. 1k, 100k, 10M")
+    parser.add_argument("--users", type=parse_count, default=100)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per endpoint and concurrency")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+    parser.add_argument("--fresh", action="store_true", help="re-seed the dataset even if it exists")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, as a fraction")
+    args = parser.parse_args(argv)
+
+    dataset = get_dataset(args.sessions, args.users, args.datasets_dir, args.fresh)
+    if "create_session" in args.endpoints:
+        # Writes grow the dataset; keep the reused copy pristine
+        scratch = tempfile.mkdtemp(prefix="nanosensei-bench-")
+        shutil.copy(dataset.path, os.path.join(scratch, "nanosensei.db"))
+        dataset = Dataset(scratch, dataset.sessions, dataset.users)
+
+    modes = ["inprocess", "uvicorn"] if args.mode == "both" else [args.mode]
+    options = (args.endpoints, args.concurrency, args.requests, args.warmup)
+    results = []
+    print(f"{args.sessions} sessions, {args.users} users")
+    print(HEADER)
+    for mode in modes:
+        if mode == "inprocess":
+            make_client = lambda concurrency: in_process_client(dataset, concurrency)  # noqa: E731
+            results += asyncio.run(run_endpoints(make_client, dataset, mode, *options))
+        else:
+            with UvicornServer(dataset, args.workers) as server:
+                results += asyncio.run(run_endpoints(server.client, dataset, mode, *options))
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "sessions": args.sessions,
+            "users": args.users,
+            "workers": args.workers,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["sessions"] != args.sessions or baseline["meta"]["machine"] != platform.machine():
+            print("Warning: the baseline was recorded with a different dataset size or machine")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} regressions beyond {args.tolerance:.0%}" if regressions
+              else f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
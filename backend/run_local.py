@@ -3,6 +3,7 @@ Local development runner
 Sets up Python path and runs the FastAPI server
 """
 
+import os
 import sys
 from pathlib import Path
 
@@ -12,5 +13,8 @@ sys.path.insert(0, str(backend_dir))
 
 if __name__ == "__main__":
     import uvicorn
+
+    # Dev servers migrate on startup; deployments run `python -m app.migrations upgrade` first
+    os.environ.setdefault("DATABASE_AUTO_MIGRATE", "true")
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
 
@@ -5,6 +5,8 @@ Pytest configuration and shared fixtures
 import pytest
 import os
 from sqlmodel import SQLModel, create_engine, Session
+from app.cache import session_cache, user_cache
+from app.cache_backends import get_summary_cache
 from app.db import engine
 from app.models import User, Session as SessionModel
 
@@ -21,6 +23,18 @@ def setup_test_db():
     SQLModel.metadata.drop_all(test_engine)
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Drop cached rows so IDs reused after a table reset never hit stale entries"""
+    user_cache.clear()
+    session_cache.clear()
+    get_summary_cache().clear()
+    yield
+    user_cache.clear()
+    session_cache.clear()
+    get_summary_cache().clear()
+
+
 @pytest.fixture
 def db_session():
     """Provide a database session for tests"""
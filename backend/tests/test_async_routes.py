@@ -0,0 +1,90 @@
+"""
+Tests for the async (AsyncSession) variants of the API routes
+"""
+
+import inspect
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import routes_sessions, routes_users
+from app.api.async_routes import make_async_router
+from app.db import engine
+from app.schemas import SessionSummary
+from sqlmodel import SQLModel
+
+async_app = FastAPI()
+async_app.include_router(make_async_router(routes_users.router), prefix="/users")
+async_app.include_router(make_async_router(routes_sessions.router), prefix="/sessions")
+
+client = TestClient(async_app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def test_async_routes_are_coroutines():
+    """Test every mirrored endpoint is async and keeps its response model"""
+    router = make_async_router(routes_sessions.router)
+    paths = {route.path for route in router.routes}
+    assert paths == {route.path for route in routes_sessions.router.routes}
+    for route in router.routes:
+        assert inspect.iscoroutinefunction(route.endpoint)
+    
+    summary = next(r for r in router.routes if r.path == "/summary")
+    assert summary.response_model is SessionSummary
+
+
+def test_async_user_and_session_workflow():
+    """Test create, read, list and summary through the async handlers"""
+    user = client.post("/users", json={"username": "async_user"})
+    assert user.status_code == 201
+    user_id = user.json()["id"]
+    
+    for score in [70, 90]:
+        response = client.post("/sessions", json={
+            "user_id": user_id,
+            "skill_type": "Guitar",
+            "score": score,
+            "feedback": "Async"
+        })
+        assert response.status_code == 201
+    
+    assert client.get(f"/users/{user_id}").json()["username"] == "async_user"
+    
+    page = client.get(f"/sessions?user_id={user_id}&limit=1")
+    assert page.status_code == 200
+    assert len(page.json()) == 1
+    assert "X-Next-Cursor" in page.headers
+    
+    response = client.get(f"/sessions/summary?user_id={user_id}")
+    summary = response.json()
+    assert summary["total_sessions"] == 2
+    assert summary["average_score"] == 80.0
+    
+    etag = response.headers["etag"]
+    revalidated = client.get(f"/sessions/summary?user_id={user_id}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+
+
+def test_async_errors_and_export():
+    """Test HTTP errors propagate and streaming export works in async mode"""
+    assert client.get("/users/99999").status_code == 404
+    assert client.post("/sessions", json={
+        "user_id": 99999, "skill_type": "Guitar", "score": 50, "feedback": "x"
+    }).status_code == 404
+    
+    user_id = client.post("/users", json={"username": "exporter"}).json()["id"]
+    client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Yoga", "score": 60, "feedback": "One"},
+        {"user_id": user_id, "skill_type": "Yoga", "score": 65, "feedback": "Two"},
+    ])
+    response = client.get(f"/sessions/export?user_id={user_id}")
+    assert response.status_code == 200
+    assert [json.loads(line)["feedback"] for line in response.text.splitlines()] == ["One", "Two"]
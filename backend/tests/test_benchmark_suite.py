@@ -0,0 +1,58 @@
+"""
+Tests for the benchmark suite's dataset seeding, statistics and baseline comparison
+"""
+
+import asyncio
+
+from sqlmodel import create_engine
+
+from app.db import get_read_session, get_session
+from app.main import app
+from benchmarks.suite import ENDPOINTS, compare, get_dataset, in_process_client, parse_count, percentile, run_endpoints
+
+
+def test_parse_count():
+    assert parse_count("1000") == 1000
+    assert parse_count("10k") == 10_000
+    assert parse_count("2.5M") == 2_500_000
+
+
+def test_percentile_is_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 95) == 95
+    assert percentile(samples, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    """Slower p95, lower throughput and new errors are reported; small drift is not"""
+    base = {"endpoint": "summary", "mode": "inprocess", "concurrency": 1, "p95_ms": 10.0, "rps": 100.0, "errors": 0}
+    assert compare([{**base, "p95_ms": 11.0, "rps": 95.0}], [base], tolerance=0.2) == []
+    regressions = compare([{**base, "p95_ms": 13.0, "rps": 70.0, "errors": 2}], [base], tolerance=0.2)
+    assert len(regressions) == 3
+    assert regressions[0].startswith("summary inprocess c=1: p95")
+    # Results without a baseline entry are not compared
+    assert compare([{**base, "concurrency": 8, "p95_ms": 99.0}], [base], tolerance=0.2) == []
+
+
+def test_small_run_in_process(tmp_path):
+    """A seeded dataset is reused, and every endpoint answers without errors"""
+    dataset = get_dataset(300, 5, str(tmp_path))
+    assert get_dataset(300, 5, str(tmp_path)).path == dataset.path
+    with create_engine(f"sqlite:///{dataset.path}").connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM session").scalar() == 300
+        assert connection.exec_driver_sql("SELECT count(*) FROM skill_rollup").scalar() > 0
+
+    try:
+        results = asyncio.run(run_endpoints(
+            lambda concurrency: in_process_client(dataset, concurrency),
+            dataset, "inprocess", list(ENDPOINTS), [2], requests=4, warmup=1,
+        ))
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        app.dependency_overrides.pop(get_read_session, None)
+
+    assert [r["endpoint"] for r in results] == list(ENDPOINTS)
+    assert all(r["errors"] == 0 and r["requests"] == 4 for r in results)
+    assert all(r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"] for r in results)
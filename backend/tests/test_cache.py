@@ -0,0 +1,106 @@
+"""
+Tests for the in-process LRU + TTL caches
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app import cache
+from app.cache import TTLCache, session_cache, user_cache
+from app.db import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def test_ttl_cache_lru_eviction():
+    """Test the least recently used entry is evicted when full"""
+    lru = TTLCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "b" is now least recently used
+    lru.set("c", 3)
+    
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    stats = lru.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    """Test entries expire after the TTL"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    ttl = TTLCache(maxsize=10, ttl=5)
+    ttl.set("k", "v")
+    
+    now[0] += 4
+    assert ttl.get("k") == "v"
+    now[0] += 2
+    assert ttl.get("k") is None
+    assert ttl.stats()["expirations"] == 1
+
+
+def test_ttl_cache_disabled_when_size_zero():
+    """Test a zero-sized cache never stores anything"""
+    disabled = TTLCache(maxsize=0, ttl=60)
+    disabled.set("k", "v")
+    assert disabled.get("k") is None
+
+
+def test_user_reads_served_from_cache():
+    """Test creating a user populates the cache and reads hit it"""
+    user_id = client.post("/users", json={"username": "cached"}).json()["id"]
+    
+    assert client.get(f"/users/{user_id}").json()["username"] == "cached"
+    client.post("/sessions", json={
+        "user_id": user_id, "skill_type": "Drawing", "score": 80, "feedback": "Hit"
+    })
+    client.get(f"/sessions/summary?user_id={user_id}")
+    
+    # get_user, create_session and the summary all found the user in memory
+    assert user_cache.stats()["hits"] == 3
+    assert user_cache.stats()["misses"] == 0
+
+
+def test_session_reads_served_from_cache():
+    """Test session reads are read-through and counted"""
+    user_id = client.post("/users", json={"username": "reader"}).json()["id"]
+    session_id = client.post("/sessions", json={
+        "user_id": user_id, "skill_type": "Yoga", "score": 75, "feedback": "Cached"
+    }).json()["id"]
+    session_cache.clear()
+    
+    first = client.get(f"/sessions/{session_id}")
+    second = client.get(f"/sessions/{session_id}")
+    assert first.json() == second.json()
+    assert session_cache.stats()["misses"] == 1
+    assert session_cache.stats()["hits"] == 1
+    
+    # Missing rows are not cached
+    assert client.get("/sessions/99999").status_code == 404
+    assert client.get("/sessions/99999").status_code == 404
+    assert session_cache.stats()["size"] == 1
+
+
+def test_cache_stats_endpoint():
+    """Test cache counters are exposed"""
+    response = client.get("/cache/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) >= {"users", "sessions"}
+    assert {"hits", "misses", "evictions", "size", "maxsize"} <= set(data["users"])
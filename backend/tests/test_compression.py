@@ -0,0 +1,130 @@
+"""
+Tests for the response compression middleware
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app.compression import CompressionMiddleware, available_encodings, choose_encoding
+from app.db import engine
+from app.main import app
+
+BIG = {"rows": [{"feedback": "Keep your wrist relaxed"} for _ in range(200)]}
+
+demo = FastAPI()
+demo.add_middleware(CompressionMiddleware, encodings=["gzip"], minimum_size=500)
+
+
+@demo.get("/big")
+def big():
+    return BIG
+
+
+@demo.get("/small")
+def small():
+    return {"status": "ok"}
+
+
+@demo.get("/stream")
+def stream():
+    return StreamingResponse((f"line {i}\n".encode() for i in range(1000)), media_type="text/plain")
+
+
+@demo.get("/not-modified")
+def not_modified():
+    return Response(status_code=304, headers={"ETag": '"abc"'})
+
+
+@demo.get("/encoded")
+def encoded():
+    return Response(gzip.compress(b"x" * 2000), headers={"Content-Encoding": "gzip"})
+
+
+demo_client = TestClient(demo)
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def test_large_body_is_gzipped():
+    """Bodies above the threshold are compressed with a matching Content-Length"""
+    response = demo_client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(json.dumps(BIG))
+    assert response.json() == BIG
+
+
+def test_small_body_and_identity_untouched():
+    """Small bodies and clients without gzip support get the raw body"""
+    small = demo_client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    identity = demo_client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == BIG
+
+    refused = demo_client.get("/big", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+
+
+def test_streaming_body_is_compressed():
+    """Streamed responses are compressed chunk by chunk without a Content-Length"""
+    response = demo_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines()[-1] == "line 999"
+
+
+def test_304_and_preencoded_pass_through():
+    """304s and responses that already set Content-Encoding are left alone"""
+    response = demo_client.get("/not-modified", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"abc"'
+    assert "content-encoding" not in response.headers
+
+    response = demo_client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.content == b"x" * 2000
+
+
+def test_choose_encoding():
+    """Negotiation follows server preference among encodings the client accepts"""
+    assert choose_encoding("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert choose_encoding("gzip;q=0.5, br;q=0", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("*", ["gzip"]) == "gzip"
+    assert choose_encoding("identity", ["gzip"]) is None
+    assert choose_encoding("", ["gzip"]) is None
+    assert "gzip" in available_encodings(["zstd", "br", "gzip"])
+
+
+def test_compressed_sessions_keep_conditional_get():
+    """Compressed responses carry a weak ETag that still revalidates to 304"""
+    user_id = client.post("/users", json={"username": "gzip_user"}).json()["id"]
+    client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Drawing", "score": 80, "feedback": "Relax the wrist " * 5}
+        for _ in range(50)
+    ])
+
+    response = client.get(f"/sessions?user_id={user_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 50
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+
+    revalidated = client.get(
+        f"/sessions?user_id={user_id}", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
@@ -0,0 +1,173 @@
+"""
+Tests for ETag / conditional GET support
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app.cache_backends import MemoryCacheBackend, get_summary_cache, set_summary_cache
+from app.db import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def _create_user():
+    return client.post("/users", json={"username": "etag_user"}).json()["id"]
+
+
+def _create_session(user_id, score=80):
+    response = client.post("/sessions", json={
+        "user_id": user_id, "skill_type": "Drawing", "score": score, "feedback": "x"
+    })
+    assert response.status_code == 201
+
+
+@pytest.mark.parametrize("path", ["/sessions/summary?user_id={id}", "/sessions?user_id={id}"])
+def test_matching_if_none_match_returns_304(path):
+    """A repeated request with the returned ETag is answered with an empty 304"""
+    user_id = _create_user()
+    _create_session(user_id)
+    url = path.format(id=user_id)
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert "last-modified" in first.headers
+
+    second = client.get(url, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+
+def test_etag_changes_after_session_created():
+    """Recording a session invalidates the user's summary and list ETags"""
+    user_id = _create_user()
+    _create_session(user_id)
+    summary_etag = client.get(f"/sessions/summary?user_id={user_id}").headers["etag"]
+    list_etag = client.get(f"/sessions?user_id={user_id}").headers["etag"]
+
+    _create_session(user_id, score=90)
+
+    summary = client.get(f"/sessions/summary?user_id={user_id}", headers={"If-None-Match": summary_etag})
+    assert summary.status_code == 200
+    assert summary.json()["total_sessions"] == 2
+    assert summary.headers["etag"] != summary_etag
+
+    sessions = client.get(f"/sessions?user_id={user_id}", headers={"If-None-Match": list_etag})
+    assert sessions.status_code == 200
+    assert len(sessions.json()) == 2
+
+
+def test_summary_etag_matches_body_after_racing_write():
+    """A summary cached while a write commits is never served under the post-write ETag"""
+    user_id = _create_user()
+    _create_session(user_id)
+    previous = get_summary_cache()
+
+    class WriteBeforeSet(MemoryCacheBackend):
+        def set(self, key, value, ttl):
+            if not getattr(self, "raced", False):
+                self.raced = True
+                _create_session(user_id, score=90)
+            super().set(key, value, ttl)
+
+    set_summary_cache(WriteBeforeSet(maxsize=10, ttl=60))
+    try:
+        first = client.get(f"/sessions/summary?user_id={user_id}")
+        second = client.get(f"/sessions/summary?user_id={user_id}")
+        assert first.json()["total_sessions"] == 1
+        assert second.json()["total_sessions"] == 2
+        assert second.headers["etag"] != first.headers["etag"]
+
+        revalidated = client.get(f"/sessions/summary?user_id={user_id}", headers={"If-None-Match": second.headers["etag"]})
+        assert revalidated.status_code == 304
+    finally:
+        set_summary_cache(previous)
+
+
+def test_batch_insert_bumps_version():
+    """Sessions created through /sessions/batch also change the ETag"""
+    user_id = _create_user()
+    etag = client.get(f"/sessions/summary?user_id={user_id}").headers["etag"]
+
+    client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Yoga", "score": 70, "feedback": "x"}
+    ])
+
+    response = client.get(f"/sessions/summary?user_id={user_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_etag_depends_on_query():
+    """Different pages or filters of the same user get different ETags"""
+    user_id = _create_user()
+    _create_session(user_id)
+
+    all_sessions = client.get(f"/sessions?user_id={user_id}")
+    drawing = client.get(f"/sessions?user_id={user_id}&skill_type=Drawing")
+
+    assert all_sessions.headers["etag"] != drawing.headers["etag"]
+
+
+def test_if_modified_since():
+    """If-Modified-Since is honoured when no If-None-Match is sent"""
+    user_id = _create_user()
+    _create_session(user_id)
+    last_modified = client.get(f"/sessions/summary?user_id={user_id}").headers["last-modified"]
+
+    response = client.get(
+        f"/sessions/summary?user_id={user_id}", headers={"If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+
+    response = client.get(
+        f"/sessions/summary?user_id={user_id}",
+        headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("since", [
+    "Fri, 01 Jan 2049 00:00:00 GMT",  # IMF-fixdate
+    "Friday, 01-Jan-49 00:00:00 GMT",  # rfc850
+    "Fri Jan  1 00:00:00 2049",  # asctime
+    "Fri, 01 Jan 2049 00:00:00 -0000",
+])
+@pytest.mark.parametrize("path", ["/users/{id}", "/sessions/summary?user_id={id}"])
+def test_if_modified_since_accepts_every_http_date_format(path, since):
+    """All three HTTP-date formats are understood, including those that parse without a zone"""
+    user_id = _create_user()
+    _create_session(user_id)
+    response = client.get(path.format(id=user_id), headers={"If-Modified-Since": since})
+    assert response.status_code == 304
+
+
+def test_get_user_conditional():
+    """GET /users/{id} carries an ETag and answers 304 when it matches"""
+    user_id = _create_user()
+
+    first = client.get(f"/users/{user_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    second = client.get(f"/users/{user_id}", headers={"If-None-Match": f'W/{etag}'})
+    assert second.status_code == 304
+
+
+def test_unknown_user_still_404():
+    """Conditional headers never mask a missing user"""
+    response = client.get("/sessions/summary?user_id=999", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
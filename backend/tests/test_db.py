@@ -6,7 +6,7 @@ import pytest
 import os
 import tempfile
 from sqlmodel import SQLModel, create_engine, Session
-from app.db import create_db_and_tables, get_session
+from app.db import async_url, configure_sqlite, create_db_and_tables, get_session, sqlite_pragmas
 from app.models import User, Session as SessionModel
 
 
@@ -86,3 +86,39 @@ def test_session_model_score_validation():
     session3 = SessionModel(user_id=1, skill_type="Drawing", score=50, feedback="Test")
     assert session3.score == 50
 
+
+
+def test_sqlite_pragmas_profiles():
+    """Test profile names resolve to PRAGMA sets with overrides applied"""
+    assert sqlite_pragmas("default", "") == {}
+    
+    pragmas = sqlite_pragmas("production", "mmap_size=0, cache_size=-2000")
+    assert pragmas["journal_mode"] == "WAL"
+    assert pragmas["synchronous"] == "NORMAL"
+    assert pragmas["mmap_size"] == "0"
+    assert pragmas["cache_size"] == "-2000"
+    
+    with pytest.raises(ValueError):
+        sqlite_pragmas("turbo", "")
+
+
+def test_configure_sqlite_applies_pragmas():
+    """Test PRAGMAs are applied to every pooled connection"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'pragmas.db')}", echo=False)
+        configure_sqlite(engine, sqlite_pragmas("production", ""))
+        
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+            assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+        engine.dispose()
+
+
+def test_async_url_follows_database_url():
+    """The async engine reaches the same database as the sync one"""
+    assert async_url("sqlite:////data/nanosensei.db") == "sqlite+aiosqlite:////data/nanosensei.db"
+    assert async_url("sqlite+pysqlite:///rel.db") == "sqlite+aiosqlite:///rel.db"
+    with pytest.raises(ValueError, match="Only SQLite"):
+        async_url("postgresql+psycopg://u:p@db:5432/app")
@@ -0,0 +1,80 @@
+"""
+Tests for the FAST_JSON list serialisation path
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app import fast_json
+from app.api import routes_sessions, routes_users
+from app.db import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def _set_fast_json(monkeypatch, enabled):
+    monkeypatch.setattr(routes_sessions, "FAST_JSON", enabled)
+    monkeypatch.setattr(routes_users, "FAST_JSON", enabled)
+
+
+def _seed():
+    user_id = client.post("/users", json={"username": "fast_user", "email": "fast@example.com"}).json()["id"]
+    client.post("/users", json={"username": "other_user"})
+    client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Drawing", "score": 80, "feedback": "ok", "metadata": '{"a": 1}'},
+        {"user_id": user_id, "skill_type": "Yoga", "score": 90, "feedback": "café"},
+        {"user_id": user_id, "skill_type": "Yoga", "score": 70, "feedback": "x"},
+    ])
+    return user_id
+
+
+@pytest.mark.parametrize("path", [
+    "/sessions",
+    "/sessions?user_id={id}&limit=2",
+    "/sessions?skill_type=Yoga",
+    "/users",
+    "/users?limit=1",
+])
+def test_fast_path_matches_default(monkeypatch, path):
+    """The fast path returns the same body and pagination headers as the validated path"""
+    url = path.format(id=_seed())
+
+    _set_fast_json(monkeypatch, False)
+    expected = client.get(url)
+    _set_fast_json(monkeypatch, True)
+    actual = client.get(url)
+
+    assert actual.status_code == 200
+    assert actual.headers["content-type"] == "application/json"
+    assert actual.json() == expected.json()
+    assert actual.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor")
+    assert actual.headers.get("ETag") == expected.headers.get("ETag")
+
+
+def test_fast_path_keeps_openapi_schema(monkeypatch):
+    """List endpoints still advertise their response models"""
+    _set_fast_json(monkeypatch, True)
+    schema = client.get("/openapi.json").json()
+    sessions = schema["paths"]["/sessions"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert sessions["items"]["$ref"].endswith("/SessionResponse")
+
+
+def test_dumps_stdlib_fallback(monkeypatch):
+    """Without orjson, dumps falls back to compact stdlib JSON with ISO datetimes"""
+    monkeypatch.setattr(fast_json, "orjson", None)
+    body = fast_json.dumps([{"at": datetime(2024, 1, 2, 3, 4, 5), "text": "café"}])
+    assert json.loads(body) == [{"at": "2024-01-02T03:04:05", "text": "café"}]
@@ -0,0 +1,116 @@
+"""
+Tests for per-skill leaderboards and percentile ranks
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session as DBSession, SQLModel
+
+from app.db import engine
+from app.leaderboard import verify_score_histogram
+from app.main import app
+from app.models import Session as SessionModel
+from app.rollups import apply_session, rebuild_rollups
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def _user(name):
+    return client.post("/users", json={"username": name}).json()["id"]
+
+
+def _session(user_id, score, skill_type="Guitar"):
+    response = client.post("/sessions", json={
+        "user_id": user_id, "skill_type": skill_type, "score": score, "feedback": "x"
+    })
+    assert response.status_code == 201
+
+
+def test_leaderboard_orders_by_best_score():
+    """Top-N uses each user's best score and shares ranks on ties"""
+    alice, bob, carol, dave = (_user(n) for n in ["alice", "bob", "carol", "dave"])
+    _session(alice, 70)
+    _session(alice, 95)
+    _session(bob, 80)
+    _session(carol, 80)
+    _session(dave, 60)
+    _session(dave, 99, skill_type="Yoga")
+
+    response = client.get("/leaderboard/Guitar?limit=3")
+    assert response.status_code == 200
+    assert [(e["username"], e["best_score"], e["rank"]) for e in response.json()] == [
+        ("alice", 95, 1),
+        ("bob", 80, 2),
+        ("carol", 80, 2),
+    ]
+    assert client.get("/leaderboard/Unknown").json() == []
+
+
+def test_user_rank_and_percentile():
+    """A user's rank counts users with a strictly higher best score"""
+    users = [_user(f"player_{i}") for i in range(10)]
+    for i, user_id in enumerate(users):
+        _session(user_id, 10 * (i + 1))  # best scores 10..100
+
+    response = client.get(f"/leaderboard/Guitar/users/{users[8]}")
+    assert response.status_code == 200
+    rank = response.json()
+    assert rank["best_score"] == 90
+    assert rank["rank"] == 2
+    assert rank["total_users"] == 10
+    assert rank["top_percent"] == 20
+    assert rank["percentile"] == 80.0
+
+    # Improving the best score moves the user up without double counting them
+    _session(users[0], 100)
+    rank = client.get(f"/leaderboard/Guitar/users/{users[0]}").json()
+    assert (rank["rank"], rank["total_users"]) == (1, 10)
+
+
+def test_user_rank_without_sessions():
+    """Users with no sessions in the skill get a 404"""
+    user_id = _user("newbie")
+    assert client.get(f"/leaderboard/Guitar/users/{user_id}").status_code == 404
+
+
+def test_batch_insert_updates_histogram():
+    """Batch uploads keep the histogram consistent with the rollups"""
+    user_id = _user("batcher")
+    client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Guitar", "score": score, "feedback": "x"}
+        for score in [40, 90, 60]
+    ])
+    rank = client.get(f"/leaderboard/Guitar/users/{user_id}").json()
+    assert (rank["best_score"], rank["total_users"]) == (90, 1)
+
+    with DBSession(engine) as db:
+        assert verify_score_histogram(db) == []
+
+
+def test_rebuild_repairs_histogram():
+    """Rebuilding the rollups also rebuilds the leaderboard histogram"""
+    user_id = _user("drifter")
+    with DBSession(engine) as db:
+        # Inserted behind the API's back: no rollup or histogram entry yet
+        db.add(SessionModel(user_id=user_id, skill_type="Guitar", score=75, feedback="x"))
+        db.commit()
+        rebuild_rollups(db)
+        assert verify_score_histogram(db) == []
+
+        session = SessionModel(user_id=user_id, skill_type="Guitar", score=85, feedback="x")
+        db.add(session)
+        apply_session(db, session)
+        db.commit()
+        assert verify_score_histogram(db) == []
+
+    rank = client.get(f"/leaderboard/Guitar/users/{user_id}").json()
+    assert (rank["best_score"], rank["total_users"]) == (85, 1)
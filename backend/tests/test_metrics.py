@@ -0,0 +1,106 @@
+"""
+Tests for request metrics and the Prometheus endpoint
+"""
+
+import re
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app.db import engine
+from app.main import app
+from app.metrics import REGISTRY, Counter, Histogram, render_metrics, reset_metrics
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database and metrics before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    reset_metrics()
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def _value(text: str, series: str) -> float:
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{series} not found"
+    return float(match.group(1))
+
+
+def test_metrics_endpoint_reports_requests_by_route_template():
+    user_id = client.post("/users", json={"username": "metrics_user"}).json()["id"]
+    for score in (40, 50, 60):
+        client.post("/sessions", json={"user_id": user_id, "skill_type": "Yoga", "score": score, "feedback": "ok"})
+    client.get(f"/sessions?user_id={user_id}")
+    client.get("/sessions/999999")
+    client.get("/no-such-path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    assert _value(text, 'nanosensei_http_requests_total{method="POST",route="/sessions",status="201"}') == 3
+    assert _value(text, 'nanosensei_http_requests_total{method="GET",route="/sessions/{session_id}",status="404"}') == 1
+    assert _value(text, 'nanosensei_http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert _value(text, 'nanosensei_http_request_duration_seconds_count{method="GET",route="/sessions"}') == 1
+    assert _value(text, 'nanosensei_http_response_size_bytes_sum{method="GET",route="/sessions"}') > 0
+
+
+def test_sql_work_is_attributed_to_the_request():
+    """Queries and fetched rows run on the threadpool but count towards their request"""
+    user_id = client.post("/users", json={"username": "sql_user"}).json()["id"]
+    for score in (40, 50, 60):
+        client.post("/sessions", json={"user_id": user_id, "skill_type": "Yoga", "score": score, "feedback": "ok"})
+    reset_metrics()
+
+    client.get(f"/sessions?user_id={user_id}")
+    text = render_metrics()
+
+    labels = '{method="GET",route="/sessions"}'
+    assert _value(text, f"nanosensei_request_db_queries_sum{labels}") >= 1
+    assert _value(text, f"nanosensei_request_db_rows_sum{labels}") >= 3
+    assert _value(text, f"nanosensei_request_db_seconds_sum{labels}") > 0
+    assert _value(text, f"nanosensei_threadpool_wait_seconds_count{labels}") == 1
+    assert _value(text, "nanosensei_db_queries_total") >= _value(text, f"nanosensei_request_db_queries_sum{labels}")
+
+
+def test_counters_from_many_threads_are_summed():
+    """Each thread writes its own shard; counts survive the threads exiting"""
+    counter = Counter("test_thread_total", "test", ("worker",))
+    try:
+        def work():
+            for _ in range(1000):
+                counter.inc(("all",))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert _value(render_metrics(), 'test_thread_total{worker="all"}') == 8000
+        assert _value(render_metrics(), 'test_thread_total{worker="all"}') == 8000
+    finally:
+        REGISTRY.remove(counter)
+
+
+def test_histogram_buckets_are_cumulative():
+    """A value equal to a bound falls into that bucket (le = less than or equal)"""
+    histogram = Histogram("test_sizes", "test", ("kind",), buckets=(1, 10))
+    try:
+        for value in (1, 5, 10, 50):
+            histogram.observe(("x",), value)
+        text = render_metrics()
+        assert _value(text, 'test_sizes_bucket{kind="x",le="1"}') == 1
+        assert _value(text, 'test_sizes_bucket{kind="x",le="10"}') == 3
+        assert _value(text, 'test_sizes_bucket{kind="x",le="+Inf"}') == 4
+        assert _value(text, 'test_sizes_sum{kind="x"}') == 66
+        assert _value(text, 'test_sizes_count{kind="x"}') == 4
+    finally:
+        REGISTRY.remove(histogram)
@@ -0,0 +1,147 @@
+"""
+Tests for the versioned migration runner
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_mock_engine
+from sqlmodel import Session as DBSession, create_engine, select
+
+from app.leaderboard import verify_score_histogram
+from app.migrations import (
+    LATEST_VERSION,
+    MIGRATIONS,
+    MigrationContext,
+    SchemaVersionError,
+    current_version,
+    pending,
+    upgrade,
+    verify,
+)
+from app.migrations import runner
+from app.models import SkillRollup
+from app.rollups import verify_rollups
+
+# The session and user tables as the first release created them
+LEGACY_SCHEMA = [
+    """CREATE TABLE user (
+        id INTEGER PRIMARY KEY, username VARCHAR NOT NULL, email VARCHAR, created_at DATETIME NOT NULL
+    )""",
+    "CREATE UNIQUE INDEX ix_user_username ON user (username)",
+    """CREATE TABLE session (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES user (id), skill_type VARCHAR NOT NULL,
+        score INTEGER NOT NULL, feedback VARCHAR NOT NULL, timestamp DATETIME NOT NULL, metadata VARCHAR
+    )""",
+    "CREATE INDEX ix_session_user_id ON session (user_id)",
+    "CREATE INDEX ix_session_skill_type ON session (skill_type)",
+    "CREATE INDEX ix_session_timestamp ON session (timestamp)",
+]
+
+
+def _indexes(engine) -> set[str]:
+    with engine.connect() as connection:
+        return {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A pre-migration database holding a few users and sessions"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+        for user_id in (1, 2, 3):
+            connection.exec_driver_sql(
+                "INSERT INTO user (id, username, created_at) VALUES (?, ?, ?)",
+                (user_id, f"user{user_id}", datetime(2024, 1, 1)),
+            )
+        for i in range(10):
+            connection.exec_driver_sql(
+                "INSERT INTO session (user_id, skill_type, score, feedback, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (i % 3 + 1, ["Yoga", "Guitar"][i % 2], 50 + i, f"Straighten your posture {i}", datetime(2024, 1, 2, i)),
+            )
+    return engine
+
+
+def test_upgrade_fresh_database(tmp_path):
+    """An empty database reaches the latest version, and a second upgrade does nothing"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert current_version(engine) == 0
+
+    assert upgrade(engine) == list(range(1, LATEST_VERSION + 1))
+    assert current_version(engine) == LATEST_VERSION
+    assert pending(engine) == []
+    assert upgrade(engine) == []
+    verify(engine)
+
+
+def test_upgrade_legacy_database_backfills_in_batches(legacy_engine):
+    """Rollups, leaderboard and search index are filled and the old indexes replaced"""
+    upgrade(legacy_engine, batch_size=2)
+
+    assert current_version(legacy_engine) == LATEST_VERSION
+    with DBSession(legacy_engine) as db:
+        assert len(db.exec(select(SkillRollup)).all()) == 6
+        assert verify_rollups(db) == []
+        assert verify_score_histogram(db) == []
+    with legacy_engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM session_fts WHERE session_fts MATCH 'posture'").scalar() == 10
+
+    indexes = _indexes(legacy_engine)
+    assert "ix_session_user_id_skill_type_timestamp_id" in indexes
+    assert "ix_session_meta_model_version" in indexes
+    assert not {"ix_session_user_id", "ix_session_skill_type", "ix_session_timestamp"} & indexes
+
+
+def test_upgrade_stops_at_target(legacy_engine):
+    """A target version leaves later migrations pending"""
+    assert upgrade(legacy_engine, target=2) == [1, 2]
+    assert current_version(legacy_engine) == 2
+    assert [m.version for m in pending(legacy_engine)] == list(range(3, LATEST_VERSION + 1))
+    assert "ix_session_user_id" in _indexes(legacy_engine)
+
+
+def test_verify_rejects_mismatched_versions(legacy_engine):
+    """Startup verification fails for a database behind or ahead of this build"""
+    with pytest.raises(SchemaVersionError, match="python -m app.migrations upgrade"):
+        verify(legacy_engine)
+
+    upgrade(legacy_engine)
+    verify(legacy_engine)
+
+    with legacy_engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO schema_version (version, name, applied_at) VALUES (?, 'future', ?)",
+            (LATEST_VERSION + 1, datetime(2030, 1, 1)),
+        )
+    with pytest.raises(SchemaVersionError, match="newer"):
+        verify(legacy_engine)
+
+
+def test_row_ranges_split_by_row_count(legacy_engine):
+    """Backfill ranges hold about batch_size rows, and a heavy user gets a range of its own"""
+    with legacy_engine.begin() as connection:
+        for i in range(7):
+            connection.exec_driver_sql(
+                "INSERT INTO session (user_id, skill_type, score, feedback, timestamp) VALUES (2, 'Yoga', 70, 'x', ?)",
+                (datetime(2024, 2, 1, i),),
+            )
+    ranges = list(MigrationContext(legacy_engine, batch_size=4).row_ranges("session", "user_id"))
+    assert ranges == [(1, 2), (2, 3), (3, 4)]
+    assert list(MigrationContext(legacy_engine, batch_size=100).row_ranges("session", "user_id")) == [(1, 4)]
+
+
+def test_recording_an_applied_version_twice_is_harmless(tmp_path):
+    """A concurrent runner that applied the same migration does not fail the upgrade"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    upgrade(engine, target=1)
+    runner._record(engine, MIGRATIONS[0])
+    assert current_version(engine) == 1
+
+
+def test_upgrade_refuses_other_dialects():
+    """The migrations are SQLite SQL, so they are not attempted elsewhere"""
+    engine = create_mock_engine("postgresql://", lambda *args, **kwargs: None)
+    with pytest.raises(ValueError, match="written for SQLite"):
+        upgrade(engine)
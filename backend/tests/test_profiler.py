@@ -0,0 +1,130 @@
+"""
+Tests for the admin-only sampling profiler
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiler
+from app.profiler import SamplingProfiler, endpoint_codes
+
+
+def spin(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(profiler.router)
+
+    @app.get("/busy")
+    def busy():
+        spin(0.6)
+        return {"ok": True}
+
+    return app
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "secret")
+    return "secret"
+
+
+def test_samples_are_attributed_to_the_running_route():
+    app = make_app()
+    client = TestClient(app)
+    sampler = SamplingProfiler(endpoint_codes(app), interval=0.005)
+    request = threading.Thread(target=client.get, args=("/busy",))
+    request.start()
+    sampler.run(0.4)
+    request.join()
+
+    routes = sampler.route_samples()
+    assert routes.get("/busy", 0) > 10
+    lines = sampler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("route /busy;")]
+    assert busy and all("spin (tests/test_profiler.py:" in line for line in busy)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_idle_threads_are_not_sampled():
+    waiting = threading.Event()
+    idle = threading.Thread(target=waiting.wait, name="idle-waiter")
+    idle.start()
+    try:
+        sampler = SamplingProfiler({}, interval=0.005).run(0.05)
+    finally:
+        waiting.set()
+        idle.join()
+    assert sampler.samples > 0
+    assert not any(thread == "idle-waiter" for _, thread, _ in sampler.stacks)
+
+
+def test_sampling_overhead_stays_within_budget():
+    sampler = SamplingProfiler({}, interval=0.0001, max_overhead=0.05).run(0.3)
+    # One sample's cost stretches the pause; allow for timer granularity
+    assert sampler.overhead < 0.1
+
+
+def test_speedscope_has_one_profile_per_route():
+    app = make_app()
+    client = TestClient(app)
+    sampler = SamplingProfiler(endpoint_codes(app), interval=0.005)
+    request = threading.Thread(target=client.get, args=("/busy",))
+    request.start()
+    sampler.run(0.3)
+    request.join()
+
+    document = json.loads(json.dumps(sampler.speedscope()))
+    names = {p["name"] for p in document["profiles"]}
+    assert "route /busy" in names
+    frame_count = len(document["shared"]["frames"])
+    for p in document["profiles"]:
+        assert p["type"] == "sampled" and len(p["samples"]) == len(p["weights"])
+        assert all(0 <= index < frame_count for sample in p["samples"] for index in sample)
+
+
+def test_endpoint_requires_admin_token(admin_token):
+    client = TestClient(make_app())
+    assert client.post("/debug/profile?seconds=0.05").status_code == 401
+    assert client.post("/debug/profile?seconds=0.05", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.post("/debug/profile?seconds=600", headers={"X-Admin-Token": admin_token}).status_code == 422
+
+
+def test_endpoint_is_closed_without_configured_token(monkeypatch):
+    monkeypatch.setattr(profiler, "ADMIN_TOKEN", "")
+    client = TestClient(make_app())
+    assert client.post("/debug/profile?seconds=0.05", headers={"X-Admin-Token": ""}).status_code == 401
+
+
+def test_endpoint_returns_collapsed_and_speedscope(admin_token):
+    client = TestClient(make_app())
+    headers = {"X-Admin-Token": admin_token}
+    response = client.post("/debug/profile?seconds=0.1&interval_ms=5", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 0
+
+    response = client.post("/debug/profile?seconds=0.1&format=speedscope", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["exporter"] == "nanosensei"
+
+
+def test_only_one_profile_runs_at_a_time(admin_token):
+    client = TestClient(make_app())
+    headers = {"X-Admin-Token": admin_token}
+    first = threading.Thread(target=client.post, args=("/debug/profile?seconds=0.5",), kwargs={"headers": headers})
+    first.start()
+    try:
+        time.sleep(0.15)
+        assert client.post("/debug/profile?seconds=0.05", headers=headers).status_code == 409
+    finally:
+        first.join()
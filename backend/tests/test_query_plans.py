@@ -0,0 +1,55 @@
+"""
+Tests for the query plan advisor
+"""
+
+from sqlmodel import SQLModel, create_engine
+
+from app.migrations import MigrationContext, m0006_composite_indexes
+from app.query_plans import analyze_routes, check_plan, find_problems
+
+
+def test_find_problems():
+    """Unindexed scans and temp B-trees are flagged, index scans are not"""
+    assert find_problems(["SCAN session"]) == ["SCAN session"]
+    assert find_problems(["USE TEMP B-TREE FOR ORDER BY"]) == ["USE TEMP B-TREE FOR ORDER BY"]
+    assert find_problems([
+        "SCAN session USING INDEX ix_session_timestamp_id",
+        "SCAN skill_rollup USING COVERING INDEX ix_skill_rollup_skill_type_max_score_user_id",
+        "SCAN session_fts VIRTUAL TABLE INDEX 0:M2",
+        "SEARCH session USING INDEX ix_session_user_id_skill_type_timestamp_id (user_id=? AND skill_type=?)",
+    ]) == []
+
+
+def test_every_route_query_uses_an_index():
+    """No query issued by the read routes scans a table or sorts without an allowlisted reason"""
+    results = analyze_routes()
+    assert len(results) > 10
+    unindexed = [r.statement for r in results if r.problems]
+    assert unindexed == []
+
+
+def test_allowlist_only_excuses_its_own_plan_steps():
+    """An allowlisted statement still fails on any problem besides the steps it permits"""
+    statement = "SELECT date(session.timestamp) AS bucket FROM session GROUP BY date(session.timestamp) ORDER BY bucket"
+    ok = check_plan(statement, (), ["USE TEMP B-TREE FOR GROUP BY"])
+    assert ok.problems == [] and ok.allowed == ["USE TEMP B-TREE FOR GROUP BY"]
+    
+    bad = check_plan(statement, (), ["SCAN session", "USE TEMP B-TREE FOR GROUP BY", "USE TEMP B-TREE FOR ORDER BY"])
+    assert bad.problems == ["SCAN session", "USE TEMP B-TREE FOR ORDER BY"]
+
+
+def test_index_migration_upgrades_existing_database(tmp_path):
+    """Declared indexes missing from an existing database are created and retired ones dropped"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_session_user_id_skill_type_timestamp_id")
+        connection.exec_driver_sql("CREATE INDEX ix_session_user_id ON session (user_id)")
+
+    m0006_composite_indexes.upgrade(MigrationContext(engine))
+
+    with engine.connect() as connection:
+        indexes = {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "ix_session_user_id_skill_type_timestamp_id" in indexes
+    assert "ix_session_user_id" not in indexes
+    assert "ix_session_user_id" in m0006_composite_indexes.RETIRED_INDEXES
@@ -0,0 +1,147 @@
+"""
+Tests for read-replica routing, with SQLite file copies standing in for replicas
+"""
+
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app import db
+from app.api import routes_sessions, routes_users
+from app.cache_backends import get_summary_cache, summary_key
+from app.db import engine, make_engine
+from app.replicas import CONSISTENCY_HEADER, ConsistencyMiddleware, ReplicaRouter, issue_token, parse_token
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+class ReplicaSet:
+    """Replica files copied from the primary on demand, installed as the app's read router"""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.engines = [make_engine(f"sqlite:///{path}") for path in paths]
+        self.router = ReplicaRouter(engine, self.engines)
+
+    def sync(self):
+        """Bring every replica up to date with the primary (a completed replication cycle)"""
+        for path, replica in zip(self.paths, self.engines):
+            replica.dispose()
+            with engine.connect() as connection, sqlite3.connect(path) as target:
+                connection.connection.dbapi_connection.backup(target)
+
+
+@pytest.fixture
+def replicas(tmp_path, monkeypatch):
+    replica_set = ReplicaSet([tmp_path / "replica-1.db", tmp_path / "replica-2.db"])
+    replica_set.sync()
+    monkeypatch.setattr(db, "read_router", replica_set.router)
+    yield replica_set
+    for replica in replica_set.engines:
+        replica.dispose()
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(ConsistencyMiddleware)
+    app.include_router(routes_users.router, prefix="/users")
+    app.include_router(routes_sessions.router, prefix="/sessions")
+    return TestClient(app)
+
+
+def test_reads_go_to_replicas_until_they_catch_up(replicas, client):
+    client.post("/users", json={"username": "replicated"})
+    # Neither replica has the user yet (the list is never served from the user cache)
+    assert client.get("/users").json() == []
+    assert client.get("/users").json() == []
+
+    replicas.sync()
+    assert [u["username"] for u in client.get("/users").json()] == ["replicated"]
+
+
+def test_consistency_token_reads_own_writes(replicas, client):
+    response = client.post("/users", json={"username": "writer"})
+    user_id = response.json()["id"]
+    assert response.headers[CONSISTENCY_HEADER] == f"{user_id}:1"
+
+    response = client.post("/sessions", json={"user_id": user_id, "skill_type": "Yoga", "score": 80, "feedback": "ok"})
+    assert response.status_code == 201
+    assert response.headers[CONSISTENCY_HEADER] == f"{user_id}:2"
+    headers = {CONSISTENCY_HEADER: response.headers[CONSISTENCY_HEADER]}
+    assert client.get(f"/users/{user_id}", headers=headers).status_code == 200
+    sessions = client.get("/sessions", params={"user_id": user_id}, headers=headers).json()
+    assert [s["score"] for s in sessions] == [80]
+    summary = client.get("/sessions/summary", params={"user_id": user_id}, headers=headers).json()
+    assert summary["total_sessions"] == 1
+
+
+def test_token_is_honoured_however_long_replication_takes(replicas, client):
+    """Routing follows the replica's data, not a time window"""
+    user_id = client.post("/users", json={"username": "patient"}).json()["id"]
+    replicas.sync()
+    response = client.post("/sessions", json={"user_id": user_id, "skill_type": "Yoga", "score": 70, "feedback": "ok"})
+    token = response.headers[CONSISTENCY_HEADER]
+
+    assert replicas.router.engine_for_read(token) is engine
+    assert replicas.router.engine_for_read() is not engine
+    replicas.sync()
+    assert replicas.router.engine_for_read(token) in replicas.engines
+
+
+def test_batch_token_names_every_written_user(replicas, client):
+    first = client.post("/users", json={"username": "first"}).json()["id"]
+    second = client.post("/users", json={"username": "second"}).json()["id"]
+    item = {"skill_type": "Yoga", "score": 60, "feedback": "ok"}
+    response = client.post("/sessions/batch", json=[{**item, "user_id": first}, {**item, "user_id": second},
+                                                   {**item, "user_id": first}])
+    assert parse_token(response.headers[CONSISTENCY_HEADER]) == {first: 2, second: 2}
+
+
+def test_only_successful_writes_get_a_token(replicas, client):
+    client.post("/users", json={"username": "taken"})
+    assert CONSISTENCY_HEADER not in client.post("/users", json={"username": "taken"}).headers
+    assert CONSISTENCY_HEADER not in client.get("/sessions").headers
+
+
+def test_replica_summaries_are_cached_under_the_replica_version(replicas, client):
+    user_id = client.post("/users", json={"username": "summarised"}).json()["id"]
+    session = {"user_id": user_id, "skill_type": "Yoga", "score": 80, "feedback": "ok"}
+    client.post("/sessions", json=session)
+    replicas.sync()
+    response = client.post("/sessions", json=session)
+
+    # The lagging replica is at version 2; its summary cannot land under the primary's version 3
+    assert client.get("/sessions/summary", params={"user_id": user_id}).json()["total_sessions"] == 1
+    assert get_summary_cache().get(summary_key(user_id, 2)) is not None
+    assert get_summary_cache().get(summary_key(user_id, 3)) is None
+
+    headers = {CONSISTENCY_HEADER: response.headers[CONSISTENCY_HEADER]}
+    assert client.get("/sessions/summary", params={"user_id": user_id}, headers=headers).json()["total_sessions"] == 2
+    assert get_summary_cache().get(summary_key(user_id, 3)) is not None
+
+
+def test_router_round_robin_and_unreachable_tokens(replicas):
+    router = replicas.router
+    first, second = replicas.engines
+    assert [router.engine_for_read() for _ in range(4)] == [first, second, first, second]
+    # Versions the primary has not reached either, and malformed tokens, cannot pin a client to the primary
+    assert router.engine_for_read(issue_token({1: 99})) is not engine
+    assert router.engine_for_read("not-a-token") is not engine
+    assert ReplicaRouter(engine, []).engine_for_read() is engine
+
+
+def test_token_round_trip():
+    assert issue_token({40: 3, 12: 7}) == "12:7,40:3"
+    assert parse_token(issue_token({12: 7, 40: 3})) == {12: 7, 40: 3}
+    assert parse_token(None) == {} and parse_token("") == {} and parse_token("12") == {}
@@ -0,0 +1,90 @@
+"""
+Unit tests for per-user/per-skill session rollups
+"""
+
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from app.conditional import get_user_version
+from app.models import Session as SessionModel, SkillRollup
+from app.rollups import apply_session, apply_sessions, rebuild_rollups, verify_rollups
+
+
+def _add_session(db_session, user_id, skill_type, score, timestamp=None, rollup=True):
+    """Insert a session, optionally folding it into the rollups"""
+    session = SessionModel(
+        user_id=user_id,
+        skill_type=skill_type,
+        score=score,
+        feedback="Test",
+        timestamp=timestamp or datetime.utcnow()
+    )
+    db_session.add(session)
+    if rollup:
+        apply_session(db_session, session)
+    db_session.commit()
+    return session
+
+
+def test_apply_session_creates_and_updates_rollup(db_session, sample_user):
+    """Test rollup row is created on first session and accumulated afterwards"""
+    earlier = datetime.utcnow() - timedelta(days=1)
+    _add_session(db_session, sample_user.id, "Drawing", 80)
+    _add_session(db_session, sample_user.id, "Drawing", 60, timestamp=earlier)
+    _add_session(db_session, sample_user.id, "Drawing", 95)
+
+    rollup = db_session.get(SkillRollup, (sample_user.id, "Drawing"))
+    db_session.refresh(rollup)
+    assert rollup.session_count == 3
+    assert rollup.score_sum == 235
+    assert rollup.min_score == 60
+    assert rollup.max_score == 95
+    assert rollup.last_timestamp > earlier
+
+
+def test_apply_sessions_batch_groups_by_skill(db_session, sample_user):
+    """Test a batch of sessions produces one rollup row per skill"""
+    sessions = [
+        SessionModel(user_id=sample_user.id, skill_type=skill, score=score, feedback="Test")
+        for skill, score in [("Drawing", 70), ("Yoga", 90), ("Drawing", 80)]
+    ]
+    db_session.add_all(sessions)
+    apply_sessions(db_session, sessions)
+    db_session.commit()
+
+    rollups = {r.skill_type: r for r in db_session.exec(select(SkillRollup)).all()}
+    assert rollups["Drawing"].session_count == 2
+    assert rollups["Drawing"].score_sum == 150
+    assert rollups["Yoga"].session_count == 1
+    assert verify_rollups(db_session) == []
+
+
+def test_verify_rollups_detects_drift(db_session, sample_user):
+    """Test sessions inserted without a rollup update are reported as drift"""
+    _add_session(db_session, sample_user.id, "Drawing", 80)
+    _add_session(db_session, sample_user.id, "Drawing", 90, rollup=False)
+    _add_session(db_session, sample_user.id, "Yoga", 70, rollup=False)
+
+    drift = verify_rollups(db_session)
+    assert {(d["user_id"], d["skill_type"]) for d in drift} == {
+        (sample_user.id, "Drawing"),
+        (sample_user.id, "Yoga"),
+    }
+
+
+def test_rebuild_rollups_repairs_drift(db_session, sample_user):
+    """Test rebuilding recomputes rollups from the Session table"""
+    _add_session(db_session, sample_user.id, "Drawing", 80, rollup=False)
+    _add_session(db_session, sample_user.id, "Yoga", 70, rollup=False)
+
+    assert rebuild_rollups(db_session) == 2
+    assert verify_rollups(db_session) == []
+    # The repaired user's ETags and cached summaries are invalidated; a clean rebuild changes nothing
+    assert get_user_version(db_session, sample_user.id)[0] == 1
+    rebuild_rollups(db_session)
+    assert get_user_version(db_session, sample_user.id)[0] == 1
+
+    rollup = db_session.get(SkillRollup, (sample_user.id, "Yoga"))
+    assert rollup.session_count == 1
+    assert rollup.min_score == rollup.max_score == 70
@@ -0,0 +1,98 @@
+"""
+Tests for full-text session search
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app.db import engine
+from app.main import app
+from app.migrations import MigrationContext, m0005_session_fts
+from app.search import FTS_TABLE, match_expression, search_index_exists
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+def _seed():
+    alice = client.post("/users", json={"username": "alice"}).json()["id"]
+    bob = client.post("/users", json={"username": "bob"}).json()["id"]
+    client.post("/sessions", json={
+        "user_id": alice, "skill_type": "Guitar", "score": 70, "feedback": "Relax your wrist angle"
+    })
+    client.post("/sessions/batch", json=[
+        {"user_id": alice, "skill_type": "Yoga", "score": 80, "feedback": "Great posture, posture, posture"},
+        {"user_id": bob, "skill_type": "Yoga", "score": 60, "feedback": "Check your posture"},
+        {"user_id": bob, "skill_type": "Drawing", "score": 90, "feedback": "Clean lines",
+         "metadata": '{"tool": "charcoal"}'},
+    ])
+    return alice, bob
+
+
+def test_search_ranks_and_highlights():
+    """Best matches come first, with matched words highlighted"""
+    _seed()
+    response = client.get("/sessions/search?q=posture")
+    assert response.status_code == 200
+    hits = response.json()
+    assert [h["session"]["feedback"] for h in hits] == [
+        "Great posture, posture, posture",
+        "Check your posture",
+    ]
+    assert hits[0]["rank"] <= hits[1]["rank"]
+    assert "[posture]" in hits[1]["snippet"]
+
+
+def test_search_stems_and_filters():
+    """Words are stemmed, metadata is searchable, and user/skill filters apply"""
+    alice, bob = _seed()
+    assert len(client.get("/sessions/search?q=angles").json()) == 1
+    assert client.get("/sessions/search?q=charcoal").json()[0]["session"]["user_id"] == bob
+    assert len(client.get(f"/sessions/search?q=posture&user_id={bob}").json()) == 1
+    assert client.get("/sessions/search?q=posture&skill_type=Guitar").json() == []
+
+
+def test_search_pagination():
+    """Pages follow the X-Next-Cursor header without repeats"""
+    user_id = client.post("/users", json={"username": "pager"}).json()["id"]
+    client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Yoga", "score": 50, "feedback": f"posture drill {i}"}
+        for i in range(5)
+    ])
+
+    seen = []
+    url = "/sessions/search?q=posture&limit=2"
+    while url:
+        response = client.get(url)
+        seen += [h["session"]["id"] for h in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/sessions/search?q=posture&limit=2&cursor={cursor}" if cursor else None
+    assert sorted(seen) == sorted(set(seen)) and len(seen) == 5
+
+
+def test_search_rejects_queries_without_words():
+    """FTS syntax characters alone are rejected instead of raising a syntax error"""
+    assert client.get('/sessions/search?q="(*').status_code == 400
+    assert match_expression('wrist "angle') == '"wrist" "angle"'
+
+
+def test_search_migration_backfills_existing_database():
+    """A database created before the index gets it created and filled in batches"""
+    _seed()
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP TABLE {FTS_TABLE}")
+        assert not search_index_exists(connection)
+
+    m0005_session_fts.upgrade(MigrationContext(engine, batch_size=1))
+    m0005_session_fts.upgrade(MigrationContext(engine, batch_size=1))  # re-running indexes nothing twice
+
+    assert len(client.get("/sessions/search?q=posture").json()) == 2
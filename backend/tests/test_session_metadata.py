@@ -0,0 +1,124 @@
+"""
+Tests for validated, indexed session metadata
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, select
+
+from app.db import engine
+from app.main import app
+from app.models import Session
+from app.session_metadata import metadata_condition, metadata_index_name, sync_metadata_indexes
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def user_id():
+    return client.post("/users", json={"username": "meta_user"}).json()["id"]
+
+
+def _session(user_id, metadata):
+    return client.post("/sessions", json={
+        "user_id": user_id, "skill_type": "Yoga", "score": 80, "feedback": "x", "metadata": metadata
+    })
+
+
+def test_metadata_must_be_json_object(user_id):
+    """Invalid JSON and non-object JSON are rejected on ingest"""
+    assert _session(user_id, '{"model_version": "1.2.0"}').status_code == 201
+    assert _session(user_id, None).status_code == 201
+    assert _session(user_id, "not json").status_code == 422
+    assert _session(user_id, "[1, 2]").status_code == 422
+
+    response = client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Yoga", "score": 80, "feedback": "x", "metadata": "42"}
+    ])
+    assert [r["status_code"] for r in response.json()["results"]] == [422]
+
+
+def test_metadata_object_is_stored_as_json_text(user_id):
+    """A metadata object in the request body is stored as JSON text"""
+    response = _session(user_id, {"device_model": "Pixel 8"})
+    assert response.status_code == 201
+    assert response.json()["metadata"] == '{"device_model": "Pixel 8"}'
+
+
+def test_filter_sessions_by_metadata(user_id):
+    """meta=key:value filters match strings and numbers, and combine with AND"""
+    _session(user_id, '{"model_version": "1.2.0", "inference_ms": 35, "device_model": "Pixel 8"}')
+    _session(user_id, '{"model_version": "1.2.0", "inference_ms": 50}')
+    _session(user_id, '{"model_version": "1.3.0", "inference_ms": 35}')
+    _session(user_id, None)
+
+    def count(query):
+        response = client.get(f"/sessions?{query}")
+        assert response.status_code == 200
+        return len(response.json())
+
+    assert count("meta=model_version:1.2.0") == 2
+    assert count("meta=inference_ms:35") == 2
+    assert count("meta=model_version:1.2.0&meta=inference_ms:35") == 1
+    assert count(f"user_id={user_id}&meta=device_model:Pixel 8") == 1
+    assert count("meta=model_version:9.9.9") == 0
+
+
+def test_filter_numeric_looking_metadata_strings(user_id):
+    """Unquoted numbers match numbers and strings alike; a quoted value matches strings only"""
+    _session(user_id, '{"model_version": "2", "inference_ms": 2}')
+    _session(user_id, '{"model_version": 2}')
+    _session(user_id, '{"model_version": "2.0", "inference_ms": "true"}')
+
+    def count(query):
+        response = client.get(f"/sessions?{query}")
+        assert response.status_code == 200
+        return len(response.json())
+
+    assert count("meta=model_version:2") == 2
+    assert count('meta=model_version:"2"') == 1
+    assert count("meta=model_version:2.0") == 2
+    assert count("meta=inference_ms:2") == 1
+    assert count("meta=inference_ms:true") == 1
+    assert count("meta=model_version:2&meta=inference_ms:2") == 1
+
+
+def test_metadata_filter_validation():
+    """Only configured keys in key:value form may be filtered on"""
+    assert client.get("/sessions?meta=secret_key:1").status_code == 400
+    assert client.get("/sessions?meta=model_version").status_code == 400
+
+
+def test_metadata_filter_uses_index():
+    """The filter expression matches the expression index exactly"""
+    query = (
+        select(Session)
+        .where(metadata_condition("model_version", "1.2.0"))
+        .order_by(Session.timestamp.desc(), Session.id.desc())
+    )
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        plan = " ".join(row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+    assert metadata_index_name("model_version") in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_sync_metadata_indexes_follows_configuration():
+    """Indexes for keys no longer configured are dropped, new keys are indexed"""
+    with engine.begin() as connection:
+        assert sync_metadata_indexes(connection, ["app_build"]) == ["ix_session_meta_app_build"]
+        names = {
+            row[0] for row in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_session_meta_%'"
+            )
+        }
+    assert names == {"ix_session_meta_app_build"}
@@ -0,0 +1,134 @@
+"""
+Tests for group-committed and write-behind session inserts
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session as DBSession, select
+
+from app.db import engine
+from app.main import app
+from app.models import Session as SessionModel
+from app.rollups import verify_rollups
+from app.session_writer import SessionWriter, start_session_writer, stop_session_writer
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    stop_session_writer()
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def test_user():
+    """Create a test user for session tests"""
+    return client.post("/users", json={"username": "writer_user"}).json()
+
+
+def test_writer_group_commits_concurrent_submissions(test_user):
+    """Test concurrent submissions share commits and all become durable"""
+    writer = SessionWriter(engine, max_batch=50, max_delay_ms=20)
+    writer.start()
+    try:
+        def submit(i):
+            return writer.submit(SessionModel(
+                user_id=test_user["id"], skill_type="Drawing", score=i % 101, feedback="Burst"
+            ))
+        
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            ids = list(pool.map(submit, range(200)))
+    finally:
+        writer.stop()
+    
+    assert len(set(ids)) == 200
+    assert writer.rows == 200
+    assert writer.commits < 200
+    with DBSession(engine) as db:
+        assert len(db.exec(select(SessionModel.id)).all()) == 200
+        assert verify_rollups(db) == []
+
+
+def test_writer_propagates_commit_errors(test_user):
+    """Test a failed batch raises in every submitting caller"""
+    writer = SessionWriter(engine, max_delay_ms=1)
+    writer.start()
+    try:
+        SQLModel.metadata.drop_all(engine)
+        with pytest.raises(Exception):
+            writer.submit(SessionModel(
+                user_id=test_user["id"], skill_type="Drawing", score=50, feedback="Lost"
+            ))
+    finally:
+        writer.stop()
+
+
+def test_writer_isolates_a_bad_row(test_user):
+    """Test one failing row only fails its own caller, not its whole batch"""
+    writer = SessionWriter(engine, max_batch=50, max_delay_ms=200)
+    writer.start()
+    try:
+        def submit(i):
+            # skill_type is NOT NULL, so row 5 violates a constraint
+            return writer.submit(SessionModel(
+                user_id=test_user["id"], skill_type=None if i == 5 else "Drawing", score=50, feedback="Mixed"
+            ))
+        
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            futures = [pool.submit(submit, i) for i in range(10)]
+        errors = [i for i, f in enumerate(futures) if f.exception() is not None]
+    finally:
+        writer.stop()
+    
+    assert errors == [5]
+    with DBSession(engine) as db:
+        assert len(db.exec(select(SessionModel.id)).all()) == 9
+        assert verify_rollups(db) == []
+
+
+def test_writer_requires_start():
+    """Test submitting to a stopped writer fails fast"""
+    writer = SessionWriter(engine)
+    with pytest.raises(RuntimeError):
+        writer.submit(SessionModel(user_id=1, skill_type="Drawing", score=50, feedback="x"))
+    
+    writer.start()
+    writer.stop()
+    with pytest.raises(RuntimeError):
+        writer.submit(SessionModel(user_id=1, skill_type="Drawing", score=50, feedback="x"))
+
+
+def test_create_session_uses_write_behind(test_user):
+    """Test POST /sessions goes through the running writer"""
+    writer = start_session_writer(engine, max_delay_ms=1)
+    
+    response = client.post("/sessions", json={
+        "user_id": test_user["id"],
+        "skill_type": "Yoga",
+        "score": 88,
+        "feedback": "Queued",
+        "metadata": '{"offline": false}'
+    })
+    assert response.status_code == 201
+    data = response.json()
+    assert data["id"] is not None
+    assert data["metadata"] == '{"offline": false}'
+    assert writer.rows == 1
+    
+    stored = client.get(f"/sessions/{data['id']}").json()
+    assert stored["feedback"] == "Queued"
+    summary = client.get(f"/sessions/summary?user_id={test_user['id']}").json()
+    assert summary["total_sessions"] == 1
+    
+    # Validation still happens in the request before anything is queued
+    assert client.post("/sessions", json={
+        "user_id": 99999, "skill_type": "Yoga", "score": 50, "feedback": "x"
+    }).status_code == 404
+    assert writer.rows == 1
@@ -2,6 +2,10 @@
 Comprehensive unit tests for session endpoints
 """
 
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -384,3 +388,201 @@ def test_get_session_summary_missing_user_id():
     response = client.get("/sessions/summary")
     assert response.status_code == 422  # Validation error
 
+
+
+def test_list_sessions_keyset_pagination(test_user):
+    """Test paging through sessions with limit and X-Next-Cursor"""
+    for score in [70, 75, 80, 85, 90]:
+        client.post("/sessions", json={
+            "user_id": test_user["id"],
+            "skill_type": "Drawing",
+            "score": score,
+            "feedback": "Paged"
+        })
+    
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        url = f"/sessions?user_id={test_user['id']}&limit=2"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(s["id"] for s in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    
+    assert pages == 3
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+    # Newest first: ties on timestamp fall back to descending id
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_list_sessions_invalid_cursor(test_user):
+    """Test a malformed cursor is rejected"""
+    response = client.get("/sessions?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert "cursor" in response.json()["detail"].lower()
+
+
+def test_list_sessions_limit_bounds():
+    """Test limit must be within the allowed page size"""
+    assert client.get("/sessions?limit=0").status_code == 422
+    assert client.get("/sessions?limit=100000").status_code == 422
+
+
+def test_export_sessions_ndjson(test_user):
+    """Test NDJSON export streams one JSON object per session in time order"""
+    for score in [60, 70, 80]:
+        client.post("/sessions", json={
+            "user_id": test_user["id"],
+            "skill_type": "Drawing",
+            "score": score,
+            "feedback": "Exported",
+            "metadata": '{"pose": "warrior"}'
+        })
+    
+    response = client.get(f"/sessions/export?user_id={test_user['id']}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["score"] for r in rows] == [60, 70, 80]
+    assert rows[0]["metadata"] == '{"pose": "warrior"}'
+    assert set(rows[0]) == {"id", "user_id", "skill_type", "score", "feedback", "timestamp", "metadata"}
+
+
+def test_export_sessions_csv_with_filters(test_user):
+    """Test CSV export honours skill_type and time-range filters"""
+    client.post("/sessions", json={
+        "user_id": test_user["id"], "skill_type": "Drawing", "score": 80, "feedback": "Draw"
+    })
+    client.post("/sessions", json={
+        "user_id": test_user["id"], "skill_type": "Yoga", "score": 90, "feedback": "Yoga"
+    })
+    
+    response = client.get("/sessions/export?format=csv&skill_type=Yoga&since=2000-01-01T00:00:00")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "user_id", "skill_type", "score", "feedback", "timestamp", "metadata"]
+    assert len(rows) == 2
+    assert rows[1][2] == "Yoga"
+    
+    response = client.get("/sessions/export?until=2000-01-01T00:00:00")
+    assert response.text == ""
+
+
+def test_export_sessions_csv_empty():
+    """Test CSV export of no rows still carries the header"""
+    response = client.get("/sessions/export?format=csv")
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["id,user_id,skill_type,score,feedback,timestamp,metadata"]
+
+
+def test_create_sessions_batch(test_user):
+    """Test batch upload creates valid items and reports failures per item"""
+    response = client.post("/sessions/batch", json=[
+        {"user_id": test_user["id"], "skill_type": "Drawing", "score": 80, "feedback": "One"},
+        {"user_id": 99999, "skill_type": "Drawing", "score": 70, "feedback": "Unknown user"},
+        {"user_id": test_user["id"], "skill_type": "Yoga", "score": 90, "feedback": "Two",
+         "metadata": '{"offline": true}'},
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    
+    results = data["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["status_code"] for r in results] == [201, 404, 201]
+    assert results[1]["id"] is None
+    assert "not found" in results[1]["detail"].lower()
+    
+    created = client.get(f"/sessions/{results[2]['id']}").json()
+    assert created["feedback"] == "Two"
+    assert created["metadata"] == '{"offline": true}'
+    
+    summary = client.get(f"/sessions/summary?user_id={test_user['id']}").json()
+    assert summary["total_sessions"] == 2
+    assert summary["sessions_by_skill"] == {"Drawing": 1, "Yoga": 1}
+
+
+def test_create_sessions_batch_too_large(test_user):
+    """Test batches over the size limit are rejected"""
+    item = {"user_id": test_user["id"], "skill_type": "Drawing", "score": 80, "feedback": "x"}
+    response = client.post("/sessions/batch", json=[item] * 1001)
+    assert response.status_code == 400
+
+
+def test_create_sessions_batch_validates_items(test_user):
+    """Test malformed items fail on their own while the rest of the batch is created"""
+    valid = {"user_id": test_user["id"], "skill_type": "Drawing", "score": 80, "feedback": "ok"}
+    response = client.post("/sessions/batch", json=[
+        {"user_id": test_user["id"]},
+        valid,
+        {**valid, "metadata": "[1, 2]"},
+        "not an object",
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["failed"] == 3
+    
+    results = data["results"]
+    assert [r["status_code"] for r in results] == [422, 201, 422, 422]
+    assert "skill_type" in results[0]["detail"] and "feedback" in results[0]["detail"]
+    assert results[2]["detail"].startswith("metadata:")
+    assert client.get(f"/sessions/{results[1]['id']}").status_code == 200
+    
+    assert client.post("/sessions/batch", json={"not": "a list"}).status_code == 422
+
+
+def test_get_session_trends(test_user):
+    """Test trends endpoint buckets today's sessions into one day"""
+    user_id = test_user["id"]
+    for score in [60, 80, 100]:
+        client.post("/sessions", json={
+            "user_id": user_id, "skill_type": "Guitar", "score": score, "feedback": "Test"
+        })
+
+    response = client.get(f"/sessions/trends?user_id={user_id}&bucket=week")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["bucket"] == "week"
+    assert len(data["buckets"]) == 1
+    bucket = data["buckets"][0]
+    assert bucket["count"] == 3
+    assert bucket["average_score"] == 80.0
+    assert bucket["p50"] == 80
+
+
+def test_get_session_trends_validation(test_user):
+    """Test trends endpoint rejects unknown users, buckets and empty ranges"""
+    assert client.get("/sessions/trends?user_id=99999").status_code == 404
+    assert client.get(f"/sessions/trends?user_id={test_user['id']}&bucket=year").status_code == 422
+    response = client.get(
+        f"/sessions/trends?user_id={test_user['id']}&from=2024-02-01T00:00:00&to=2024-01-01T00:00:00"
+    )
+    assert response.status_code == 400
+
+
+def test_get_session_trends_zoned_bounds(test_user):
+    """Test trends bounds with offsets are converted to UTC, also when only one has a zone"""
+    user_id = test_user["id"]
+    client.post("/sessions", json={"user_id": user_id, "skill_type": "Guitar", "score": 70, "feedback": "Test"})
+
+    response = client.get("/sessions/trends", params={
+        "user_id": user_id, "from": "2024-01-01T00:00:00Z", "to": "2099-01-01T00:00:00",
+    })
+    assert response.status_code == 200
+    assert len(response.json()["buckets"]) == 1
+
+    # Half an hour from now, written at UTC-2: read as UTC it would lie in the past
+    soon = (datetime.now(timezone(timedelta(hours=-2))) + timedelta(minutes=30)).isoformat()
+    response = client.get("/sessions/trends", params={"user_id": user_id, "to": soon})
+    assert response.status_code == 200
+    assert len(response.json()["buckets"]) == 1
@@ -0,0 +1,103 @@
+"""
+Tests for the opt-in SQL diagnostics: statement log, slow-query plans and N+1 detection
+"""
+
+import json
+import logging
+from collections import deque
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session as DBSession, create_engine
+
+from app.api import routes_sessions
+from app.db import get_read_session, get_session
+from app.models import Session, User
+from app.sql_diagnostics import SQLDiagnosticsMiddleware, find_repeated, trace_engine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'diagnostics.db'}")
+    SQLModel.metadata.create_all(engine)
+    trace_engine(engine, enabled=True)
+    with DBSession(engine) as db:
+        db.add_all([User(username=f"user{i}") for i in range(6)])
+        db.commit()
+        db.add(Session(user_id=1, skill_type="Yoga", score=70, feedback="ok"))
+        db.commit()
+    return engine
+
+
+def make_client(engine, reports: deque, slow_ms: float = 10_000, repeat_threshold: int = 5) -> TestClient:
+    app = FastAPI()
+    app.include_router(routes_sessions.router, prefix="/sessions")
+
+    @app.get("/users-one-by-one")
+    def users_one_by_one(db: DBSession = Depends(get_session)):
+        # The N+1 shape: one lookup per id instead of one IN query
+        return [db.get(User, user_id).username for user_id in range(1, 7)]
+
+    def override_get_session():
+        with DBSession(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = app.dependency_overrides[get_read_session] = override_get_session
+    app.add_middleware(SQLDiagnosticsMiddleware, slow_ms=slow_ms, repeat_threshold=repeat_threshold, reports=reports)
+    return TestClient(app)
+
+
+def test_every_statement_is_recorded_per_request(engine):
+    reports = deque()
+    client = make_client(engine, reports)
+
+    assert client.get("/sessions?user_id=1").status_code == 200
+
+    (report,) = reports
+    assert report["route"] == "/sessions"
+    assert report["query"] == "user_id=1"
+    assert report["statement_count"] == len(report["statements"]) >= 1
+    assert all(entry["statement"].lstrip().upper().startswith("SELECT") for entry in report["statements"])
+    assert report["flagged"] is False
+
+
+def test_slow_statements_get_a_query_plan(engine):
+    reports = deque()
+    client = make_client(engine, reports, slow_ms=0)
+
+    client.get("/sessions?user_id=1&skill_type=Yoga")
+
+    (report,) = reports
+    assert report["flagged"] is True
+    plans = [entry["plan"] for entry in report["slow"]]
+    assert any("ix_session_user_id_skill_type_timestamp_id" in " ".join(plan) for plan in plans)
+    assert all("parameters" in entry for entry in report["slow"])
+
+
+def test_repeated_statements_are_flagged_and_logged(engine, caplog):
+    reports = deque()
+    client = make_client(engine, reports)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql_diagnostics"):
+        assert len(client.get("/users-one-by-one").json()) == 6
+
+    (report,) = reports
+    (repeated,) = report["repeated"]
+    assert repeated["count"] == 6
+    assert "FROM user" in repeated["statement"]
+    logged = json.loads(caplog.records[-1].getMessage())
+    assert logged["route"] == "/users-one-by-one" and "statements" not in logged
+
+
+def test_find_repeated_groups_identical_text():
+    statements = [{"statement": "A", "duration_ms": 1.0}] * 3 + [{"statement": "B", "duration_ms": 2.0}]
+    assert find_repeated(statements, threshold=3) == [{"statement": "A", "count": 3, "total_ms": 3.0}]
+    assert find_repeated(statements, threshold=4) == []
+
+
+def test_disabled_mode_installs_no_listeners(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'off.db'}")
+    before = len(engine.dispatch.before_cursor_execute)
+    trace_engine(engine, enabled=False)
+    assert len(engine.dispatch.before_cursor_execute) == before
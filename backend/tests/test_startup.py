@@ -0,0 +1,67 @@
+"""
+Tests for startup timing, the precomputed OpenAPI schema and email validation
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.main import app
+from app.openapi_schema import use_precomputed_schema, write_schema
+from app.schemas import UserCreate
+from app.startup import by_package, parse_importtime
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     sqlalchemy.util
+import time:      3000 |       3120 |   sqlalchemy
+import time:       500 |       3620 | app.db
+"""
+
+
+def test_parse_importtime():
+    """importtime lines become timings with their nesting depth; the header is skipped"""
+    timings = parse_importtime("unrelated\n" + IMPORTTIME_OUTPUT)
+    assert [(t.name, t.self_ms, t.cumulative_ms, t.depth) for t in timings] == [
+        ("sqlalchemy.util", 0.12, 0.12, 2),
+        ("sqlalchemy", 3.0, 3.12, 1),
+        ("app.db", 0.5, 3.62, 0),
+    ]
+    assert by_package(timings) == {"sqlalchemy": 3.12, "app": 0.5}
+
+
+def test_startup_timings_endpoint():
+    """The import phase is recorded when app.main is imported"""
+    response = TestClient(app).get("/health/startup")
+    assert response.status_code == 200
+    assert response.json()["import"] > 0
+
+
+def test_precomputed_schema_is_served(tmp_path):
+    """The schema is read from the file instead of generated from the routes"""
+    path = tmp_path / "openapi.json"
+    write_schema(app, str(path))
+    assert json.loads(path.read_text())["paths"].keys() == app.openapi()["paths"].keys()
+
+    path.write_text(json.dumps({"openapi": "3.1.0", "info": {"title": "precomputed", "version": "1"}, "paths": {}}))
+    other = FastAPI()
+    use_precomputed_schema(other, str(path))
+    assert TestClient(other).get("/openapi.json").json()["info"]["title"] == "precomputed"
+
+
+def test_missing_precomputed_schema_falls_back_to_generating(tmp_path):
+    other = FastAPI(title="generated")
+    use_precomputed_schema(other, str(tmp_path / "missing.json"))
+    assert TestClient(other).get("/openapi.json").json()["info"]["title"] == "generated"
+
+
+def test_user_email_is_validated():
+    """Addresses are normalized, rejected when malformed and documented as format: email"""
+    assert UserCreate(username="a", email="Ada@Example.COM").email == "Ada@example.com"
+    assert UserCreate(username="a").email is None
+    with pytest.raises(ValidationError, match="not a valid email address"):
+        UserCreate(username="a", email="not-an-email")
+    assert {"type": "string", "format": "email"} in UserCreate.model_json_schema()["properties"]["email"]["anyOf"]
@@ -0,0 +1,175 @@
+"""
+Tests for the pluggable summary cache backends
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session as DBSession, SQLModel
+
+from app.cache_backends import (
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    create_cache_backend,
+    get_summary_cache,
+    set_summary_cache,
+    summary_key,
+)
+from app.conditional import get_user_version
+from app.db import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    """Reset database before each test"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def redis_backend():
+    """Install a Redis backend backed by an in-process fake server"""
+    fakeredis = pytest.importorskip("fakeredis")
+    previous = get_summary_cache()
+    backend = RedisCacheBackend(client=fakeredis.FakeRedis())
+    set_summary_cache(backend)
+    yield backend
+    set_summary_cache(previous)
+
+
+def _version(user_id):
+    with DBSession(engine) as db:
+        return get_user_version(db, user_id)[0]
+
+
+def _create_user_with_session(score=80):
+    user_id = client.post("/users", json={"username": "summary_user"}).json()["id"]
+    client.post("/sessions", json={
+        "user_id": user_id, "skill_type": "Drawing", "score": score, "feedback": "x"
+    })
+    return user_id
+
+
+def test_create_cache_backend_from_url():
+    """Test backend selection by URL"""
+    assert isinstance(create_cache_backend("memory://"), MemoryCacheBackend)
+    with pytest.raises(ValueError):
+        create_cache_backend("memcached://localhost")
+
+
+def test_memory_backend_roundtrip():
+    """Test set, get and delete on the in-memory backend"""
+    backend = MemoryCacheBackend(maxsize=10, ttl=60)
+    backend.set("k", b"v", 60)
+    assert backend.get("k") == b"v"
+    backend.delete("k", "missing")
+    assert backend.get("k") is None
+
+
+def test_summary_cached_and_invalidated_on_write():
+    """Test summaries are served from cache until the user writes again"""
+    user_id = _create_user_with_session(80)
+    cache = get_summary_cache()
+    
+    first = client.get(f"/sessions/summary?user_id={user_id}").json()
+    assert cache.get(summary_key(user_id, _version(user_id))) is not None
+    assert client.get(f"/sessions/summary?user_id={user_id}").json() == first
+    
+    client.post("/sessions", json={
+        "user_id": user_id, "skill_type": "Drawing", "score": 100, "feedback": "y"
+    })
+    assert cache.get(summary_key(user_id, _version(user_id))) is None
+    assert client.get(f"/sessions/summary?user_id={user_id}").json()["average_score"] == 90.0
+
+
+class WriteBeforeSet(MemoryCacheBackend):
+    """A backend where a session write commits between a summary's computation and its cache fill"""
+
+    def __init__(self, user_id):
+        super().__init__(maxsize=10, ttl=60)
+        self.user_id = user_id
+        self.raced = False
+
+    def set(self, key, value, ttl):
+        if not self.raced:
+            self.raced = True
+            client.post("/sessions", json={
+                "user_id": self.user_id, "skill_type": "Drawing", "score": 100, "feedback": "race"
+            })
+        super().set(key, value, ttl)
+
+
+def test_summary_computed_before_a_write_is_not_served_after_it():
+    """Test a cache fill that lands after a write cannot resurrect the old summary"""
+    user_id = _create_user_with_session(80)
+    previous = get_summary_cache()
+    set_summary_cache(WriteBeforeSet(user_id))
+    try:
+        assert client.get(f"/sessions/summary?user_id={user_id}").json()["total_sessions"] == 1
+        assert client.get(f"/sessions/summary?user_id={user_id}").json()["total_sessions"] == 2
+    finally:
+        set_summary_cache(previous)
+
+
+def test_summary_invalidated_by_batch():
+    """Test a batch upload drops the cached summary of every affected user"""
+    user_id = _create_user_with_session(50)
+    client.get(f"/sessions/summary?user_id={user_id}")
+    
+    client.post("/sessions/batch", json=[
+        {"user_id": user_id, "skill_type": "Yoga", "score": 70, "feedback": "z"}
+    ])
+    assert client.get(f"/sessions/summary?user_id={user_id}").json()["total_sessions"] == 2
+
+
+def test_redis_backend_shared_between_workers(redis_backend):
+    """Test two backends on one server see each other's fills and invalidations"""
+    other_worker = RedisCacheBackend(client=redis_backend.client)
+    user_id = _create_user_with_session(60)
+    
+    client.get(f"/sessions/summary?user_id={user_id}")
+    assert other_worker.get(summary_key(user_id, _version(user_id))) is not None
+    
+    client.post("/sessions", json={
+        "user_id": user_id, "skill_type": "Drawing", "score": 90, "feedback": "w"
+    })
+    assert other_worker.get(summary_key(user_id, _version(user_id))) is None
+    assert redis_backend.stats()["misses"] >= 1
+
+
+def test_cache_backend_is_abstract():
+    """Test a backend missing an operation cannot be instantiated"""
+    class Incomplete(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_redis_backend_clear_survives_outage():
+    """Test clear() on an unreachable Redis is logged and counted, not raised"""
+    pytest.importorskip("redis")
+    backend = RedisCacheBackend("redis://127.0.0.1:1/0")
+    backend.clear()
+    assert backend.stats()["errors"] == 1
+
+
+def test_redis_backend_failures_are_misses():
+    """Test an unreachable Redis degrades to recomputing summaries"""
+    pytest.importorskip("redis")
+    previous = get_summary_cache()
+    set_summary_cache(RedisCacheBackend("redis://127.0.0.1:1/0"))
+    try:
+        user_id = _create_user_with_session(40)
+        response = client.get(f"/sessions/summary?user_id={user_id}")
+        assert response.status_code == 200
+        assert response.json()["average_score"] == 40.0
+        assert get_summary_cache().stats()["errors"] >= 1
+    finally:
+        set_summary_cache(previous)
@@ -0,0 +1,82 @@
+"""
+Unit tests for time-bucketed score trends
+"""
+
+from datetime import date, datetime
+
+from app.models import Session as SessionModel
+from app.trends import compute_trends, histogram_percentile
+
+
+def _add_sessions(db_session, user_id, rows):
+    """Insert (skill_type, score, timestamp) rows"""
+    db_session.add_all([
+        SessionModel(user_id=user_id, skill_type=skill, score=score, feedback="Test", timestamp=ts)
+        for skill, score, ts in rows
+    ])
+    db_session.commit()
+
+
+def test_histogram_percentile_nearest_rank():
+    """Test percentiles over a (score, count) histogram"""
+    histogram = [(10, 1), (50, 2), (90, 1)]
+    assert histogram_percentile(histogram, 4, 25) == 10
+    assert histogram_percentile(histogram, 4, 50) == 50
+    assert histogram_percentile(histogram, 4, 75) == 50
+    assert histogram_percentile(histogram, 4, 90) == 90
+
+
+def test_daily_trends(db_session, sample_user):
+    """Test per-day count, average, min, max and percentiles"""
+    _add_sessions(db_session, sample_user.id, [
+        ("Drawing", 60, datetime(2024, 3, 4, 9)),
+        ("Drawing", 80, datetime(2024, 3, 4, 18)),
+        ("Yoga", 100, datetime(2024, 3, 4, 20)),
+        ("Drawing", 70, datetime(2024, 3, 6, 8)),
+    ])
+
+    buckets = compute_trends(db_session, sample_user.id, "day")
+    assert [b.bucket_start for b in buckets] == [date(2024, 3, 4), date(2024, 3, 6)]
+    first = buckets[0]
+    assert first.count == 3
+    assert first.average_score == 80.0
+    assert (first.min_score, first.max_score) == (60, 100)
+    assert (first.p25, first.p50, first.p90) == (60, 80, 100)
+
+    drawing = compute_trends(db_session, sample_user.id, "day", skill_type="Drawing")
+    assert [b.count for b in drawing] == [2, 1]
+
+
+def test_weekly_and_monthly_trends(db_session, sample_user):
+    """Test weeks start on Monday and months on the 1st"""
+    _add_sessions(db_session, sample_user.id, [
+        ("Drawing", 50, datetime(2024, 3, 3, 12)),   # Sunday
+        ("Drawing", 70, datetime(2024, 3, 4, 12)),   # Monday
+        ("Drawing", 90, datetime(2024, 3, 10, 12)),  # Sunday
+        ("Drawing", 40, datetime(2024, 4, 1, 12)),
+    ])
+
+    weeks = compute_trends(db_session, sample_user.id, "week")
+    assert [(b.bucket_start, b.count) for b in weeks] == [
+        (date(2024, 2, 26), 1),
+        (date(2024, 3, 4), 2),
+        (date(2024, 4, 1), 1),
+    ]
+
+    months = compute_trends(db_session, sample_user.id, "month")
+    assert [(b.bucket_start, b.count) for b in months] == [(date(2024, 3, 1), 3), (date(2024, 4, 1), 1)]
+
+
+def test_trends_time_range(db_session, sample_user):
+    """Test from is inclusive and to is exclusive"""
+    _add_sessions(db_session, sample_user.id, [
+        ("Drawing", 50, datetime(2024, 3, 1)),
+        ("Drawing", 60, datetime(2024, 3, 2)),
+        ("Drawing", 70, datetime(2024, 3, 3)),
+    ])
+
+    buckets = compute_trends(
+        db_session, sample_user.id, "day", start=datetime(2024, 3, 2), end=datetime(2024, 3, 3)
+    )
+    assert [b.bucket_start for b in buckets] == [date(2024, 3, 2)]
+    assert compute_trends(db_session, sample_user.id + 1, "day") == []
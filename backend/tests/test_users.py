@@ -125,3 +125,19 @@ def test_create_user_missing_username():
     response = client.post("/users", json={"email": "test@example.com"})
     assert response.status_code == 422  # Validation error
 
+
+
+def test_list_users_keyset_pagination():
+    """Test paging through users with limit and X-Next-Cursor"""
+    for i in range(3):
+        client.post("/users", json={"username": f"paged{i}"})
+    
+    first = client.get("/users?limit=2")
+    assert first.status_code == 200
+    assert [u["username"] for u in first.json()] == ["paged0", "paged1"]
+    cursor = first.headers["X-Next-Cursor"]
+    
+    second = client.get(f"/users?limit=2&cursor={cursor}")
+    assert second.status_code == 200
+    assert [u["username"] for u in second.json()] == ["paged2"]
+    assert "X-Next-Cursor" not in second.headers
@@ -161,6 +161,41 @@ describe('BackendClient', () => {
     });
   });
 
+  describe('syncSessionsBatch', () => {
+    it('should upload sessions in one request', async () => {
+      const mockResult = {
+        created: 2,
+        failed: 0,
+        results: [
+          { index: 0, status_code: 201, id: 1 },
+          { index: 1, status_code: 201, id: 2 },
+        ],
+      };
+
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        json: async () => mockResult,
+      } as Response);
+
+      const sessions = [
+        { user_id: 1, skill_type: 'Drawing', score: 85, feedback: 'Great work!' },
+        { user_id: 1, skill_type: 'Yoga', score: 70, feedback: 'Hold longer' },
+      ];
+      const client = new BackendClient('http://localhost:8000');
+      const result = await client.syncSessionsBatch(sessions);
+
+      expect(result).toEqual(mockResult);
+      expect(mockFetch).toHaveBeenCalledTimes(1);
+      expect(mockFetch).toHaveBeenCalledWith(
+        'http://localhost:8000/sessions/batch',
+        expect.objectContaining({
+          method: 'POST',
+          body: JSON.stringify(sessions),
+        })
+      );
+    });
+  });
+
   describe('fetchUserSessions', () => {
     it('should fetch user sessions', async () => {
       const mockSessions = [
@@ -196,6 +231,41 @@ describe('BackendClient', () => {
         expect.any(Object)
       );
     });
+
+    it('should follow X-Next-Cursor until the last page', async () => {
+      const session = (id: number) => ({
+        id,
+        user_id: 1,
+        skill_type: 'Drawing',
+        score: 80,
+        feedback: 'Good',
+        timestamp: new Date().toISOString(),
+      });
+      const pageHeaders = (cursor: string | null) =>
+        ({ get: (name: string) => (name === 'X-Next-Cursor' ? cursor : null) } as unknown as Headers);
+
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        status: 200,
+        headers: pageHeaders('abc+/='),
+        json: async () => [session(3), session(2)],
+      } as Response);
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        status: 200,
+        headers: pageHeaders(null),
+        json: async () => [session(1)],
+      } as Response);
+
+      const client = new BackendClient('http://localhost:8000');
+      const result = await client.fetchUserSessions(1);
+
+      expect(result.map((s) => s.id)).toEqual([3, 2, 1]);
+      expect(mockFetch).toHaveBeenLastCalledWith(
+        'http://localhost:8000/sessions?user_id=1&cursor=abc%2B%2F%3D',
+        expect.any(Object)
+      );
+    });
   });
 
   describe('getSessionSummary', () => {
@@ -229,6 +299,109 @@ describe('BackendClient', () => {
     });
   });
 
+  describe('getSessionTrends', () => {
+    it('should fetch bucketed trends', async () => {
+      const mockTrends = {
+        user_id: 1,
+        skill_type: 'Guitar',
+        bucket: 'week',
+        buckets: [
+          {
+            bucket_start: '2024-03-04',
+            count: 3,
+            average_score: 80.0,
+            min_score: 60,
+            max_score: 100,
+            p25: 60,
+            p50: 80,
+            p75: 100,
+            p90: 100,
+          },
+        ],
+      };
+
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        json: async () => mockTrends,
+      } as Response);
+
+      const client = new BackendClient('http://localhost:8000');
+      const result = await client.getSessionTrends(1, { bucket: 'week', skillType: 'Guitar' });
+
+      expect(result).toEqual(mockTrends);
+      expect(mockFetch).toHaveBeenCalledWith(
+        'http://localhost:8000/sessions/trends?user_id=1&bucket=week&skill_type=Guitar',
+        expect.any(Object)
+      );
+    });
+  });
+
+  describe('getSkillRank', () => {
+    it('should fetch a user rank for a skill', async () => {
+      const mockRank = {
+        user_id: 1,
+        skill_type: 'Guitar',
+        best_score: 90,
+        rank: 2,
+        total_users: 10,
+        top_percent: 20,
+        percentile: 80.0,
+      };
+
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        json: async () => mockRank,
+      } as Response);
+
+      const client = new BackendClient('http://localhost:8000');
+      const result = await client.getSkillRank('Guitar', 1);
+
+      expect(result).toEqual(mockRank);
+      expect(mockFetch).toHaveBeenCalledWith(
+        'http://localhost:8000/leaderboard/Guitar/users/1',
+        expect.any(Object)
+      );
+    });
+  });
+
+  describe('conditional requests', () => {
+    it('should revalidate with If-None-Match and reuse the body on 304', async () => {
+      const mockSummary = {
+        total_sessions: 1,
+        average_score: 80.0,
+        average_score_by_skill: { Drawing: 80.0 },
+        sessions_by_skill: { Drawing: 1 },
+      };
+
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        status: 200,
+        headers: { get: () => '"abc"' } as unknown as Headers,
+        json: async () => mockSummary,
+      } as Response);
+      mockFetch.mockResolvedValueOnce({
+        ok: false,
+        status: 304,
+        headers: { get: () => '"abc"' } as unknown as Headers,
+        json: async () => {
+          throw new Error('No body');
+        },
+      } as Response);
+
+      const client = new BackendClient('http://localhost:8000');
+      await client.getSessionSummary(1);
+      const result = await client.getSessionSummary(1);
+
+      expect(result).toEqual(mockSummary);
+      expect(mockFetch).toHaveBeenLastCalledWith(
+        'http://localhost:8000/sessions/summary?user_id=1',
+        expect.objectContaining({
+          headers: expect.objectContaining({ 'If-None-Match': '"abc"' }),
+        })
+      );
+    });
+  });
+
   describe('error handling', () => {
     it('should handle network errors', async () => {
       mockFetch.mockRejectedValueOnce(new Error('Network error'));
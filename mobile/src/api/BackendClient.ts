@@ -19,8 +19,22 @@ interface ApiError {
   status?: number;
 }
 
+interface CachedResponse {
+  etag: string;
+  body: unknown;
+  nextCursor: string | null;
+}
+
+interface Page<T> {
+  body: T;
+  // X-Next-Cursor of list endpoints; null on the last page
+  nextCursor: string | null;
+}
+
 class BackendClient {
   private baseUrl: string;
+  // Last ETag and body per GET URL, revalidated with If-None-Match
+  private etagCache = new Map<string, CachedResponse>();
 
   constructor(baseUrl: string = API_BASE_URL) {
     this.baseUrl = baseUrl;
@@ -30,23 +44,43 @@ class BackendClient {
     endpoint: string,
     options: RequestInit = {}
   ): Promise<T> {
+    return (await this.requestPage<T>(endpoint, options)).body;
+  }
+
+  private async requestPage<T>(
+    endpoint: string,
+    options: RequestInit = {}
+  ): Promise<Page<T>> {
     const url = `${this.baseUrl}${endpoint}`;
+    const isGet = !options.method || options.method.toUpperCase() === 'GET';
+    const cached = isGet ? this.etagCache.get(url) : undefined;
     
     try {
       const response = await fetch(url, {
         ...options,
         headers: {
           'Content-Type': 'application/json',
+          ...(cached ? { 'If-None-Match': cached.etag } : {}),
           ...options.headers,
         },
       });
 
+      if (response.status === 304 && cached) {
+        return { body: cached.body as T, nextCursor: cached.nextCursor };
+      }
+
       if (!response.ok) {
         const error = await response.json().catch(() => ({ message: 'Unknown error' }));
         throw new Error(error.detail || error.message || `HTTP ${response.status}`);
       }
 
-      return await response.json();
+      const body = await response.json();
+      const nextCursor = response.headers?.get('X-Next-Cursor') ?? null;
+      const etag = isGet ? response.headers?.get('ETag') : null;
+      if (etag) {
+        this.etagCache.set(url, { etag, body, nextCursor });
+      }
+      return { body, nextCursor };
     } catch (error) {
       if (error instanceof Error) {
         throw new Error(`API request failed: ${error.message}`);
@@ -96,10 +130,42 @@ class BackendClient {
   }
 
   /**
-   * Fetch sessions for a user
+   * Upload several sessions (e.g. recorded offline) in one request.
+   * Results are reported per item, in the same order as the input.
+   */
+  async syncSessionsBatch(sessions: Array<{
+    user_id: number;
+    skill_type: string;
+    score: number;
+    feedback: string;
+    metadata?: string;
+  }>): Promise<{
+    created: number;
+    failed: number;
+    results: Array<{ index: number; status_code: number; id?: number; detail?: string }>;
+  }> {
+    return this.request('/sessions/batch', {
+      method: 'POST',
+      body: JSON.stringify(sessions),
+    });
+  }
+
+  /**
+   * Fetch all sessions for a user, newest first, following X-Next-Cursor
+   * until the last page
    */
   async fetchUserSessions(userId: number): Promise<Session[]> {
-    return this.request<Session[]>(`/sessions?user_id=${userId}`);
+    const sessions: Session[] = [];
+    let cursor: string | null = null;
+    do {
+      const endpoint: string = cursor
+        ? `/sessions?user_id=${userId}&cursor=${encodeURIComponent(cursor)}`
+        : `/sessions?user_id=${userId}`;
+      const page: Page<Session[]> = await this.requestPage<Session[]>(endpoint);
+      sessions.push(...page.body);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return sessions;
   }
 
   /**
@@ -113,6 +179,50 @@ class BackendClient {
   }> {
     return this.request(`/sessions/summary?user_id=${userId}`);
   }
+
+  /**
+   * Get per-day/week/month score trends, aggregated on the server
+   */
+  async getSessionTrends(
+    userId: number,
+    options: { bucket?: 'day' | 'week' | 'month'; skillType?: string; from?: string; to?: string } = {}
+  ): Promise<{
+    user_id: number;
+    skill_type: string | null;
+    bucket: string;
+    buckets: Array<{
+      bucket_start: string;
+      count: number;
+      average_score: number;
+      min_score: number;
+      max_score: number;
+      p25: number;
+      p50: number;
+      p75: number;
+      p90: number;
+    }>;
+  }> {
+    const params = new URLSearchParams({ user_id: String(userId), bucket: options.bucket ?? 'day' });
+    if (options.skillType) params.append('skill_type', options.skillType);
+    if (options.from) params.append('from', options.from);
+    if (options.to) params.append('to', options.to);
+    return this.request(`/sessions/trends?${params.toString()}`);
+  }
+
+  /**
+   * Get a user's rank for a skill ("top 12% for Guitar")
+   */
+  async getSkillRank(skillType: string, userId: number): Promise<{
+    user_id: number;
+    skill_type: string;
+    best_score: number;
+    rank: number;
+    total_users: number;
+    top_percent: number;
+    percentile: number;
+  }> {
+    return this.request(`/leaderboard/${encodeURIComponent(skillType)}/users/${userId}`);
+  }
 }
 
 export const backendClient = new BackendClient();